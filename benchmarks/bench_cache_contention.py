@@ -0,0 +1,94 @@
+"""
+Contention benchmark of StorageWithCache.
+
+Runs concurrent simulated characters doing mixed loads and saves against one table. The database is
+simulated by a memory storage with a fixed io latency. Compares one lock for the whole table
+(lock_stripes=1) with striped per-category locks. Run it in the repository's root directory:
+
+    python benchmarks/bench_cache_contention.py --characters 500 --ops 200 --latency 0.002
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+from argparse import ArgumentParser
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from muddery.server.database.storage.memory_kv_storage import MemoryKVStorage
+from muddery.server.database.storage.storage_with_cache import StorageWithCache
+
+
+class SlowStorage(MemoryKVStorage):
+    """
+    A memory storage which simulates the database's io latency.
+    """
+    def __init__(self, latency):
+        super(SlowStorage, self).__init__()
+        self.latency = latency
+
+    async def save(self, category, key, value=None):
+        await asyncio.sleep(self.latency)
+        await super(SlowStorage, self).save(category, key, value)
+
+    async def load_category(self, category, *default):
+        await asyncio.sleep(self.latency)
+        return await super(SlowStorage, self).load_category(category, *default)
+
+
+async def run_character(storage, char_id, ops, write_ratio, latencies):
+    """
+    A character reads and writes its own inventory.
+    """
+    rand = random.Random(char_id)
+    for i in range(ops):
+        key = "item%d" % rand.randint(0, 20)
+        begin = time.perf_counter()
+        if rand.random() < write_ratio:
+            await storage.save(char_id, key, {"number": i})
+        else:
+            await storage.load(char_id, key, None)
+        latencies.append(time.perf_counter() - begin)
+
+        # Wait for the next command.
+        await asyncio.sleep(0)
+
+
+async def run(characters, ops, write_ratio, latency, stripes):
+    storage = StorageWithCache(SlowStorage(latency), MemoryKVStorage(), lock_stripes=stripes)
+    latencies = []
+
+    begin = time.perf_counter()
+    await asyncio.gather(*[
+        run_character(storage, char_id, ops, write_ratio, latencies) for char_id in range(characters)
+    ])
+    total_time = time.perf_counter() - begin
+
+    latencies.sort()
+    return {
+        "ops/s": len(latencies) / total_time,
+        "p50 ms": latencies[len(latencies) // 2] * 1000,
+        "p99 ms": latencies[int(len(latencies) * 0.99)] * 1000,
+    }
+
+
+async def main(characters, ops, write_ratio, latency):
+    print("%d characters, %d operations each, %d%% writes, %.1fms io latency" %
+          (characters, ops, write_ratio * 100, latency * 1000))
+    for stripes in (1, 64):
+        result = await run(characters, ops, write_ratio, latency, stripes)
+        print("lock stripes %3d: %10.1f ops/s, p50 %8.3f ms, p99 %8.3f ms" %
+              (stripes, result["ops/s"], result["p50 ms"], result["p99 ms"]))
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--characters", type=int, default=500)
+    parser.add_argument("--ops", type=int, default=200)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--latency", type=float, default=0.002)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.characters, args.ops, args.write_ratio, args.latency))
@@ -0,0 +1,72 @@
+"""
+Allocation benchmark of MemoryKVStorage's category reads.
+
+Compares load_category, which copies the category's dict, with load_category_view, which returns a
+read-only view. The last results are kept alive like the data held by running commands, allocations
+are measured with tracemalloc. Run it in the repository's root directory:
+
+    python benchmarks/bench_cache_views.py --characters 1000 --keys 100 --reads 100000
+"""
+
+import os
+import sys
+import time
+import asyncio
+import tracemalloc
+from collections import deque
+from argparse import ArgumentParser
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from muddery.server.database.storage.memory_kv_cache import MemoryKVCache
+
+
+async def run_reads(cache, load, characters, reads, write_every, hold):
+    """
+    Read categories, write a key every write_every reads to trigger copies on write.
+    """
+    held = deque(maxlen=hold)
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    begin = time.perf_counter()
+
+    for i in range(reads):
+        category = i % characters
+        data = await load(category)
+        held.append(data)
+        if write_every and i % write_every == 0:
+            await cache.save(category, "key0", {"number": i})
+
+    elapsed = time.perf_counter() - begin
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+async def main(characters, keys, reads, write_every, hold):
+    print("%d characters, %d keys each, %d reads, a write every %s reads" %
+          (characters, keys, reads, write_every or "no"))
+
+    for name in ("load_category", "load_category_view"):
+        cache = MemoryKVCache()
+        for category in range(characters):
+            await cache.set_category(category, {
+                "key%d" % i: {"object_key": "item%d" % i, "number": 1, "level": 1} for i in range(keys)
+            })
+
+        load = getattr(cache, name)
+        elapsed, peak = await run_reads(cache, load, characters, reads, write_every, hold)
+        print("%-20s %8.3f s, %10.1f reads/s, peak traced memory %10d bytes" %
+              (name, elapsed, reads / elapsed, peak))
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--characters", type=int, default=1000)
+    parser.add_argument("--keys", type=int, default=100)
+    parser.add_argument("--reads", type=int, default=100000)
+    parser.add_argument("--hold", type=int, default=1000)
+    parser.add_argument("--write-every", type=int, default=100)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.characters, args.keys, args.reads, args.write_every, args.hold))
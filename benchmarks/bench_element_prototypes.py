@@ -0,0 +1,106 @@
+"""
+Benchmark of elements' shared const data.
+
+Boots the world of a game directory, then sets up thousands of NPCs of the same key and level, with and without
+SHARE_ELEMENT_DATA. Each run starts in a new process and reports the time and the growth of the process's
+resident memory. Run it in the repository's root directory:
+
+    python benchmarks/bench_element_prototypes.py --game-dir <game directory> --mobs 5000
+"""
+
+import os
+import sys
+import time
+import asyncio
+import subprocess
+from argparse import ArgumentParser
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def get_rss():
+    """
+    Get the process's resident memory in bytes.
+    """
+    with open("/proc/self/statm") as fp:
+        return int(fp.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def startup(share_data, mobs, npc_key):
+    """
+    Boot the world and set up mobs in this process.
+    """
+    from muddery.launcher import utils
+    utils.init_game_env(os.getcwd())
+
+    from muddery.server.settings import SETTINGS
+    from server.settings import ServerSettings
+    SETTINGS.update(ServerSettings())
+    SETTINGS.SHARE_ELEMENT_DATA = share_data
+
+    from muddery.server.server import Server
+    from muddery.server.mappings.element_set import ELEMENT
+    from muddery.server.database.worlddata.worlddata import WorldData
+    from muddery.common.utils.utils import async_wait
+
+    async def run():
+        begin = time.perf_counter()
+        await Server.inst().init()
+        boot_time = time.perf_counter() - begin
+
+        record = WorldData.get_table_all("world_npcs")[0]
+        if npc_key:
+            record = WorldData.get_table_data("world_npcs", key=npc_key)[0]
+        tables_data = WorldData.get_tables_data(ELEMENT("WORLD_NPC").get_models(), record.key)[0]
+
+        rss = get_rss()
+        begin = time.perf_counter()
+        npcs = [ELEMENT(tables_data.element_type)() for i in range(mobs)]
+        await async_wait([
+            npc.setup_element(tables_data.key, level=tables_data.level, first_time=True) for npc in npcs
+        ])
+        mobs_time = time.perf_counter() - begin
+        mobs_memory = get_rss() - rss
+
+        print("%f %f %d" % (boot_time, mobs_time, mobs_memory))
+
+    asyncio.run(run())
+
+
+def main(game_dir, runs, mobs, npc_key):
+    results = {}
+    for share_data in (False, True):
+        times = []
+        for i in range(runs):
+            args = [sys.executable, os.path.abspath(__file__), "--startup", "share" if share_data else "copy",
+                    "--mobs", str(mobs)]
+            if npc_key:
+                args.extend(["--npc", npc_key])
+            output = subprocess.check_output(
+                args,
+                cwd=game_dir,
+                env=dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+            )
+            times.append([float(value) for value in output.split()[-3:]])
+        results[share_data] = [min(item[index] for item in times) for index in range(3)]
+
+    print("%d mobs" % mobs)
+    for share_data, (boot_time, mobs_time, mobs_memory) in results.items():
+        print("%-6s boot the world %8.3f s, set up mobs %8.3f s, %8.1f MB, %8.1f bytes/mob" % (
+            "shared" if share_data else "copied", boot_time, mobs_time, mobs_memory / 1024 / 1024,
+            mobs_memory / mobs))
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--game-dir", default=".")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--mobs", type=int, default=5000)
+    parser.add_argument("--npc", help="the key of the world NPC to copy, the first world NPC by default")
+    parser.add_argument("--startup", choices=("copy", "share"), help="run one startup in this process")
+    args = parser.parse_args()
+
+    if args.startup:
+        startup(args.startup == "share", args.mobs, args.npc)
+    else:
+        main(os.path.abspath(args.game_dir), args.runs, args.mobs, args.npc)
@@ -0,0 +1,80 @@
+"""
+Benchmark of honour rankings.
+
+Compares re-sorting all characters after every honour change, which HonoursMapper did before, with the
+RankedList order-statistic structure. Run it in the repository's root directory:
+
+    python benchmarks/bench_honour_rankings.py --characters 1000000 --updates 10000
+"""
+
+import os
+import sys
+import time
+import random
+from argparse import ArgumentParser
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from muddery.common.utils.ranked_list import RankedList
+
+
+def resort(honours):
+    """
+    The old way: sort all characters.
+    """
+    rankings = sorted(honours.items(), key=lambda x: x[1], reverse=True)
+    return [item[0] for item in rankings if item[1] >= 0]
+
+
+def run_resort(honours, updates):
+    begin = time.perf_counter()
+    for char_id, honour in updates:
+        honours[char_id] = honour
+        rankings = resort(honours)
+    return time.perf_counter() - begin
+
+
+def run_ranked_list(honours, updates, page_size):
+    build_begin = time.perf_counter()
+    rankings = RankedList((-honour, char_id) for char_id, honour in honours.items())
+    build_time = time.perf_counter() - build_begin
+
+    begin = time.perf_counter()
+    for char_id, honour in updates:
+        rankings.remove((-honours[char_id], char_id))
+        honours[char_id] = honour
+        rankings.add((-honour, char_id))
+
+        # The character's ranking and the page around it.
+        ranking = rankings.bisect_left((-honour,)) + 1
+        place = rankings.index((-honour, char_id))
+        rankings.slice(place - page_size // 2, place + page_size // 2 + 1)
+    return build_time, time.perf_counter() - begin
+
+
+def main(characters, updates, resort_updates, page_size):
+    rand = random.Random(0)
+    honours = {char_id: rand.randint(0, 3000) for char_id in range(characters)}
+    changes = [(rand.randrange(characters), rand.randint(0, 3000)) for i in range(updates)]
+    print("%d characters, %d honour updates" % (characters, updates))
+
+    build_time, elapsed = run_ranked_list(dict(honours), changes, page_size)
+    print("ranked list: build %8.3f s, %10.1f updates/s (update, ranking and a page of %d)" %
+          (build_time, updates / elapsed, page_size))
+
+    if resort_updates:
+        elapsed = run_resort(dict(honours), changes[:resort_updates])
+        print("re-sort:                     %10.1f updates/s (%d updates)" %
+              (resort_updates / elapsed, resort_updates))
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--characters", type=int, default=1000000)
+    parser.add_argument("--updates", type=int, default=10000)
+    parser.add_argument("--resort-updates", type=int, default=3,
+                        help="updates to run with re-sorting, it is slow with many characters")
+    parser.add_argument("--page-size", type=int, default=10)
+    args = parser.parse_args()
+
+    main(args.characters, args.updates, args.resort_updates, args.page_size)
@@ -0,0 +1,95 @@
+"""
+Benchmark of TableKVStorage's save paths on a character_states table.
+
+Compares the old path (UPDATE, then INSERT if no rows matched) with the upsert path
+(INSERT ... ON CONFLICT DO UPDATE). Run it in the repository's root directory:
+
+    python benchmarks/bench_kv_upsert.py --rows 100000 --writes 5000
+"""
+
+import os
+import sys
+import time
+import asyncio
+import tempfile
+from argparse import ArgumentParser
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+from muddery.server.database import gamedata_models
+from muddery.server.database.storage.table_kv_storage import TableKVStorage
+
+
+KEYS_PER_OBJECT = 100
+
+
+def create_db(path, rows):
+    """
+    Create a character_states table with the given number of rows.
+    """
+    engine = create_engine("sqlite:///%s" % path)
+    gamedata_models.Base.metadata.create_all(engine)
+
+    objects = rows // KEYS_PER_OBJECT
+    with engine.begin() as conn:
+        conn.execute(insert(gamedata_models.character_states.__table__), [
+            {"obj_id": obj_id, "key": "key%d" % i, "value": "0"}
+            for obj_id in range(objects) for i in range(KEYS_PER_OBJECT)
+        ])
+    return engine
+
+
+async def run_writes(save, objects, writes, new_keys):
+    """
+    Save values, half of them update existing keys if new_keys is False.
+    """
+    begin = time.perf_counter()
+    for i in range(writes):
+        obj_id = i % objects
+        if new_keys:
+            key = "new%d" % i
+        else:
+            key = "key%d" % (i % KEYS_PER_OBJECT)
+        await save(obj_id, key, str(i))
+    return time.perf_counter() - begin
+
+
+async def main(rows, writes):
+    print("Creating %d rows ..." % rows)
+    objects = rows // KEYS_PER_OBJECT
+
+    results = {}
+    for name in ("update+insert", "upsert"):
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_db(os.path.join(tmp, "gamedata.db3"), rows)
+            session = Session(engine, autocommit=True)
+            storage = TableKVStorage(session, "muddery.server.database.gamedata_models", "character_states",
+                                     "obj_id", "key", "value")
+
+            if name == "upsert":
+                save = storage.save
+            else:
+                async def save(category, key, value):
+                    await storage.save_by_update(category, key, {"value": value})
+
+            update_time = await run_writes(save, objects, writes, False)
+            insert_time = await run_writes(save, objects, writes, True)
+            results[name] = (update_time, insert_time)
+
+            session.close()
+            engine.dispose()
+
+    print()
+    print("%-16s %16s %16s" % ("path", "updates/s", "inserts/s"))
+    for name, (update_time, insert_time) in results.items():
+        print("%-16s %16.0f %16.0f" % (name, writes / update_time, writes / insert_time))
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000, help="rows in the character_states table")
+    parser.add_argument("--writes", type=int, default=5000, help="number of updates and inserts")
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.writes))
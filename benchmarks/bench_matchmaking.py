@@ -0,0 +1,137 @@
+"""
+Benchmark of honour combat matchmaking.
+
+Queues characters with random honours and runs match passes every match interval on a simulated clock.
+Matched characters leave the queue. Reports matches per second of match passes and the distribution of
+wait times. The old nested loop can be run on a smaller queue with --naive. Run it in the repository's
+root directory:
+
+    python benchmarks/bench_matchmaking.py --characters 50000 --max-honour-diff 50 --growth 5
+"""
+
+import os
+import sys
+import time
+import random
+from collections import deque
+from argparse import ArgumentParser
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from muddery.common.utils.utils import class_from_path
+from muddery.server.combat.matchmaking import MatchQueue
+
+
+STRATEGIES = {
+    "neighbour": "muddery.server.combat.matchmaking.NeighbourPairingStrategy",
+    "longest_wait": "muddery.server.combat.matchmaking.LongestWaitPairingStrategy",
+}
+
+
+def naive_pass(queue, honours, max_honour_diff):
+    """
+    The old nested loop over a deque.
+    """
+    pairs = []
+    matched = set()
+    for i in range(len(queue) - 1):
+        char_id_a = queue[i]
+        if char_id_a in matched:
+            continue
+        for j in range(i + 1, len(queue)):
+            char_id_b = queue[j]
+            if char_id_b in matched:
+                continue
+            if max_honour_diff == 0 or abs(honours[char_id_a] - honours[char_id_b]) <= max_honour_diff:
+                matched.add(char_id_a)
+                matched.add(char_id_b)
+                pairs.append((char_id_a, char_id_b))
+                break
+    return pairs
+
+
+def percentile(values, ratio):
+    if not values:
+        return 0
+    return values[min(int(len(values) * ratio), len(values) - 1)]
+
+
+def run(strategy_path, honours, join_times, args):
+    queue = MatchQueue()
+    for char_id, honour in enumerate(honours):
+        queue.add(char_id, honour, join_times[char_id])
+
+    strategy = class_from_path(strategy_path)(args.max_honour_diff, args.growth, args.max_tolerance)
+
+    now = 0
+    pass_time = 0
+    matches = 0
+    waits = []
+    for i in range(args.passes):
+        now += args.interval
+        begin = time.perf_counter()
+        pairs = strategy.pair(queue.sorted_entries(), now)
+        for char_id_a, char_id_b in pairs:
+            queue.remove(char_id_a)
+            queue.remove(char_id_b)
+        pass_time += time.perf_counter() - begin
+
+        matches += len(pairs)
+        for pair in pairs:
+            for char_id in pair:
+                waits.append(now - join_times[char_id])
+
+        if not queue:
+            break
+
+    waits.sort()
+    return {
+        "matches": matches,
+        "matches/s": matches / pass_time if pass_time else 0,
+        "pass ms": pass_time / (i + 1) * 1000,
+        "left": len(queue),
+        "p50": percentile(waits, 0.5),
+        "p90": percentile(waits, 0.9),
+        "p99": percentile(waits, 0.99),
+        "max": waits[-1] if waits else 0,
+    }
+
+
+def main(args):
+    rand = random.Random(0)
+    honours = [max(int(rand.gauss(1500, 300)), 0) for i in range(args.characters)]
+    # Characters joined in the last match interval.
+    join_times = [rand.uniform(-args.interval, 0) for i in range(args.characters)]
+
+    print("%d characters, max honour diff %s, tolerance growth %s/s, match interval %ss" %
+          (args.characters, args.max_honour_diff, args.growth, args.interval))
+
+    for name, path in STRATEGIES.items():
+        result = run(path, honours, join_times, args)
+        print("%-12s %7d matches, %10.1f matches/s, %8.2f ms/pass, %6d left, "
+              "wait p50 %5.1fs p90 %5.1fs p99 %5.1fs max %5.1fs" %
+              (name, result["matches"], result["matches/s"], result["pass ms"], result["left"],
+               result["p50"], result["p90"], result["p99"], result["max"]))
+
+    if args.naive:
+        queue = deque(range(min(args.naive, args.characters)))
+        begin = time.perf_counter()
+        pairs = naive_pass(queue, honours, args.max_honour_diff)
+        elapsed = time.perf_counter() - begin
+        print("%-12s %7d matches, %10.1f matches/s, %8.2f ms/pass (%d characters, one pass)" %
+              ("nested loop", len(pairs), len(pairs) / elapsed, elapsed * 1000, len(queue)))
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--characters", type=int, default=50000)
+    parser.add_argument("--max-honour-diff", type=float, default=50)
+    parser.add_argument("--growth", type=float, default=5, help="tolerance growth per second")
+    parser.add_argument("--max-tolerance", type=float, default=0)
+    parser.add_argument("--interval", type=float, default=10, help="seconds between match passes")
+    parser.add_argument("--passes", type=int, default=30)
+    parser.add_argument("--naive", type=int, default=5000,
+                        help="run the old nested loop on this many characters, 0 to skip")
+    args = parser.parse_args()
+
+    main(args)
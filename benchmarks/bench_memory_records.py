@@ -0,0 +1,131 @@
+"""
+Benchmark of world data records.
+
+Fills localized_strings and element_properties tables in an in-memory sqlite database, loads them with
+MemoryTable, and compares the old records, which keep a list of data and look up fields in a dict on every
+access, with slotted record classes. Run it in the repository's root directory:
+
+    python benchmarks/bench_memory_records.py --rows 200000
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from muddery.server.database import worlddata_models
+from muddery.server.database.storage.memory_table import MemoryTable
+from muddery.server.database.storage.memory_record import record_class
+
+
+MODELS = "muddery.server.database.worlddata_models"
+
+
+class OldMemoryRecord(object):
+    """
+    The old record.
+    """
+    def __init__(self, fields, data):
+        object.__setattr__(self, "_fields", fields)
+        object.__setattr__(self, "_records", data)
+
+    def __getattribute__(self, attr_name):
+        try:
+            pos = object.__getattribute__(self, "_fields")[attr_name]
+        except KeyError:
+            raise AttributeError("Can not find field %s." % attr_name)
+        return object.__getattribute__(self, "_records")[pos]
+
+
+def fill_tables(session, rows):
+    levels = 10
+    session.execute(insert(worlddata_models.localized_strings.__table__), [{
+        "system_data": False,
+        "category": "category_%d" % (i % 100),
+        "origin": "origin string %d" % i,
+        "local": "localized string %d" % i,
+    } for i in range(rows)])
+
+    session.execute(insert(worlddata_models.element_properties.__table__), [{
+        "element": "CHARACTER",
+        "key": "character_%d" % (i // (levels * 5)),
+        "level": i // 5 % levels,
+        "property": "property_%d" % (i % 5),
+        "value": str(i),
+    } for i in range(rows)])
+
+
+def build_old(table, rows):
+    """
+    Records in the old way.
+    """
+    fields = table.fields()
+    return [OldMemoryRecord(fields, list(row)) for row in rows]
+
+
+def build_new(table, rows):
+    cls = record_class(table.columns, "%s_record" % table.model_name)
+    return [cls(row) for row in rows]
+
+
+def measure_memory(func):
+    tracemalloc.start()
+    begin = tracemalloc.get_traced_memory()[0]
+    result = func()
+    size = tracemalloc.get_traced_memory()[0] - begin
+    tracemalloc.stop()
+    return result, size
+
+
+def run_getattr(records, fields, rounds):
+    begin = time.perf_counter()
+    for i in range(rounds):
+        for record in records:
+            for field in fields:
+                getattr(record, field)
+    return time.perf_counter() - begin
+
+
+def main(rows, rounds):
+    engine = create_engine("sqlite://")
+    for model in (worlddata_models.localized_strings, worlddata_models.element_properties):
+        model.__table__.create(engine)
+
+    session = sessionmaker(engine, autocommit=True)()
+    with session.begin():
+        fill_tables(session, rows)
+    print("%d rows per table" % rows)
+
+    for table_name in ("localized_strings", "element_properties"):
+        begin = time.perf_counter()
+        table = MemoryTable(session, MODELS, table_name)
+        load_time = time.perf_counter() - begin
+
+        # Build records from the same values, so only records' own memory is counted.
+        fields = [field for field in table.columns if field != "id"]
+        values = [[getattr(record, field) for field in table.columns] for record in table.records]
+        old_records, old_size = measure_memory(lambda: build_old(table, values))
+        new_records, new_size = measure_memory(lambda: build_new(table, values))
+
+        old_time = run_getattr(old_records, fields, rounds)
+        new_time = run_getattr(new_records, fields, rounds)
+        reads = rounds * len(new_records) * len(fields)
+
+        print(table_name)
+        print("    load:        %8.3f s (with indexes)" % load_time)
+        print("    old records: %12.1f reads/s, %6.1f bytes/row" % (reads / old_time, old_size / rows))
+        print("    new records: %12.1f reads/s, %6.1f bytes/row" % (reads / new_time, new_size / rows))
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    main(args.rows, args.rounds)
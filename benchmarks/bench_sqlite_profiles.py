@@ -0,0 +1,73 @@
+"""
+Benchmark of sqlite3 profiles.
+
+Updates objects' numbers in a character_inventory table through TableKVStorage, each update is a
+transaction like the game server's writes. Compares write throughput under each sqlite3 profile.
+Run it in the repository's root directory:
+
+    python benchmarks/bench_sqlite_profiles.py --characters 1000 --writes 5000
+"""
+
+import os
+import sys
+import time
+import asyncio
+import tempfile
+from argparse import ArgumentParser
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from muddery.common.database.engines import get_engine, SQLITE3_PROFILES
+from muddery.server.database import gamedata_models
+from muddery.server.database.storage.table_kv_storage import TableKVStorage
+
+
+OBJECTS_PER_CHARACTER = 20
+
+
+def create_db(path, profile, characters):
+    """
+    Create a character_inventory table with objects of the given number of characters.
+    """
+    engine = get_engine("sqlite3", {"NAME": path, "DEBUG": False, "SQLITE_PROFILE": profile})
+    gamedata_models.Base.metadata.create_all(engine)
+
+    with engine.begin() as conn:
+        conn.execute(insert(gamedata_models.character_inventory.__table__), [
+            {"character_id": char_id, "position": pos, "object_key": "object_%d" % pos, "number": 1, "level": 1}
+            for char_id in range(characters) for pos in range(OBJECTS_PER_CHARACTER)
+        ])
+    return engine
+
+
+async def run_writes(storage, characters, writes):
+    begin = time.perf_counter()
+    for i in range(writes):
+        await storage.save(i % characters, i % OBJECTS_PER_CHARACTER, {"number": i})
+    return time.perf_counter() - begin
+
+
+async def main(characters, writes):
+    print("%d characters, %d objects each, %d updates" % (characters, OBJECTS_PER_CHARACTER, writes))
+    for profile in SQLITE3_PROFILES:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_db(os.path.join(tmp, "gamedata.db3"), profile, characters)
+            session = Session(engine, autocommit=True)
+            storage = TableKVStorage(session, "muddery.server.database.gamedata_models", "character_inventory",
+                                     "character_id", "position")
+
+            write_time = await run_writes(storage, characters, writes)
+            print("%-12s %10.0f updates/s" % (profile, writes / write_time))
+
+            session.close()
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--characters", type=int, default=1000)
+    parser.add_argument("--writes", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(main(args.characters, args.writes))
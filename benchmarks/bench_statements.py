@@ -0,0 +1,164 @@
+"""
+Benchmark of the statement engine.
+
+Collects all conditions and skill functions in the example_cn template's world data, then runs them with the
+old interpreter, which parses statements and calls eval() on every run, and with compiled statements.
+Conditions are compiled in both the eager mode and the lazy mode, and the lazy mode's skipped functions
+are counted.
+Statement functions are replaced by functions which return fixed results, so only the engine's cost is
+measured. Run it in the repository's root directory:
+
+    python benchmarks/bench_statements.py --rounds 2000
+"""
+
+import os
+import re
+import ast
+import csv
+import sys
+import time
+import glob
+import asyncio
+from argparse import ArgumentParser
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from muddery.server.statements.statement_function import StatementFunction
+from muddery.server.statements.statement_func_set import BaseStatementFuncSet
+from muddery.server.statements.statement_compiler import compile_condition, compile_function_list, re_function
+from muddery.server.statements.statement_compiler import CONDITION_FUNCTION_STATS
+from muddery.common.utils.utils import async_gather
+
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         "muddery", "game_templates", "example_cn", "worlddata", "data")
+
+
+class AnyFuncSet(BaseStatementFuncSet):
+    """
+    A function set which has every function. Results depend on the function's args.
+    """
+    def get_func_class(self, key):
+        if key not in self.funcs:
+            class Func(StatementFunction):
+                async def func(self):
+                    return hash(self.args) % 3 != 0
+            Func.key = key
+            self.add(Func)
+        return self.funcs[key]
+
+
+def load_statements():
+    """
+    Get conditions and skill functions in world data.
+    """
+    conditions = []
+    skills = []
+    for filename in glob.glob(os.path.join(DATA_PATH, "*.csv")):
+        with open(filename, encoding="utf-8") as fp:
+            rows = list(csv.reader(fp))
+        if not rows:
+            continue
+
+        header = rows[0]
+        for index, field in enumerate(header):
+            if field.endswith("condition"):
+                target = conditions
+            elif os.path.basename(filename) == "skills.csv" and field == "function":
+                target = skills
+            else:
+                continue
+
+            for row in rows[1:]:
+                if index < len(row) and re_function.search(row[index]):
+                    target.append(row[index])
+
+    return conditions, skills
+
+
+async def old_exec_function(func_set, func_word, caller, obj):
+    try:
+        pos = func_word.index("(")
+        func_key = func_word[:pos]
+        func_args = ast.literal_eval(func_word[pos:])
+        if type(func_args) != tuple:
+            func_args = (func_args,)
+    except ValueError:
+        func_key = func_word
+        func_args = ()
+
+    func_obj = func_set.get_func_class(func_key)()
+    func_obj.set(caller, obj, func_args)
+    return await func_obj.func()
+
+
+async def old_match_condition(func_set, condition, caller, obj):
+    """
+    The old interpreter.
+    """
+    matches = re_function.findall(condition)
+    results = await async_gather([old_exec_function(func_set, match, caller, obj) for match in matches])
+    values = {
+        match: "None" if results[i] is None else "True" if results[i] else "False" for i, match in enumerate(matches)
+    }
+    exec_string = re_function.sub(lambda word: values.get(word.group(), "None"), condition)
+    return eval(exec_string)
+
+
+async def old_do_skill(func_set, action, caller, obj):
+    functions = action.split(";")
+    results = await async_gather([old_exec_function(func_set, f, caller, obj) for f in functions])
+    return [r for r in results if r]
+
+
+async def run(name, func, statements, rounds):
+    begin = time.perf_counter()
+    results = []
+    for i in range(rounds):
+        results = [await func(statement) for statement in statements]
+    elapsed = time.perf_counter() - begin
+    runs = rounds * len(statements)
+    print("%-20s %10.1f statements/s, %8.2f us/statement" % (name, runs / elapsed, elapsed / runs * 1000000))
+    return results
+
+
+async def main(rounds):
+    func_set = AnyFuncSet()
+    conditions, skills = load_statements()
+    print("%d conditions, %d skill functions, %d rounds" % (len(conditions), len(skills), rounds))
+
+    eager_conditions = {condition: compile_condition(func_set, condition, False) for condition in conditions}
+    compiled_conditions = {condition: compile_condition(func_set, condition) for condition in conditions}
+    compiled_skills = {skill: compile_function_list(func_set, skill) for skill in skills}
+
+    old_results = await run("old conditions", lambda c: old_match_condition(func_set, c, None, None),
+                            conditions, rounds)
+    CONDITION_FUNCTION_STATS.reset()
+    new_results = await run("eager conditions", lambda c: eager_conditions[c].match(None, None),
+                            conditions, rounds)
+    assert old_results == new_results, "Results are different."
+    eager_calls = sum(count["calls"] for count in CONDITION_FUNCTION_STATS.get().values())
+
+    CONDITION_FUNCTION_STATS.reset()
+    new_results = await run("lazy conditions", lambda c: compiled_conditions[c].match(None, None),
+                            conditions, rounds)
+    assert old_results == new_results, "Results are different."
+
+    stats = CONDITION_FUNCTION_STATS.get()
+    lazy_calls = sum(count["calls"] for count in stats.values())
+    print("function calls: eager %d, lazy %d, %.1f%% avoided" %
+          (eager_calls, lazy_calls, (eager_calls - lazy_calls) * 100 / eager_calls if eager_calls else 0))
+    for key, count in sorted(stats.items(), key=lambda item: item[1]["skipped"], reverse=True):
+        print("    %-24s calls %10d  skipped %10d" % (key, count["calls"], count["skipped"]))
+
+    old_results = await run("old skills", lambda s: old_do_skill(func_set, s, None, None), skills, rounds)
+    new_results = await run("compiled skills", lambda s: compiled_skills[s].gather(None, None), skills, rounds)
+    assert old_results == [[r for r in result if r] for result in new_results], "Results are different."
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.rounds))
@@ -0,0 +1,73 @@
+"""
+Micro-benchmark of objects' attribute value codecs.
+
+Packs and unpacks typical character states with each codec and compares speed and packed sizes.
+Run it in the repository's root directory:
+
+    python benchmarks/bench_value_codecs.py --loops 20000
+"""
+
+import os
+import sys
+import time
+from collections import OrderedDict
+from argparse import ArgumentParser
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from muddery.server.database.gamedata import value_codecs
+
+
+SAMPLES = {
+    "int": 120,
+    "float": 3.5,
+    "str": "hp",
+    "bool": True,
+    "none": None,
+    "list": [1, 2, 3, 4, 5],
+    "tuple": ("room_1", 10),
+    "dict": {"hp": 100, "mp": 50, "attack": 12, "defence": 8},
+    "nested": {"skills": {"skill_1": (1, 2.5), "skill_2": (3, 0.5)}, "level": 5, 1: [True, None]},
+    "ordered": OrderedDict([("a", 1), ("b", 2)]),
+}
+
+
+def run(codec, loops):
+    packed = {key: codec.encode(value) for key, value in SAMPLES.items()}
+    for key, value in SAMPLES.items():
+        assert codec.decode(packed[key]) == value, key
+
+    begin = time.perf_counter()
+    for i in range(loops):
+        for value in SAMPLES.values():
+            codec.encode(value)
+    encode_time = time.perf_counter() - begin
+
+    begin = time.perf_counter()
+    for i in range(loops):
+        for str_value in packed.values():
+            codec.decode(str_value)
+    decode_time = time.perf_counter() - begin
+
+    return encode_time, decode_time, sum(len(str_value) for str_value in packed.values())
+
+
+def main(loops):
+    print("%d values, %d loops" % (len(SAMPLES), loops))
+    for name, codec in value_codecs.CODECS.items():
+        if not codec.available():
+            print("%-10s not available" % name)
+            continue
+
+        encode_time, decode_time, size = run(codec, loops)
+        count = loops * len(SAMPLES)
+        print("%-10s encode %8.2f us, decode %8.2f us, packed size %5d chars" %
+              (name, encode_time / count * 1e6, decode_time / count * 1e6, size))
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--loops", type=int, default=20000)
+    args = parser.parse_args()
+
+    main(args.loops)
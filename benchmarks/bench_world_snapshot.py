@@ -0,0 +1,88 @@
+"""
+Benchmark of loading world data at the game server's startup.
+
+Loads all world data tables of a game directory from the database, as the game server did before, and from
+the world data snapshot, then sets up the whole world with the loaded tables. Create the snapshot with
+"muddery snapshot" first. Run it in the repository's root directory:
+
+    python benchmarks/bench_world_snapshot.py --game-dir <game directory>
+"""
+
+import os
+import sys
+import time
+import asyncio
+import subprocess
+from argparse import ArgumentParser
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def startup(use_snapshot):
+    """
+    Load world data and set up the world in this process.
+    """
+    from muddery.launcher import utils
+    utils.init_game_env(os.getcwd())
+
+    from muddery.server.settings import SETTINGS
+    from server.settings import ServerSettings
+    SETTINGS.update(ServerSettings())
+
+    from muddery.server.database.worlddata_db import WorldDataDB
+    from muddery.server.database.worlddata.worlddata import WorldData
+    from muddery.server.database.worlddata.world_snapshot import get_table_names
+
+    # Do not count imports.
+    import importlib
+    importlib.import_module(SETTINGS.WORLDDATA_DB["MODELS"])
+
+    begin = time.perf_counter()
+    WorldDataDB.inst().connect(read_only=True)
+    if not use_snapshot or not WorldData.load_snapshot(SETTINGS.WORLDDATA_SNAPSHOT_FILE):
+        if use_snapshot:
+            raise RuntimeError("Can not load the snapshot, run \"muddery snapshot\" first.")
+        for table_name in get_table_names():
+            WorldData.load_table(table_name)
+    load_time = time.perf_counter() - begin
+
+    # The world is set up with the loaded tables.
+    SETTINGS.WORLDDATA_SNAPSHOT_FILE = None
+    from muddery.server.server import Server
+    begin = time.perf_counter()
+    asyncio.run(Server.inst().init())
+    world_time = time.perf_counter() - begin
+
+    print("%f %f" % (load_time, world_time))
+
+
+def main(game_dir, runs):
+    results = {}
+    for use_snapshot in (False, True):
+        times = []
+        for i in range(runs):
+            # Each run starts in a new process.
+            output = subprocess.check_output(
+                [sys.executable, os.path.abspath(__file__), "--startup", "snapshot" if use_snapshot else "sql"],
+                cwd=game_dir,
+                env=dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+            )
+            times.append([float(value) for value in output.split()[-2:]])
+        results[use_snapshot] = [min(item[0] for item in times), min(item[1] for item in times)]
+
+    for use_snapshot, (load_time, world_time) in results.items():
+        print("%-9s load world data %8.3f s, set up the world %8.3f s" %
+              ("snapshot" if use_snapshot else "database", load_time, world_time))
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--game-dir", default=".")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--startup", choices=("sql", "snapshot"), help="run one startup in this process")
+    args = parser.parse_args()
+
+    if args.startup:
+        startup(args.startup == "snapshot")
+    else:
+        main(os.path.abspath(args.game_dir), args.runs)
@@ -1,13 +1,38 @@
 
 import importlib
 import inspect
-from sqlalchemy.orm import Session
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy.orm import sessionmaker, scoped_session
 from sqlalchemy import delete
 from sqlalchemy import inspect as sql_inspect
-from muddery.common.database.engines import get_engine, get_db_link
+from muddery.common.database.engines import get_engine, get_async_engine, get_db_link
 from muddery.common.utils.singleton import Singleton
 
 
+# The unit of work of the current task, sessions are scoped by it.
+_current_unit_of_work = ContextVar("current_unit_of_work", default=None)
+
+
+class UnitOfWork(object):
+    """
+    The scope of a session.
+    """
+    def __init__(self):
+        self.closed = False
+
+
+def current_scope():
+    """
+    The session scope of the current task. Tasks which copied the context may still see closed units of work,
+    they use the default session.
+    """
+    unit = _current_unit_of_work.get()
+    if unit is not None and unit.closed:
+        return None
+    return unit
+
+
 class DBManager(Singleton):
     """
     Database manager.
@@ -16,25 +41,73 @@ class DBManager(Singleton):
         self.config = config
         self.logger = logger
         self.engine = None
+        self.session_maker = None
         self.session = None
         self.connected = False
 
-    def connect(self):
+        # asyncio connections
+        self.async_engine = None
+        self.async_session_maker = None
+        self.async_connected = False
+
+    def connect(self, read_only=False):
         """
         Create db connections.
+
+        Args:
+            read_only: (bool) open the database read-only, only sqlite3 supports it.
         """
         if self.connected:
             return
 
         try:
-            self.engine = get_engine(self.config["ENGINE"], self.config)
-            self.session = Session(self.engine, autocommit=True)
+            self.engine = get_engine(self.config["ENGINE"], self.config, read_only)
+            self.session_maker = sessionmaker(self.engine, autocommit=True)
+
+            # The session is a proxy of the current unit of work's session. Code out of units of work
+            # shares one session.
+            self.session = scoped_session(self.session_maker, scopefunc=current_scope)
         except Exception as e:
             self.logger.log_trace("Can not connect to db.")
             raise e
 
         self.connected = True
 
+    async def connect_async(self):
+        """
+        Create asyncio db connections. Asyncio sessions are created by the session maker, each unit of work
+        should use its own session.
+        """
+        if self.async_connected:
+            return
+
+        try:
+            from sqlalchemy.ext.asyncio import AsyncSession
+
+            self.async_engine = get_async_engine(self.config["ENGINE"], self.config)
+            self.async_session_maker = sessionmaker(self.async_engine, class_=AsyncSession, expire_on_commit=False)
+
+            # check the connection
+            async with self.async_engine.connect():
+                pass
+        except Exception as e:
+            self.logger.log_trace("Can not connect to db.")
+            raise e
+
+        self.async_connected = True
+
+    async def disconnect_async(self):
+        """
+        Close asyncio db connections.
+        """
+        if not self.async_connected:
+            return
+
+        await self.async_engine.dispose()
+        self.async_engine = None
+        self.async_session_maker = None
+        self.async_connected = False
+
     def create_tables(self):
         """
         Create database tables if they are not exist.
@@ -78,6 +151,62 @@ class DBManager(Singleton):
         """
         return self.session
 
+    @contextmanager
+    def unit_of_work(self):
+        """
+        Use a separate session in the block, so concurrent tasks use their own pooled connections and
+        transactions. Tasks created in the block share the session. Nested units of work join the outer one.
+
+        SQLite only allows one writer, a blocking write transaction waiting for another task's transaction
+        would block the event loop, so units of work share the default session on sqlite3.
+
+        Usage:
+            with GameDataDB.inst().unit_of_work():
+                ...
+        """
+        if current_scope() is not None or self.shares_session():
+            yield self.session
+            return
+
+        unit = UnitOfWork()
+        token = _current_unit_of_work.set(unit)
+        try:
+            yield self.session
+        finally:
+            # Close the session and return its connection to the pool.
+            self.session.remove()
+            unit.closed = True
+            _current_unit_of_work.reset(token)
+
+    def shares_session(self):
+        """
+        If all units of work share the default session.
+        """
+        return self.engine.dialect.name == "sqlite"
+
+    def get_pool_metrics(self):
+        """
+        Get the connection pool's metrics, such as the time waiting for connections.
+        """
+        metrics = {}
+        if self.engine and hasattr(self.engine.pool, "metrics"):
+            metrics["pool"] = self.engine.pool.metrics()
+        if self.async_engine and hasattr(self.async_engine.pool, "metrics"):
+            metrics["async_pool"] = self.async_engine.pool.metrics()
+        return metrics
+
+    def get_async_engine(self):
+        """
+        The asyncio engine of the database.
+        """
+        return self.async_engine
+
+    def get_async_session_maker(self):
+        """
+        The factory of asyncio sessions. Returns None if the asyncio connection has not been created.
+        """
+        return self.async_session_maker
+
     def get_tables(self):
         """
         Get all tables' names of a scheme.
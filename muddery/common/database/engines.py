@@ -2,29 +2,195 @@
 Create sqlalchemy engines.
 """
 
-from sqlalchemy import create_engine
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 
 
-def get_engine(db_type, configs):
+# Pragmas of sqlite3 profiles.
+SQLITE3_PROFILES = {
+    # sqlite3's default settings
+    "default": {},
+
+    # Write ahead log, fewer fsyncs and larger caches. A power loss may lose the last transactions,
+    # but it does not corrupt the database.
+    "performance": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 268435456,
+        "cache_size": -65536,
+        "temp_store": "MEMORY",
+    },
+
+    # Larger caches without changing the journal, for databases which are mostly read, such as world data.
+    "read_mostly": {
+        "mmap_size": 268435456,
+        "cache_size": -65536,
+        "temp_store": "MEMORY",
+    },
+}
+
+# Pragmas can be used by read-only connections.
+SQLITE3_READ_ONLY_PRAGMAS = {"mmap_size", "cache_size", "temp_store"}
+
+
+class PoolMetricsMixin(object):
+    """
+    Record how long it takes to check out connections from the pool.
+    """
+    def __init__(self, *args, **kwargs):
+        super(PoolMetricsMixin, self).__init__(*args, **kwargs)
+        self.checkout_count = 0
+        self.total_wait_time = 0
+        self.max_wait_time = 0
+
+    def _do_get(self):
+        begin = time.perf_counter()
+        connection = super(PoolMetricsMixin, self)._do_get()
+
+        wait_time = time.perf_counter() - begin
+        self.checkout_count += 1
+        self.total_wait_time += wait_time
+        if wait_time > self.max_wait_time:
+            self.max_wait_time = wait_time
+
+        return connection
+
+    def metrics(self):
+        """
+        Get the pool's metrics. Times are in seconds.
+        """
+        return {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "overflow": self.overflow(),
+            "checkout_count": self.checkout_count,
+            "max_wait_time": self.max_wait_time,
+            "avg_wait_time": self.total_wait_time / self.checkout_count if self.checkout_count else 0,
+        }
+
+
+class MetricsQueuePool(PoolMetricsMixin, QueuePool):
+    pass
+
+
+class MetricsAsyncQueuePool(PoolMetricsMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def get_pool_args(configs, async_io=False):
+    """
+    Get the engine's pool arguments. Use the driver's default pool if POOL_SIZE is not set.
+    """
+    if not configs.get("POOL_SIZE"):
+        return {}
+
+    return {
+        "poolclass": MetricsAsyncQueuePool if async_io else MetricsQueuePool,
+        "pool_size": configs["POOL_SIZE"],
+        "max_overflow": configs.get("MAX_OVERFLOW", 10),
+        "pool_pre_ping": configs.get("POOL_PRE_PING", False),
+        "pool_recycle": configs.get("POOL_RECYCLE", -1),
+    }
+
+
+def get_engine(db_type, configs, read_only=False):
     """
     Get an engine according to the database type.
+
+    Args:
+        read_only: (bool) open the database read-only, only sqlite3 supports it.
+    """
+    db_link = get_db_link(db_type, configs, read_only)
+    engine = create_engine(db_link, echo=configs["DEBUG"], **get_pool_args(configs))
+
+    if db_type == "sqlite3":
+        set_sqlite3_pragmas(engine, get_sqlite3_pragmas(configs, read_only))
+
+    return engine
+
+
+def get_async_engine(db_type, configs):
     """
-    db_link = get_db_link(db_type, configs)
-    return create_engine(db_link, echo=configs["DEBUG"])
+    Get an asyncio engine according to the database type.
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine
 
+    db_link = get_async_db_link(db_type, configs)
+    engine = create_async_engine(db_link, echo=configs["DEBUG"], **get_pool_args(configs, True))
 
-def get_db_link(db_type, configs):
     if db_type == "sqlite3":
-        return get_sqlite3_link(configs)
+        set_sqlite3_pragmas(engine.sync_engine, get_sqlite3_pragmas(configs))
+
+    return engine
+
+
+def get_sqlite3_pragmas(configs, read_only=False):
+    """
+    Get pragmas of the sqlite3 profile set in configs. SQLITE_PRAGMAS overrides the profile's pragmas.
+    """
+    pragmas = dict(SQLITE3_PROFILES[configs.get("SQLITE_PROFILE") or "default"])
+    pragmas.update(configs.get("SQLITE_PRAGMAS") or {})
+
+    if read_only:
+        pragmas = {key: value for key, value in pragmas.items() if key in SQLITE3_READ_ONLY_PRAGMAS}
+
+    return pragmas
+
+
+def set_sqlite3_pragmas(engine, pragmas):
+    """
+    Set pragmas on every new connection of the engine.
+    """
+    if not pragmas:
+        return
+
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for key, value in pragmas.items():
+            cursor.execute("PRAGMA %s=%s" % (key, value))
+        cursor.close()
+
+    event.listen(engine, "connect", on_connect)
+
+
+def get_db_link(db_type, configs, read_only=False):
+    if db_type == "sqlite3":
+        return get_sqlite3_link(configs, read_only)
     elif db_type == "mysql":
         return get_mysql_link(configs)
 
 
-def get_sqlite3_link(configs):
+def get_async_db_link(db_type, configs):
+    if db_type == "sqlite3":
+        return get_sqlite3_async_link(configs)
+    elif db_type == "mysql":
+        return get_mysql_async_link(configs)
+
+
+def get_sqlite3_link(configs, read_only=False):
     """
     Get a sqlite3 engine with configs.
+
+    Args:
+        read_only: (bool) open the database read-only. If the IMMUTABLE config is set, sqlite3 assumes the file
+            can not be changed by other processes and does not lock it.
+    """
+    if read_only:
+        link = "sqlite:///file:{path}?mode=ro{immutable}&check_same_thread=False&uri=true".format(
+            path=configs["NAME"],
+            immutable="&immutable=1" if configs.get("IMMUTABLE") else "",
+        )
+    else:
+        link = "sqlite:///{path}?check_same_thread=False".format(path=configs["NAME"])
+    return link
+
+
+def get_sqlite3_async_link(configs):
     """
-    link = "sqlite:///{path}?check_same_thread=False".format(path=configs["NAME"])
+    Get a sqlite3 asyncio engine with configs. It uses the aiosqlite driver.
+    """
+    link = "sqlite+aiosqlite:///{path}".format(path=configs["NAME"])
     return link
 
 
@@ -34,7 +200,26 @@ def get_mysql_link(configs):
     mysql+pymysql://root:*@localhost:3306/blog?charset=utf8
 
     """
-    link = "mysql+pymysql://{user}:{password}@{host}{port}/{name}".format(
+    return get_mysql_driver_link("pymysql", configs)
+
+
+def get_mysql_async_link(configs):
+    """
+    Get a mysql asyncio engine with configs. The driver can be "aiomysql" or "asyncmy",
+    set it in the ASYNC_DRIVER config.
+    mysql+aiomysql://root:*@localhost:3306/blog?charset=utf8
+
+    """
+    driver = configs.get("ASYNC_DRIVER") or "aiomysql"
+    return get_mysql_driver_link(driver, configs)
+
+
+def get_mysql_driver_link(driver, configs):
+    """
+    Get a mysql engine's link with the given driver.
+    """
+    link = "mysql+{driver}://{user}:{password}@{host}{port}/{name}".format(
+               driver=driver,
                user=configs["USER"],
                password=configs["PASSWORD"],
                host=configs["HOST"] if configs["HOST"] else "localhost",
@@ -0,0 +1,220 @@
+"""
+A sorted list which supports fast inserts, removes and positional queries.
+"""
+
+from bisect import bisect_left, bisect_right, insort
+
+
+class RankedList(object):
+    """
+    A sorted list of comparable keys. Keys are stored in sorted chunks, a Fenwick tree over chunks' lengths
+    finds the position of a key or the key at a position in O(log n).
+
+    Usage:
+        rankings = RankedList()
+        rankings.add((-100, char_id))
+        place = rankings.index((-100, char_id))
+        top = rankings.slice(0, 10)
+    """
+    def __init__(self, keys=None, load=512):
+        """
+        Args:
+            keys: (iterable) initial keys.
+            load: (int) the chunk's size, chunks are split when they are twice as large.
+        """
+        self.load = load
+        self.size = 0
+
+        # sorted chunks
+        self.chunks = []
+
+        # the last key of each chunk
+        self.maxes = []
+
+        # Fenwick tree of chunks' lengths, starts from 1.
+        self.tree = [0]
+
+        if keys:
+            self.reset(keys)
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, key):
+        i = bisect_left(self.maxes, key)
+        if i == len(self.maxes):
+            return False
+        chunk = self.chunks[i]
+        pos = bisect_left(chunk, key)
+        return pos < len(chunk) and chunk[pos] == key
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            yield from chunk
+
+    def reset(self, keys):
+        """
+        Replace all keys.
+        """
+        keys = sorted(keys)
+        self.chunks = [keys[i:i + self.load] for i in range(0, len(keys), self.load)]
+        self.maxes = [chunk[-1] for chunk in self.chunks]
+        self.size = len(keys)
+        self.build_tree()
+
+    def build_tree(self):
+        """
+        Build the Fenwick tree of chunks' lengths in O(number of chunks).
+        """
+        tree = [0] + [len(chunk) for chunk in self.chunks]
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self.tree = tree
+
+    def update_tree(self, chunk_index, delta):
+        i = chunk_index + 1
+        while i < len(self.tree):
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix_size(self, chunk_index):
+        """
+        The number of keys in chunks before the chunk.
+        """
+        total = 0
+        i = chunk_index
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def locate(self, position):
+        """
+        Find the chunk containing the position.
+
+        Returns:
+            (chunk index, position in the chunk)
+        """
+        index = 0
+        step = 1 << (len(self.tree) - 1).bit_length()
+        while step:
+            next_index = index + step
+            if next_index < len(self.tree) and self.tree[next_index] <= position:
+                index = next_index
+                position -= self.tree[next_index]
+            step >>= 1
+        return index, position
+
+    def add(self, key):
+        """
+        Insert a key.
+        """
+        if not self.chunks:
+            self.chunks.append([key])
+            self.maxes.append(key)
+            self.size = 1
+            self.build_tree()
+            return
+
+        i = bisect_left(self.maxes, key)
+        if i == len(self.maxes):
+            i -= 1
+            self.chunks[i].append(key)
+            self.maxes[i] = key
+        else:
+            insort(self.chunks[i], key)
+
+        self.size += 1
+        chunk = self.chunks[i]
+        if len(chunk) > self.load * 2:
+            # Split the chunk.
+            self.chunks.insert(i + 1, chunk[self.load:])
+            del chunk[self.load:]
+            self.maxes.insert(i, chunk[-1])
+            self.build_tree()
+        else:
+            self.update_tree(i, 1)
+
+    def remove(self, key):
+        """
+        Remove a key. Raise ValueError if the key does not exist.
+        """
+        i = bisect_left(self.maxes, key)
+        if i == len(self.maxes):
+            raise ValueError("%s is not in list" % (key,))
+
+        chunk = self.chunks[i]
+        pos = bisect_left(chunk, key)
+        if pos == len(chunk) or chunk[pos] != key:
+            raise ValueError("%s is not in list" % (key,))
+
+        del chunk[pos]
+        self.size -= 1
+        if chunk:
+            self.maxes[i] = chunk[-1]
+            self.update_tree(i, -1)
+        else:
+            del self.chunks[i]
+            del self.maxes[i]
+            self.build_tree()
+
+    def discard(self, key):
+        """
+        Remove a key if it exists.
+        """
+        try:
+            self.remove(key)
+        except ValueError:
+            pass
+
+    def bisect_left(self, key):
+        """
+        The number of keys less than the key.
+        """
+        i = bisect_left(self.maxes, key)
+        if i == len(self.maxes):
+            return self.size
+        return self.prefix_size(i) + bisect_left(self.chunks[i], key)
+
+    def bisect_right(self, key):
+        """
+        The number of keys less than or equal to the key.
+        """
+        i = bisect_right(self.maxes, key)
+        if i == len(self.maxes):
+            return self.size
+        return self.prefix_size(i) + bisect_right(self.chunks[i], key)
+
+    def index(self, key):
+        """
+        The position of a key. Raise ValueError if the key does not exist.
+        """
+        i = bisect_left(self.maxes, key)
+        if i < len(self.maxes):
+            chunk = self.chunks[i]
+            pos = bisect_left(chunk, key)
+            if pos < len(chunk) and chunk[pos] == key:
+                return self.prefix_size(i) + pos
+        raise ValueError("%s is not in list" % (key,))
+
+    def slice(self, begin, end):
+        """
+        Get keys in [begin, end) positions.
+        """
+        begin = max(begin, 0)
+        end = min(end, self.size)
+        if begin >= end:
+            return []
+
+        i, pos = self.locate(begin)
+        result = []
+        remain = end - begin
+        while remain > 0:
+            items = self.chunks[i][pos:pos + remain]
+            result.extend(items)
+            remain -= len(items)
+            i += 1
+            pos = 0
+        return result
@@ -0,0 +1,48 @@
+"""unique category keys
+
+Add unique constraints on game data's (category, key) fields, they are needed by upserts.
+
+Revision ID: 3f2a9c6d1b7e
+Revises: 
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2a9c6d1b7e'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# table: (category field, key field)
+UNIQUE_FIELDS = {
+    "account_characters": ("account_id", "character_id"),
+}
+
+
+def has_unique_constraint(table_name, fields):
+    inspector = sa.inspect(op.get_bind())
+    for constraint in inspector.get_unique_constraints(table_name):
+        if set(constraint["column_names"]) == set(fields):
+            return True
+    return False
+
+
+def upgrade():
+    for table_name, fields in UNIQUE_FIELDS.items():
+        if has_unique_constraint(table_name, fields):
+            # Tables created by new versions already have the constraint.
+            continue
+
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.create_unique_constraint("uq_%s_%s" % (table_name, "_".join(fields)), list(fields))
+
+
+def downgrade():
+    for table_name, fields in UNIQUE_FIELDS.items():
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.drop_constraint("uq_%s_%s" % (table_name, "_".join(fields)), type_="unique")
@@ -153,12 +153,22 @@ operations:
       -c, --client          Stop the web client only.
       -e, --editor          Stop the world editor only.
 
+  muddery profilestatements [-r <number>] [-s <field>] [-n <number>] [-o <file>]
+    Replay all conditions in world data against a tester character and rank the most expensive ones.
+    arguments:
+      -r, --rounds <number>   (optional) Times to run each condition, default is 100.
+      -s, --sort <field>      (optional) calls, total_time, avg_time, max_time or errors, default is total_time.
+      -n, --number <number>   (optional) The number of records to show, default is 20.
+      -o, --output <file>     (optional) Write the whole report to a json file.
+
   muddery state             Check servers running states.
   muddery createadmin       Create an administrator account in the world editor.
   muddery upgrade           Upgrade a game directory to the latest version.
   muddery migrate           Migrate databases to new version.
+  muddery migratevalues     Convert objects' runtime attributes to the current value format.
   muddery loaddata          Load game data from the worlddata folder.
   muddery sysdata           Reload system default data.
+  muddery snapshot          Write world data to a snapshot file for fast server startup.
   muddery -h                -h, --help      Show help messages.
   muddery -v                -v, --version   Show version info.
 """
\ No newline at end of file
@@ -284,6 +284,204 @@ def migrate_database(database_name):
         print("Migrate %s error: %s" % (database_name, e))
 
 
+def migrate_values(batch_size=1000):
+    """
+    Pack all objects' runtime attributes with the current value codec.
+
+    :return:
+    """
+    print("Converting objects' attributes.")
+
+    gamedir = os.path.abspath(configs.CURRENT_DIR)
+    utils.init_game_env(gamedir)
+
+    # Load settings.
+    try:
+        from muddery.server.settings import SETTINGS
+        from server.settings import ServerSettings
+        SETTINGS.update(ServerSettings())
+    except Exception as e:
+        traceback.print_exc()
+        raise
+
+    from sqlalchemy import select, update, bindparam
+    from muddery.server.database.gamedata_db import GameDataDB
+    from muddery.server.database.gamedata_models import BaseObjectStates
+    from muddery.server.database.gamedata import value_codecs
+
+    print("Codec: %s" % value_codecs.get_codec().name)
+
+    GameDataDB.inst().connect()
+    session = GameDataDB.inst().get_session()
+
+    for model in BaseObjectStates.__subclasses__():
+        table = model.__table__
+        update_stmt = update(table).where(table.c.id == bindparam("_id")).values(value=bindparam("_value"))
+
+        converted = 0
+        last_id = 0
+        while True:
+            stmt = select(table.c.id, table.c.value).where(table.c.id > last_id).order_by(table.c.id)
+            rows = session.execute(stmt.limit(batch_size)).all()
+            if not rows:
+                break
+
+            last_id = rows[-1][0]
+            records = [{
+                "_id": row_id,
+                "_value": value_codecs.encode(value_codecs.decode(value)),
+            } for row_id, value in rows if not value_codecs.is_current(value)]
+
+            if records:
+                with session.begin():
+                    session.execute(update_stmt, records)
+                converted += len(records)
+
+        print("%s: %d values converted." % (table.name, converted))
+
+
+def create_world_snapshot():
+    """
+    Write all world data to a snapshot file, so the game server can start without loading world data from
+    the database.
+
+    :return:
+    """
+    print("Creating the world data snapshot.")
+
+    gamedir = os.path.abspath(configs.CURRENT_DIR)
+    utils.init_game_env(gamedir)
+
+    # Load settings.
+    try:
+        from muddery.server.settings import SETTINGS
+        from server.settings import ServerSettings
+        SETTINGS.update(ServerSettings())
+    except Exception as e:
+        traceback.print_exc()
+        raise
+
+    if not SETTINGS.WORLDDATA_SNAPSHOT_FILE:
+        print("WORLDDATA_SNAPSHOT_FILE is not set.")
+        return
+
+    try:
+        from muddery.server.database.worlddata_db import WorldDataDB
+        from muddery.server.database.worlddata.world_snapshot import save_snapshot
+        WorldDataDB.inst().connect(read_only=True)
+
+        begin = time.time()
+        count = save_snapshot(SETTINGS.WORLDDATA_SNAPSHOT_FILE)
+        print("%d tables are written to %s in %.2f seconds." % (count, SETTINGS.WORLDDATA_SNAPSHOT_FILE,
+                                                                 time.time() - begin))
+    except Exception as e:
+        traceback.print_exc()
+        raise
+
+
+def profile_statements(rounds=100, sort_by="total_time", limit=20, output=None):
+    """
+    Replay all conditions in world data against a tester character and rank the most expensive ones.
+    The tester character is created in a temporary game database, so the game's data is not changed.
+
+    Args:
+        rounds: (int) times to run each condition.
+        sort_by: (string) the field to sort by.
+        limit: (int) the number of records to show.
+        output: (string) write the whole report to this json file.
+    """
+    print("Profiling statements.")
+
+    gamedir = os.path.abspath(configs.CURRENT_DIR)
+    utils.init_game_env(gamedir)
+
+    # Load settings.
+    try:
+        from muddery.server.settings import SETTINGS
+        from server.settings import ServerSettings
+        SETTINGS.update(ServerSettings())
+    except Exception as e:
+        traceback.print_exc()
+        raise
+
+    import tempfile
+    temp_dir = tempfile.mkdtemp()
+
+    # The tester's data is written to a temporary database.
+    SETTINGS.GAMEDATA_DB = dict(SETTINGS.GAMEDATA_DB, ENGINE="sqlite3", NAME=os.path.join(temp_dir, "gamedata.db3"))
+
+    try:
+        asyncio.run(replay_statements(rounds, sort_by, limit, output))
+    finally:
+        import shutil
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+async def replay_statements(rounds, sort_by, limit, output):
+    from sqlalchemy import select
+    from muddery.server.settings import SETTINGS
+    from muddery.server.server import Server
+    from muddery.server.database.gamedata_db import GameDataDB
+    from muddery.server.database.worlddata_db import WorldDataDB
+    from muddery.server.database.gamedata.character_info import CharacterInfo
+    from muddery.server.mappings.element_set import ELEMENT
+    from muddery.server.statements.statement_handler import STATEMENT_HANDLER
+    from muddery.server.statements.statement_profiler import STATEMENT_PROFILER
+
+    GameDataDB.inst().connect()
+    GameDataDB.inst().create_tables()
+    await Server.inst().connect_db()
+
+    # Collect conditions.
+    conditions = set()
+    session = WorldDataDB.inst().get_session()
+    for table_name in WorldDataDB.inst().get_tables():
+        model = WorldDataDB.inst().get_model(table_name)
+        fields = [column for column in model.__table__.columns if column.name.endswith("condition")]
+        for field in fields:
+            for value in session.execute(select(field)).scalars():
+                if value:
+                    conditions.add(value)
+    conditions = sorted(conditions)
+    print("%d conditions, %d rounds." % (len(conditions), rounds))
+
+    # Create the tester.
+    char_db_id = 1
+    element_type = SETTINGS.PLAYER_CHARACTER_TYPE_TEST_MODE
+    element_key = SETTINGS.PLAYER_CHARACTER_KEY_TEST_MODE
+    await CharacterInfo.inst().add(char_db_id, element_type, element_key, element_key)
+    tester = ELEMENT(element_type)()
+    tester.set_db_id(char_db_id)
+    await tester.setup_element(element_key, first_time=True)
+
+    STATEMENT_PROFILER.reset()
+    STATEMENT_PROFILER.enable()
+    for i in range(rounds):
+        for condition in conditions:
+            try:
+                await STATEMENT_HANDLER.match_condition(condition, tester, None)
+            except Exception as e:
+                pass
+    STATEMENT_PROFILER.disable()
+
+    report = STATEMENT_PROFILER.report(sort_by, limit)
+    print("\nStatements:")
+    print("%10s %12s %12s %8s  %s" % ("calls", "avg (us)", "max (us)", "errors", "statement"))
+    for record in report["statements"]:
+        print("%10d %12.2f %12.2f %8d  %s" % (record["calls"], record["avg_time"] * 1000000,
+                                             record["max_time"] * 1000000, record["errors"], record["statement"]))
+
+    print("\nFunctions:")
+    print("%10s %12s %12s %8s  %s" % ("calls", "avg (us)", "max (us)", "errors", "function"))
+    for record in report["functions"]:
+        print("%10d %12.2f %12.2f %8d  %s" % (record["calls"], record["avg_time"] * 1000000,
+                                             record["max_time"] * 1000000, record["errors"], record["key"]))
+
+    if output:
+        STATEMENT_PROFILER.dump(output, sort_by)
+        print("\nThe report is written to %s." % output)
+
+
 def collect_webclient_static():
     """
     Collect webclient's static web files.
@@ -99,6 +99,43 @@ def main():
             sys.exit(-1)
         sys.exit(0)
 
+    elif sys_argv[1] == "migratevalues":
+        # Pack objects' runtime attributes with the current value codec.
+        from muddery.launcher import manager
+        try:
+            manager.migrate_values()
+        except Exception as e:
+            print(e)
+            sys.exit(-1)
+        sys.exit(0)
+
+    elif sys_argv[1] == "snapshot":
+        # Write world data to a snapshot file for fast server startup.
+        from muddery.launcher import manager
+        try:
+            manager.create_world_snapshot()
+        except Exception as e:
+            print(e)
+            sys.exit(-1)
+        sys.exit(0)
+
+    elif sys_argv[1] == "profilestatements":
+        # Replay world data's conditions against a tester character and rank expensive ones.
+        parser = ArgumentParser()
+        parser.add_argument('-r', '--rounds', type=int, action='store', dest='rounds', default=100)
+        parser.add_argument('-s', '--sort', action='store', dest='sort', default='total_time')
+        parser.add_argument('-n', '--number', type=int, action='store', dest='number', default=20)
+        parser.add_argument('-o', '--output', action='store', dest='output', default=None)
+        args, unknown_args = parser.parse_known_args(sys_argv[2:])
+
+        from muddery.launcher import manager
+        try:
+            manager.profile_statements(args.rounds, args.sort, args.number, args.output)
+        except Exception as e:
+            traceback.print_exc()
+            sys.exit(-1)
+        sys.exit(0)
+
     elif sys_argv[1] == "loaddata":
         # Load game data from the worlddata folder.
         from muddery.launcher import manager
@@ -7,6 +7,7 @@ The life of a combat:
 3. start_combat: start the combat. Characters in the combat are allowed to use skills.
 4. cast_skill: characters call the cast_skill to use skills in the combat. It casts a skill and check if the
    combat is finished.
+   In the AI tick mode, NPCs' skills are chosen and cast together by one timer of the combat, see ai_tick.
 5. can_finish: Check if the combat is finished. A combat finishes when only one or zero team has alive characters, or
    the combat is timeout. If a combat can finish calls the finish method.
 6. finish: send combat results to all characters.
@@ -16,17 +17,15 @@ The life of a combat:
 
 from enum import Enum
 import time
-import datetime
-import pytz
-import asyncio
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from muddery.common.utils.utils import async_wait, async_gather
 from muddery.common.utils.exception import MudderyError, ERR
 from muddery.common.utils import defines
 from muddery.server.utils.logger import logger
 from muddery.server.database.worlddata.worlddata import WorldData
+from muddery.server.database.storage.unit_of_work import spawn_background
 from muddery.server.mappings.element_set import ELEMENT
 from muddery.server.utils.localized_strings_handler import _
+from muddery.server.server import Server
 
 
 class CStatus(Enum):
@@ -67,12 +66,22 @@ class BaseCombat(object):
         self.rewards = {}
 
         self.timeout = 0
-        self.scheduler = None
+        self.timeout_timer = None
+
+        # ids of characters whose skills are cast by the AI tick
+        self.ai_character_ids = set()
+        self.ai_timer = None
+
+        # AI characters' next cast time: {character's id: time}
+        self.ai_next_cast = {}
 
     def __del__(self):
         # When the combat is finished.
-        if self.scheduler:
-            self.scheduler.stop()
+        if self.timeout_timer:
+            self.timeout_timer.cancel()
+
+        if self.ai_timer:
+            self.ai_timer.cancel()
 
     async def at_timeout(self):
         """
@@ -128,10 +137,7 @@ class BaseCombat(object):
         """
         if self.timeout:
             # Set finish time.
-            finish_time = datetime.datetime.fromtimestamp(time.time() + self.timeout)
-            self.scheduler = AsyncIOScheduler(timezone=pytz.utc)
-            self.scheduler.add_job(self.at_timeout, "date", run_date=finish_time)
-            self.scheduler.start()
+            self.timeout_timer = Server.timers.schedule(self.timeout, self.at_timeout)
 
         for char in self.characters.values():
             char["status"] = CStatus.ACTIVE
@@ -158,6 +164,24 @@ class BaseCombat(object):
                 "result": cast_result,
             }
         """
+        result = await self.apply_skill(skill_key, caller, target_id)
+        self.msg_all({
+            "combat_skill_cast": result["result"],
+        })
+        # The check runs after the caller's unit of work, in its own one.
+        spawn_background(self.check_finish)
+
+        return result
+
+    async def apply_skill(self, skill_key, caller, target_id):
+        """
+        Cast a skill without sending messages or checking the combat's finish.
+
+        :arg
+            skill_key: (string) skill's key
+            caller: (obj) the skill's caller's object
+            target_id: (int) target's id
+        """
         if self.finished:
             raise MudderyError(ERR.invalid_input, _("Combat finished."))
 
@@ -169,13 +193,82 @@ class BaseCombat(object):
         if target_id and target_id in self.characters:
             target = self.characters[target_id]["char"]
 
-        result = await caller.cast_skill(skill_key, target)
-        self.msg_all({
-            "combat_skill_cast": result["result"],
-        })
-        asyncio.create_task(self.check_finish())
+        return await caller.cast_skill(skill_key, target)
 
-        return result
+    def start_ai_tick(self, characters):
+        """
+        Cast characters' skills automatically by one timer of the combat. Each character still casts skills
+        every auto_cast_skill_cd seconds of its own.
+
+        Args:
+            characters: (list) characters controlled by AI.
+        """
+        self.ai_character_ids = set(character.get_id() for character in characters)
+        if not self.ai_character_ids or self.ai_timer:
+            return
+
+        now = Server.timers.time()
+        self.ai_next_cast = {
+            character.get_id(): now + character.auto_cast_skill_cd for character in characters
+        }
+
+        interval = min(character.auto_cast_skill_cd for character in characters)
+        self.ai_timer = Server.timers.schedule(interval, self.ai_tick, interval=interval)
+
+    def stop_ai_tick(self):
+        """
+        Stop casting skills automatically.
+        """
+        if self.ai_timer:
+            self.ai_timer.cancel()
+            self.ai_timer = None
+
+    async def ai_tick(self):
+        """
+        Choose skills of all AI characters, then cast them in one pass. Results are sent to all combatants in
+        one message, and the combat's finish is checked once.
+        """
+        if self.finished:
+            self.stop_ai_tick()
+            return
+
+        # The timer may fire a little early or late, it is precise to the timers' tick.
+        now = Server.timers.time() + Server.timers.tick / 2
+        casters = [char["char"] for char_id, char in self.characters.items()
+                   if char_id in self.ai_character_ids and self.ai_next_cast.get(char_id, 0) <= now and
+                   char["status"] == CStatus.ACTIVE and char["char"].is_alive]
+        if not casters:
+            return
+
+        # Casters' next cast time, keep their own cds.
+        for caster in casters:
+            char_id = caster.get_id()
+            next_cast = self.ai_next_cast.get(char_id, now) + caster.auto_cast_skill_cd
+            if next_cast < now:
+                # Skip missed casts.
+                next_cast = now + caster.auto_cast_skill_cd
+            self.ai_next_cast[char_id] = next_cast
+
+        choices = await async_gather([caster.ai_choose_skill.choose(caster) for caster in casters])
+
+        messages = []
+        for caster, choice in zip(casters, choices):
+            if not choice or self.finished:
+                continue
+
+            skill_key, target_id = choice
+            try:
+                result = await self.apply_skill(skill_key, caster, target_id)
+                messages.append({
+                    "combat_skill_cast": result["result"],
+                })
+            except Exception as e:
+                logger.log_err("%s can not cast skill %s: %s" % (caster.get_id(), skill_key, e))
+
+        if messages:
+            # Clients accept a list of messages.
+            self.msg_all(messages)
+            await self.check_finish()
 
     async def check_finish(self):
         """
@@ -219,9 +312,11 @@ class BaseCombat(object):
         """
         self.finished = True
 
-        if self.scheduler:
-            self.scheduler.stop()
-            self.scheduler = None
+        if self.timeout_timer:
+            self.timeout_timer.cancel()
+            self.timeout_timer = None
+
+        self.stop_ai_tick()
 
         # get winners and losers
         self.winners, self.losers = await self.calc_winners()
@@ -282,7 +377,7 @@ class BaseCombat(object):
 
             self.stop()
 
-    def msg_all(self, message: dict) -> None:
+    def msg_all(self, message: dict or list) -> None:
         "Send message to all combatants."
         if self.characters:
             [c["char"].msg(message) for c in self.characters.values()]
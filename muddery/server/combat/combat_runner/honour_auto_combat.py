@@ -2,6 +2,7 @@
 Combat handler.
 """
 
+from muddery.server.settings import SETTINGS
 from muddery.server.combat.combat_runner.honour_combat import HonourCombat
 
 
@@ -16,9 +17,12 @@ class HonourAutoCombat(HonourCombat):
         super(HonourAutoCombat, self).start()
 
         # All characters auto cast skills.
-        for char in self.characters.values():
-            character = char["char"]
-            character.start_auto_combat_skill()
+        characters = [char["char"] for char in self.characters.values()]
+        if SETTINGS.COMBAT_AI_TICK:
+            self.start_ai_tick(characters)
+        else:
+            for character in characters:
+                character.start_auto_combat_skill()
 
     async def finish(self):
         """
@@ -2,6 +2,7 @@
 Combat handler.
 """
 
+from muddery.server.settings import SETTINGS
 from muddery.server.combat.combat_runner.base_combat import BaseCombat
 
 
@@ -15,10 +16,12 @@ class NormalCombat(BaseCombat):
         """
         super(NormalCombat, self).start()
 
-        for char in self.characters.values():
-            character = char["char"]
-            if not character.is_player():
-                # Monsters auto cast skills
+        # Monsters auto cast skills
+        npcs = [char["char"] for char in self.characters.values() if not char["char"].is_player()]
+        if SETTINGS.COMBAT_AI_TICK:
+            self.start_ai_tick(npcs)
+        else:
+            for character in npcs:
                 character.start_auto_combat_skill()
 
     async def finish(self):
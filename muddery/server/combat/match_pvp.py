@@ -1,12 +1,7 @@
 """
 This model translates default strings into localized strings.
 """
-from collections import deque
 import time
-import datetime
-import math
-import pytz
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from muddery.common.utils.exception import MudderyError, ERR
 from muddery.server.database.gamedata.honours_mapper import HonoursMapper
 from muddery.server.utils.localized_strings_handler import _
@@ -15,6 +10,9 @@ from muddery.server.database.worlddata.honour_settings import HonourSettings
 from muddery.server.combat.combat_handler import COMBAT_HANDLER
 from muddery.server.server import Server
 from muddery.common.utils.singleton import Singleton
+from muddery.common.utils.utils import class_from_path
+from muddery.server.settings import SETTINGS
+from muddery.server.combat.matchmaking import MatchQueue
 
 
 class MatchPVPHandler(Singleton):
@@ -31,21 +29,23 @@ class MatchPVPHandler(Singleton):
         self.preparing_time = 0
         self.match_interval = 10
 
-        # waiting_queue: a list of character's db id
-        self.waiting_queue = deque()
+        # waiting characters sorted by honours
+        self.waiting_queue = MatchQueue()
+
+        # the pairing strategy
+        self.strategy = None
 
         # preparing:
         #   character's db id: {
         #       "time": begin time,
         #       "opponent": match's opponent,
         #       "confirmed": confirmed the combat,
-        #       "job_id": waiting caller's id,
+        #       "timer": the timer to start the combat,
         #   }
         self.preparing = {}
 
-        self.scheduler = AsyncIOScheduler(timezone=pytz.utc)
+        self.match_timer = None
         self.loop = None
-        self.key = "MATCH_PVP_HANDLER"
 
         self.reset()
         
@@ -62,9 +62,8 @@ class MatchPVPHandler(Singleton):
         """
         # Remove all characters in the waiting queue.
         """
-        for char_db_id, info in self.preparing.values():
-            job_id = info["job_id"]
-            self.scheduler.remove_job(job_id)
+        for char_db_id, info in self.preparing.items():
+            info["timer"].cancel()
 
             try:
                 character = Server.world.get_character(char_db_id)
@@ -99,10 +98,17 @@ class MatchPVPHandler(Singleton):
             self.preparing_time = honour_settings.preparing_time
             self.match_interval = honour_settings.match_interval
 
-        # add the loot job
-        if self.scheduler.get_job(self.key) is None:
-            self.scheduler.add_job(self.match, "interval", seconds=self.match_interval, id=self.key)
-            self.scheduler.start()
+        strategy_class = class_from_path(SETTINGS.HONOUR_MATCH_STRATEGY)
+        self.strategy = strategy_class(
+            self.max_honour_diff,
+            SETTINGS.HONOUR_MATCH_TOLERANCE_GROWTH,
+            SETTINGS.HONOUR_MATCH_MAX_TOLERANCE,
+        )
+
+        # add the match job
+        if self.match_timer:
+            self.match_timer.cancel()
+        self.match_timer = Server.timers.schedule(self.match_interval, self.match, interval=self.match_interval)
 
     def add(self, character):
         """
@@ -113,7 +119,8 @@ class MatchPVPHandler(Singleton):
         if char_db_id in self.waiting_queue:
             raise MudderyError(ERR.invalid_input, _("You are already in the queue."))
         
-        self.waiting_queue.append(char_db_id)
+        honour = HonoursMapper.inst().get_honour(char_db_id, 0)
+        self.waiting_queue.add(char_db_id, honour, time.time())
 
     def remove(self, character):
         """
@@ -141,49 +148,42 @@ class MatchPVPHandler(Singleton):
             return
 
         # match characters by honour differences
-        for i in range(len(self.waiting_queue) - 1):
-            char_id_A = self.waiting_queue[i]
-            if char_id_A in self.preparing:
-                continue
-
-            for j in range(i + 1, len(self.waiting_queue)):
-                char_id_B = self.waiting_queue[j]
-                if char_id_B in self.preparing:
-                    continue
-
-                honour_A = HonoursMapper.inst().get_honour(char_id_A, 0)
-                honour_B = HonoursMapper.inst().get_honour(char_id_B, 0)
-
-                # max_honour_diff means no limits
-                if self.max_honour_diff == 0 or math.fabs(honour_A - honour_B) <= self.max_honour_diff:
-                    # can match
-                    try:
-                        character_A = Server.world.get_character(char_id_A)
-                        character_A.msg({"prepare_match": self.preparing_time})
-                    except KeyError:
-                        pass
-
-                    try:
-                        character_B = Server.world.get_character(char_id_B)
-                        character_B.msg({"prepare_match": self.preparing_time})
-                    except KeyError:
-                        pass
-
-                    job_time = datetime.datetime.now(tz=pytz.utc) + datetime.timedelta(seconds=self.preparing_time)
-                    job = self.scheduler.add_job(self.fight, 'date', run_date=job_time, args=(char_id_A, char_id_B))
-
-                    self.preparing[char_id_A] = {
-                        "time": time.time(),
-                        "opponent": char_id_B,
-                        "confirmed": False,
-                        "job_id": job.id,
-                    }
-                    self.preparing[char_id_B] = {
-                        "time": time.time(),
-                        "opponent": char_id_A,
-                        "confirmed": False,
-                        "job_id": job.id,
-                    }
+        entries = self.waiting_queue.sorted_entries(exclude=self.preparing)
+        pairs = self.strategy.pair(entries, time.time())
+
+        for char_id_A, char_id_B in pairs:
+            self.prepare_match(char_id_A, char_id_B)
+
+    def prepare_match(self, char_id_A, char_id_B):
+        """
+        Ask two matched characters to confirm the combat.
+        """
+        try:
+            character_A = Server.world.get_character(char_id_A)
+            character_A.msg({"prepare_match": self.preparing_time})
+        except KeyError:
+            pass
+
+        try:
+            character_B = Server.world.get_character(char_id_B)
+            character_B.msg({"prepare_match": self.preparing_time})
+        except KeyError:
+            pass
+
+        timer = Server.timers.schedule(self.preparing_time, self.fight, char_id_A, char_id_B)
+
+        self.preparing[char_id_A] = {
+            "time": time.time(),
+            "opponent": char_id_B,
+            "confirmed": False,
+            "timer": timer,
+        }
+        self.preparing[char_id_B] = {
+            "time": time.time(),
+            "opponent": char_id_A,
+            "confirmed": False,
+            "timer": timer,
+        }
 
     def confirm(self, character):
         """
@@ -207,8 +207,7 @@ class MatchPVPHandler(Singleton):
             return
 
         # stop the call
-        job_id = info["job_id"]
-        self.scheduler.remove_job(job_id)
+        info["timer"].cancel()
         
         # remove characters from the preparing queue
         del self.preparing[char_db_id]
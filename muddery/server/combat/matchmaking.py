@@ -0,0 +1,179 @@
+"""
+Matchmaking of honour combats.
+
+Waiting characters are kept sorted by honour. Pairing strategies walk the sorted queue, so a match pass
+takes O(n log n). The allowed honour difference of a character grows with the time it has waited.
+"""
+
+from muddery.common.utils.ranked_list import RankedList
+
+
+class MatchEntry(object):
+    """
+    A character waiting in the queue.
+    """
+    __slots__ = ("char_id", "honour", "join_time")
+
+    def __init__(self, char_id, honour, join_time):
+        self.char_id = char_id
+        self.honour = honour
+        self.join_time = join_time
+
+
+class MatchQueue(object):
+    """
+    Waiting characters sorted by their honours. Honours are read when characters join the queue.
+    """
+    def __init__(self):
+        # {character's db id: MatchEntry}
+        self.entries = {}
+
+        # (honour, join time, character's db id)
+        self.sorted_keys = RankedList()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, char_id):
+        return char_id in self.entries
+
+    def __iter__(self):
+        return iter(list(self.entries))
+
+    def add(self, char_id, honour, join_time):
+        entry = MatchEntry(char_id, honour, join_time)
+        self.entries[char_id] = entry
+        self.sorted_keys.add((honour, join_time, char_id))
+
+    def remove(self, char_id):
+        """
+        Remove a character from the queue. Raise ValueError if the character is not in the queue.
+        """
+        try:
+            entry = self.entries.pop(char_id)
+        except KeyError:
+            raise ValueError("%s is not in the queue" % char_id)
+        self.sorted_keys.remove((entry.honour, entry.join_time, char_id))
+
+    def clear(self):
+        self.entries.clear()
+        self.sorted_keys = RankedList()
+
+    def sorted_entries(self, exclude=None):
+        """
+        Get entries sorted by honours.
+
+        Args:
+            exclude: (container) ids of characters to skip.
+        """
+        entries = self.entries
+        if exclude:
+            return [entries[key[2]] for key in self.sorted_keys if key[2] not in exclude]
+        else:
+            return [entries[key[2]] for key in self.sorted_keys]
+
+
+class BasePairingStrategy(object):
+    """
+    Pair waiting characters.
+    """
+    def __init__(self, max_honour_diff=0, tolerance_growth=0, max_tolerance=0):
+        """
+        Args:
+            max_honour_diff: (number) the allowed honour difference of new characters, 0 means no limits.
+            tolerance_growth: (number) the allowed honour difference grows by this value every second
+                a character waits.
+            max_tolerance: (number) the maximum allowed honour difference, 0 means no limits.
+        """
+        self.max_honour_diff = max_honour_diff
+        self.tolerance_growth = tolerance_growth
+        self.max_tolerance = max_tolerance
+
+    def tolerance(self, entry, now):
+        """
+        The honour difference a character accepts.
+        """
+        tolerance = self.max_honour_diff + (now - entry.join_time) * self.tolerance_growth
+        if self.max_tolerance and tolerance > self.max_tolerance:
+            tolerance = self.max_tolerance
+        return tolerance
+
+    def can_match(self, entry_a, entry_b, now):
+        """
+        Two characters can match if the honour difference is accepted by any of them.
+        """
+        # 0 max_honour_diff means no limits
+        if not self.max_honour_diff:
+            return True
+
+        diff = abs(entry_a.honour - entry_b.honour)
+        return diff <= self.tolerance(entry_a, now) or diff <= self.tolerance(entry_b, now)
+
+    def pair(self, entries, now):
+        """
+        Pair characters.
+
+        Args:
+            entries: (list) waiting characters sorted by honours.
+            now: (float) current time.
+
+        Returns:
+            (list) pairs of character's db ids.
+        """
+        raise NotImplementedError
+
+
+class NeighbourPairingStrategy(BasePairingStrategy):
+    """
+    Walk the queue from low honours to high honours and pair neighbours. It is the fastest strategy
+    and keeps honour differences small.
+    """
+    def pair(self, entries, now):
+        pairs = []
+        i = 0
+        while i < len(entries) - 1:
+            if self.can_match(entries[i], entries[i + 1], now):
+                pairs.append((entries[i].char_id, entries[i + 1].char_id))
+                i += 2
+            else:
+                i += 1
+        return pairs
+
+
+class LongestWaitPairingStrategy(BasePairingStrategy):
+    """
+    Characters who have waited longer choose their opponents first, each of them matches the nearest
+    unmatched character by honour.
+    """
+    def pair(self, entries, now):
+        count = len(entries)
+
+        # Neighbours of unmatched characters in the honour order, -1 or count means no neighbour.
+        prev_index = list(range(-1, count - 1))
+        next_index = list(range(1, count + 1))
+        matched = [False] * count
+
+        def unlink(i):
+            before, after = prev_index[i], next_index[i]
+            if before >= 0:
+                next_index[before] = after
+            if after < count:
+                prev_index[after] = before
+
+        pairs = []
+        for i in sorted(range(count), key=lambda i: entries[i].join_time):
+            if matched[i]:
+                continue
+
+            entry = entries[i]
+            candidates = [j for j in (prev_index[i], next_index[i]) if 0 <= j < count]
+            candidates.sort(key=lambda j: abs(entries[j].honour - entry.honour))
+            for j in candidates:
+                if self.can_match(entry, entries[j], now):
+                    matched[i] = matched[j] = True
+                    unlink(i)
+                    unlink(j)
+                    pairs.append((entry.char_id, entries[j].char_id))
+                    break
+
+        return pairs
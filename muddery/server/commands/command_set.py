@@ -6,10 +6,27 @@ can be part of any number of cmdsets and cmdsets can be added/removed
 and merged onto entities at runtime.
 """
 
+from contextlib import AsyncExitStack
+from muddery.server.settings import SETTINGS
 from muddery.server.utils.logger import logger
+from muddery.server.database.gamedata.base_data import unit_of_work, use_unit_of_work
+from muddery.server.statements.statement_memo import StatementMemo
 from muddery.common.utils.exception import MudderyError, ERR
 
 
+async def run_command(func, caller, args):
+    """
+    Run a command function. All game data it writes are committed together if units of work are used,
+    and const statement functions' results are reused if STATEMENT_MEMO is set.
+    """
+    async with AsyncExitStack() as stack:
+        if use_unit_of_work():
+            await stack.enter_async_context(unit_of_work())
+        if SETTINGS.STATEMENT_MEMO:
+            await stack.enter_async_context(StatementMemo())
+        return await func(caller, args)
+
+
 class BaseCommandSet(object):
     """
     All user commands are stored in command set.
@@ -40,7 +57,7 @@ class BaseCommandSet(object):
         def wrap(func):
             async def deal_func(caller, args, **kwargs):
                 try:
-                    await func(caller, args)
+                    await run_command(func, caller, args)
                 except Exception as e:
                     logger.log_trace("Run command error, %s: %s" % (caller, e))
                     await caller.respond_err("error", "Command %s error: %s" % (key, e))
@@ -55,7 +72,7 @@ class BaseCommandSet(object):
         def wrap(func):
             async def deal_func(caller, args, **kwargs):
                 try:
-                    data = await func(caller, args)
+                    data = await run_command(func, caller, args)
                     if not data:
                         data = {}
 
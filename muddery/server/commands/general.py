@@ -6,6 +6,8 @@ import traceback
 from muddery.server.utils.logger import logger
 from muddery.server.utils.localized_strings_handler import _
 from muddery.common.utils.exception import MudderyError, ERR
+from muddery.server.settings import SETTINGS
+from muddery.server.statements.statement_profiler import STATEMENT_PROFILER
 from muddery.server.server import Server
 from muddery.server.commands.command_set import CharacterCmd
 
@@ -654,3 +656,47 @@ async def get_revealed_maps(character, args) -> dict or None:
         }
     """
     return character.get_revealed_maps()
+
+
+@CharacterCmd.request("statement_profile")
+async def statement_profile(character, args) -> dict or None:
+    """
+    Control the statement profiler and get its report. Only staffs can use it.
+
+    Usage:
+        {
+            "cmd": "statement_profile",
+            "args": {
+                "action": <"report", "enable", "disable", "reset" or "dump", default is "report">,
+                "sort": <"calls", "total_time", "avg_time", "max_time" or "errors", default is "total_time">,
+                "limit": <the max number of records, default is 20>
+            }
+        }
+    """
+    if not character.is_staff():
+        raise MudderyError(ERR.no_permission, _("You do not have permission."))
+
+    args = args or {}
+    action = args.get("action", "report")
+    sort_by = args.get("sort", "total_time")
+    limit = args.get("limit", 20)
+
+    if sort_by not in STATEMENT_PROFILER.SORT_FIELDS:
+        raise MudderyError(ERR.invalid_input, _("Can not sort by %s.") % sort_by)
+
+    if action == "enable":
+        STATEMENT_PROFILER.enable()
+    elif action == "disable":
+        STATEMENT_PROFILER.disable()
+    elif action == "reset":
+        STATEMENT_PROFILER.reset()
+    elif action == "dump":
+        STATEMENT_PROFILER.dump(SETTINGS.STATEMENT_PROFILE_FILE, sort_by)
+    elif action != "report":
+        raise MudderyError(ERR.invalid_input, _("Unknown action: %s.") % action)
+
+    report = STATEMENT_PROFILER.report(sort_by, limit)
+    report["enabled"] = STATEMENT_PROFILER.enabled
+    if action == "dump":
+        report["file"] = SETTINGS.STATEMENT_PROFILE_FILE
+    return report
@@ -6,9 +6,43 @@ Query and deal game data.
 from muddery.server.settings import SETTINGS
 from muddery.common.utils import utils
 from muddery.server.database.storage.storage_with_cache import StorageWithCache
+from muddery.server.database.storage.write_behind_storage import WriteBehindStorageWithCache
+from muddery.server.database.storage.unit_of_work import UnitOfWork, set_background_unit_factory
 from muddery.server.database.gamedata_db import GameDataDB
 
 
+def unit_of_work():
+    """
+    Create a unit of work which commits all game data writes in it together.
+
+    Usage:
+        async with unit_of_work():
+            ...
+    """
+    storage_class = utils.class_from_path(SETTINGS.DATABASE_STORAGE_OBJECT)
+    return UnitOfWork(GameDataDB.inst(), storage_class.async_io)
+
+
+def use_unit_of_work():
+    """
+    If commands and background jobs run in units of work. If COMMAND_UNIT_OF_WORK is None, units of work
+    are used unless all of them share one session, like on sqlite3.
+    """
+    if SETTINGS.COMMAND_UNIT_OF_WORK is None:
+        return not GameDataDB.inst().shares_session()
+    return SETTINGS.COMMAND_UNIT_OF_WORK
+
+
+def background_unit_of_work():
+    """
+    Create a unit of work for a background job, or None if units of work are not used.
+    """
+    return unit_of_work() if use_unit_of_work() else None
+
+
+set_background_unit_factory(background_unit_of_work)
+
+
 class BaseData(object):
     """
     The base class of game data.
@@ -28,13 +62,22 @@ class BaseData(object):
         """
         pass
 
+    def get_db_session(self, storage_class):
+        """
+        Get the db session for the storage. Asyncio storages use the asyncio session maker.
+        """
+        if storage_class.async_io:
+            return GameDataDB.inst().get_async_session_maker()
+        else:
+            return GameDataDB.inst().get_session()
+
     def create_storage(self, table_name, category_name, key_field, default_value_field):
         """
         Create the storage object.
         """
         storage_class = utils.class_from_path(SETTINGS.DATABASE_STORAGE_OBJECT)
         storage = storage_class(
-            GameDataDB.inst().get_session(),
+            self.get_db_session(storage_class),
             SETTINGS.GAMEDATA_DB["MODELS"],
             table_name,
             category_name,
@@ -43,9 +86,16 @@ class BaseData(object):
         )
 
         cache_class = utils.class_from_path(SETTINGS.DATABASE_CACHE_OBJECT)
-        cache = cache_class()
+        all_options = SETTINGS.DATABASE_CACHE_OPTIONS
+        cache_options = all_options.get(table_name, all_options.get("default", {}))
+        cache = cache_class(**cache_options)
+        if hasattr(cache, "metrics"):
+            cache.name = self.__class__.__name__
 
-        return StorageWithCache(storage, cache)
+        if SETTINGS.DATABASE_WRITE_BEHIND:
+            return WriteBehindStorageWithCache(storage, cache, SETTINGS.DATABASE_FLUSH_INTERVAL)
+        else:
+            return StorageWithCache(storage, cache)
 
     def create_storage_no_cache(self, table_name, category_name, key_field, default_value_field):
         """
@@ -53,7 +103,7 @@ class BaseData(object):
         """
         storage_class = utils.class_from_path(SETTINGS.DATABASE_STORAGE_OBJECT)
         return storage_class(
-            GameDataDB.inst().get_session(),
+            self.get_db_session(storage_class),
             SETTINGS.GAMEDATA_DB["MODELS"],
             table_name,
             category_name,
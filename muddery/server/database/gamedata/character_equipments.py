@@ -5,6 +5,7 @@ Store object's element key data in memory.
 
 from muddery.server.database.gamedata.base_data import BaseData
 from muddery.common.utils.singleton import Singleton
+from muddery.server.statements.statement_memo import invalidate_statement_memo
 
 
 class CharacterEquipments(BaseData, Singleton):
@@ -45,6 +46,7 @@ class CharacterEquipments(BaseData, Singleton):
         :param object_key:
         :return:
         """
+        invalidate_statement_memo()
         await self.storage.add(character_id, position, {
             "object_key": object_key,
             "level": level,
@@ -59,6 +61,7 @@ class CharacterEquipments(BaseData, Singleton):
         :param values:
         :return:
         """
+        invalidate_statement_memo()
         await self.storage.save(character_id, position, {
             "object_key": object_key,
             "level": level,
@@ -71,6 +74,7 @@ class CharacterEquipments(BaseData, Singleton):
         :param character_id:
         :return:
         """
+        invalidate_statement_memo()
         await self.storage.delete_category(character_id)
 
     async def remove_equipment(self, character_id, position):
@@ -81,4 +85,5 @@ class CharacterEquipments(BaseData, Singleton):
         :param position: (string) position on the body
         :return:
         """
+        invalidate_statement_memo()
         await self.storage.delete(character_id, position)
@@ -5,6 +5,7 @@ The storage of all character's quests that are finished.
 
 from muddery.server.database.gamedata.base_data import BaseData
 from muddery.common.utils.singleton import Singleton
+from muddery.server.statements.statement_memo import invalidate_statement_memo
 
 
 class CharacterFinishedQuests(BaseData, Singleton):
@@ -25,9 +26,9 @@ class CharacterFinishedQuests(BaseData, Singleton):
         """
         Get a character's quest info.
         :param character_id:
-        :return:
+        :return: a read-only view of the data
         """
-        return await self.storage.load_category(character_id, {})
+        return await self.storage.load_category_view(character_id, {})
 
     async def has(self, character_id, quest):
         """
@@ -45,6 +46,7 @@ class CharacterFinishedQuests(BaseData, Singleton):
         :param quest:
         :return:
         """
+        invalidate_statement_memo()
         await self.storage.add(character_id, quest)
 
     async def remove_character(self, character_id):
@@ -54,6 +56,7 @@ class CharacterFinishedQuests(BaseData, Singleton):
         :param character_id:
         :return:
         """
+        invalidate_statement_memo()
         await self.storage.delete_category(character_id)
 
     async def remove(self, character_id, quest):
@@ -64,4 +67,5 @@ class CharacterFinishedQuests(BaseData, Singleton):
         :param quest: (string) quest's key
         :return:
         """
+        invalidate_statement_memo()
         await self.storage.delete(character_id, quest)
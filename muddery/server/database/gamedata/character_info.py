@@ -5,6 +5,7 @@ Store object's element key data in memory.
 
 from muddery.server.database.gamedata.base_data import BaseData
 from muddery.common.utils.singleton import Singleton
+from muddery.server.statements.statement_memo import invalidate_statement_memo
 
 
 class CharacterInfo(BaseData, Singleton):
@@ -33,6 +34,7 @@ class CharacterInfo(BaseData, Singleton):
         :param nickname:
         :return:
         """
+        invalidate_statement_memo()
         await self.storage.add("", char_id, {
             "element_type": element_type,
             "element_key": element_key,
@@ -50,6 +52,7 @@ class CharacterInfo(BaseData, Singleton):
         :return:
         """
         current_data = await self.storage.load("", char_id, None)
+        invalidate_statement_memo()
         await self.storage.save("", char_id, {"nickname": nickname})
 
         if current_data and current_data["nickname"]:
@@ -63,6 +66,7 @@ class CharacterInfo(BaseData, Singleton):
         :return:
         """
         current_info = await self.storage.load("", char_id)
+        invalidate_statement_memo()
         await self.storage.delete("", char_id)
 
         if current_info["nickname"]:
@@ -100,6 +104,7 @@ class CharacterInfo(BaseData, Singleton):
         :param nickname:
         :return:
         """
+        invalidate_statement_memo()
         await self.storage.save("", char_id, {"level": level})
 
     async def get_level(self, char_id):
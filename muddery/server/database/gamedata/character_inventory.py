@@ -5,6 +5,7 @@ Store object's element key data in memory.
 
 from muddery.server.database.gamedata.base_data import BaseData
 from muddery.common.utils.singleton import Singleton
+from muddery.server.statements.statement_memo import invalidate_statement_memo
 
 
 class CharacterInventory(BaseData, Singleton):
@@ -25,9 +26,9 @@ class CharacterInventory(BaseData, Singleton):
         """
         Get a character's inventory.
         :param character_id:
-        :return:
+        :return: a read-only view of the data
         """
-        return await self.storage.load_category(character_id, {})
+        return await self.storage.load_category_view(character_id, {})
 
     async def get_object(self, character_id, position):
         """
@@ -45,6 +46,7 @@ class CharacterInventory(BaseData, Singleton):
         :param object_key:
         :return:
         """
+        invalidate_statement_memo()
         await self.storage.add(character_id, position, {
             "object_key": object_key,
             "number": number,
@@ -60,6 +62,7 @@ class CharacterInventory(BaseData, Singleton):
         :param values:
         :return:
         """
+        invalidate_statement_memo()
         await self.storage.save(character_id, position, {
             "object_key": object_key,
             "number": number,
@@ -75,8 +78,20 @@ class CharacterInventory(BaseData, Singleton):
         :param values:
         :return:
         """
+        invalidate_statement_memo()
         await self.storage.save(character_id, position, values)
 
+    async def set_many(self, character_id, values):
+        """
+        Set objects' data.
+
+        :param character_id:
+        :param values: (dict) {position: values}
+        :return:
+        """
+        invalidate_statement_memo()
+        await self.storage.save_many(character_id, values)
+
     async def remove_character(self, character_id):
         """
         Remove a character's all objects.
@@ -84,6 +99,7 @@ class CharacterInventory(BaseData, Singleton):
         :param character_id: character's db id
         :return:
         """
+        invalidate_statement_memo()
         await self.storage.delete_category(character_id)
 
     async def remove_object(self, character_id, position):
@@ -94,4 +110,16 @@ class CharacterInventory(BaseData, Singleton):
         :param position: (int) object's position in the inventory
         :return:
         """
+        invalidate_statement_memo()
         await self.storage.delete(character_id, position)
+
+    async def remove_objects(self, character_id, positions):
+        """
+        Remove objects.
+
+        :param character_id:
+        :param positions: (list) objects' positions in the inventory
+        :return:
+        """
+        invalidate_statement_memo()
+        await self.storage.delete_many(character_id, positions)
@@ -6,6 +6,7 @@ Store object's element key data in memory.
 import json
 from muddery.server.database.gamedata.base_data import BaseData
 from muddery.common.utils.singleton import Singleton
+from muddery.server.statements.statement_memo import invalidate_statement_memo
 
 
 class CharacterQuestObjectives(BaseData, Singleton):
@@ -44,10 +45,11 @@ class CharacterQuestObjectives(BaseData, Singleton):
         """
         objective = "%s:%s" % (objective_type, object_key)
 
-        with self.storage.transaction():
+        async with self.storage.transaction():
             data = await self.storage.load(character_id, quest, "{}", for_update=True)
             objectives = json.loads(data)
             objectives[objective] = progress
+            invalidate_statement_memo()
             await self.storage.save(character_id, quest, json.dumps(objectives))
 
     async def get_progress(self, character_id, quest, objective_type, object_key, *default):
@@ -77,6 +79,7 @@ class CharacterQuestObjectives(BaseData, Singleton):
         :param quest: (string) quest's key
         :return:
         """
+        invalidate_statement_memo()
         await self.storage.delete(character_id, quest)
 
     async def remove_character(self, character_id):
@@ -87,4 +90,5 @@ class CharacterQuestObjectives(BaseData, Singleton):
         :param quest: (string) quest's key
         :return:
         """
+        invalidate_statement_memo()
         await self.storage.delete_category(character_id)
@@ -4,6 +4,7 @@ The relationship between players and elements
 
 from muddery.server.database.gamedata.base_data import BaseData
 from muddery.common.utils.singleton import Singleton
+from muddery.server.statements.statement_memo import invalidate_statement_memo
 
 
 class CharacterRelationships(BaseData, Singleton):
@@ -31,6 +32,7 @@ class CharacterRelationships(BaseData, Singleton):
             relationship: (int) their relationship
         """
         element = "%s:%s" % (element_type, element_key)
+        invalidate_statement_memo()
         await self.storage.save(character_id, element, relationship)
 
     async def increase(self, character_id: int, element_type: str, element_key: str, value: int) -> None:
@@ -48,9 +50,10 @@ class CharacterRelationships(BaseData, Singleton):
                 was found matching `key` and no default value set.
         """
         element = "%s:%s" % (element_type, element_key)
-        with self.storage.transaction():
+        async with self.storage.transaction():
             relationship = await self.storage.load(character_id, element, for_update=True)
             relationship += value
+            invalidate_statement_memo()
             await self.storage.save(character_id, element, relationship)
 
     async def has(self, character_id: int, element_type: str, element_key: str) -> bool:
@@ -92,6 +95,7 @@ class CharacterRelationships(BaseData, Singleton):
             element_key: (string) the element's key.
         """
         element = "%s:%s" % (element_type, element_key)
+        invalidate_statement_memo()
         await self.storage.delete(character_id, element)
 
     async def remove_character(self, character_id):
@@ -101,4 +105,5 @@ class CharacterRelationships(BaseData, Singleton):
         Args:
             character_id: (number) character's id.
         """
+        invalidate_statement_memo()
         await self.storage.delete_category(character_id)
@@ -24,9 +24,9 @@ class CharacterRevealedMap(BaseData, Singleton):
         """
         Get a character's revealed map.
         :param character_id:
-        :return:
+        :return: a read-only view of the data
         """
-        return await self.storage.load_category(character_id, {})
+        return await self.storage.load_category_view(character_id, {})
 
     async def has(self, character_id, map_key):
         """
@@ -4,6 +4,7 @@ Characters' skills.
 
 from muddery.server.database.gamedata.base_data import BaseData
 from muddery.common.utils.singleton import Singleton
+from muddery.server.statements.statement_memo import invalidate_statement_memo
 
 
 class CharacterSkills(BaseData, Singleton):
@@ -29,8 +30,20 @@ class CharacterSkills(BaseData, Singleton):
             skill_key: (string) skill's key.
             data: (dict) data to save.
         """
+        invalidate_statement_memo()
         await self.storage.save(character_id, skill_key, data)
 
+    async def save_many(self, character_id, skills):
+        """
+        Set skills.
+
+        Args:
+            character_id: (number) character's id.
+            skills: (dict) skills' keys and data to save.
+        """
+        invalidate_statement_memo()
+        await self.storage.save_many(character_id, skills)
+
     async def has(self, character_id, skill_key):
         """
         Check if the skill exists.
@@ -73,8 +86,20 @@ class CharacterSkills(BaseData, Singleton):
             character_id: (number) character's id.
             skill_key: (string) skill's key.
         """
+        invalidate_statement_memo()
         await self.storage.delete(character_id, skill_key)
 
+    async def delete_many(self, character_id, skill_keys):
+        """
+        delete skills of a character.
+
+        Args:
+            character_id: (number) character's id.
+            skill_keys: (list) skills' keys.
+        """
+        invalidate_statement_memo()
+        await self.storage.delete_many(character_id, skill_keys)
+
     async def remove_character(self, character_id):
         """
         Remove all skills of a character.
@@ -82,4 +107,5 @@ class CharacterSkills(BaseData, Singleton):
         Args:
             character_id: (number) character's id.
         """
+        invalidate_statement_memo()
         await self.storage.delete_category(character_id)
@@ -4,10 +4,12 @@ This model translates default strings into localized strings.
 
 import importlib
 import traceback
-from sqlalchemy import select, update, delete
+from sqlalchemy import select, insert, update, delete
 from muddery.common.utils.singleton import Singleton
+from muddery.common.utils.ranked_list import RankedList
 from muddery.server.settings import SETTINGS
 from muddery.server.database.gamedata_db import GameDataDB
+from muddery.server.database.storage.async_table_kv_storage import current_transaction
 from muddery.server.utils.logger import logger
 
 
@@ -21,8 +23,14 @@ class HonoursMapper(Singleton):
         self.model = getattr(module, self.model_name)
         self.session = GameDataDB.inst().get_session()
 
+        # Use asyncio sessions if the game data db has asyncio connections.
+        self.async_session_maker = GameDataDB.inst().get_async_session_maker()
+
+        # {character's id: honour}
         self.honours = {}
-        self.rankings = []
+
+        # Ranked characters' keys, see ranking_key().
+        self.rankings = RankedList()
 
     async def init(self):
         """
@@ -34,38 +42,93 @@ class HonoursMapper(Singleton):
         """
         Reload all data.
         """
-        self.honours = {}
-        self.rankings = []
-
         stmt = select(self.model)
-        result = self.session.execute(stmt)
-        for record in result.scalars():
-            self.honours[record.character] = {
-                "honour": record.honour,
-                "place": 0,
-                "ranking": 0
-            }
+        result = await self.execute(stmt)
+        self.honours = {record.character: record.honour for record in result.scalars()}
         self.make_rankings()
 
+    async def execute(self, stmt):
+        """
+        Execute a statement.
+        """
+        if self.async_session_maker:
+            scope = current_transaction()
+            if scope:
+                # Join the current unit of work.
+                async with scope.lock:
+                    return await scope.session.execute(stmt)
+
+            async with self.async_session_maker() as session:
+                async with session.begin():
+                    return await session.execute(stmt)
+        else:
+            return self.session.execute(stmt)
+
+    async def execute_all(self, stmts):
+        """
+        Execute a list of statements in one transaction.
+        """
+        if self.async_session_maker:
+            scope = current_transaction()
+            if scope:
+                # Join the current unit of work.
+                async with scope.lock:
+                    for stmt in stmts:
+                        await scope.session.execute(stmt)
+                return
+
+            async with self.async_session_maker() as session:
+                async with session.begin():
+                    for stmt in stmts:
+                        await session.execute(stmt)
+        else:
+            # self.session is a scoped session, call it to get the current session.
+            if self.session().in_transaction():
+                # Join the current transaction.
+                for stmt in stmts:
+                    self.session.execute(stmt)
+            else:
+                with self.session.begin():
+                    for stmt in stmts:
+                        self.session.execute(stmt)
+
+    @staticmethod
+    def ranking_key(char_id, honour):
+        """
+        The key of a character in rankings. Higher honours are in front, characters with the same honour are
+        ordered by their ids.
+        """
+        return -honour, char_id
+
     def make_rankings(self):
         """
         Calculate all character's rankings.
         """
-        rankings = sorted(self.honours.items(), key=lambda x: x[1]["honour"], reverse=True)
         # only ranking normal players
-        self.rankings = [item[0] for item in rankings if item[1]["honour"] >= 0]
-        
-        if not self.rankings:
-            return
-        
-        last = self.rankings[0]
-        for i, key in enumerate(self.rankings):
-            self.honours[key]["place"] = i
-            self.honours[key]["ranking"] = i + 1
-            if self.honours[key]["honour"] == self.honours[last]["honour"]:
-                self.honours[key]["ranking"] = self.honours[last]["ranking"]
-            last = key
-            
+        self.rankings.reset(self.ranking_key(char_id, honour) for char_id, honour in self.honours.items()
+                            if honour >= 0)
+
+    def update_ranking(self, char_id, honour):
+        """
+        Set a character's honour and move it in rankings.
+        """
+        old_honour = self.honours.get(char_id)
+        if old_honour is not None and old_honour >= 0:
+            self.rankings.discard(self.ranking_key(char_id, old_honour))
+
+        self.honours[char_id] = honour
+        if honour >= 0:
+            self.rankings.add(self.ranking_key(char_id, honour))
+
+    def get_place(self, char_id):
+        """
+        Get a character's position in rankings, starts from 0. Returns None if the character is not ranked.
+        """
+        honour = self.honours.get(char_id)
+        if honour is None or honour < 0:
+            return None
+        return self.rankings.index(self.ranking_key(char_id, honour))
+
     def has_info(self, character):
         """
         If a character has honour information.
@@ -89,7 +152,13 @@ class HonoursMapper(Singleton):
             dict: Character's honour information.
         """
         try:
-            return self.honours[character.id]
+            honour = self.honours[character.id]
+            place = self.get_place(character.id)
+            return {
+                "honour": honour,
+                "place": place or 0,
+                "ranking": self.get_ranking(character.id),
+            }
         except Exception as e:
             logger.log_err("Can not get character's honour: %s" % e)
 
@@ -104,7 +173,7 @@ class HonoursMapper(Singleton):
             number: Character's honour.
         """
         try:
-            return self.honours[char_db_id]["honour"]
+            return self.honours[char_db_id]
         except Exception as e:
             if default is not None:
                 return default
@@ -122,37 +191,65 @@ class HonoursMapper(Singleton):
             number: Character's ranking.
         """
         try:
-            return self.honours[char_db_id]["ranking"]
+            honour = self.honours[char_db_id]
         except Exception as e:
             logger.log_err("Can not get character's ranking: %s" % e)
-            
-    def get_top_rankings(self, number):
+            return
+
+        if honour < 0:
+            # Not ranked.
+            return 0
+
+        # Characters with the same honour have the same ranking.
+        return self.rankings.bisect_left((-honour,)) + 1
+
+
+    def count_rankings(self):
+        """
+        Get the number of ranked characters.
+        """
+        return len(self.rankings)
+
+    def get_rankings(self, begin, end):
+        """
+        Get characters in [begin, end) places of rankings.
+        """
+        return [key[1] for key in self.rankings.slice(begin, end)]
+
+    def get_top_rankings(self, number, offset=0):
         """
         Get top ranking characters.
+
+        Args:
+            number: (int) the number of characters.
+            offset: (int) skip characters before this place, to get rankings page by page.
         """
         if number <= 0:
             return
-        return [char_id for char_id in self.rankings[:number]]
-        
+        return self.get_rankings(offset, offset + number)
+
+    def get_nearest_range(self, char_id, number):
+        """
+        Get the range of number + 1 places around a character.
+        """
+        place = self.get_place(char_id)
+        total = len(self.rankings)
+        if place is None:
+            return max(total - number, 0), total
+
+        begin = max(place - number // 2, 0)
+        end = begin + number + 1
+        if end > total:
+            end = total
+            begin = max(end - number - 1, 0)
+        return begin, end
+
     def get_nearest_rankings(self, character, number):
         """
         Get nearest ranking characters.
         """
-        character_id = character.id
-        if character_id in self.honours:
-            place = self.honours[character_id]["place"]
-            begin = place - number / 2
-            if begin < 0:
-                begin = 0
-            end = begin + number + 1
-            if end > len(self.rankings):
-                end = len(self.rankings)
-                begin = end - number - 1
-                if begin < 0:
-                    begin = 0
-            return [id for id in self.rankings[begin:end]]
-        else:
-            return [id for id in self.rankings[-number:]]
+        begin, end = self.get_nearest_range(character.id, number)
+        return self.get_rankings(begin, end)
 
     async def create_honour(self, char_id, honour):
         """
@@ -163,19 +260,10 @@ class HonoursMapper(Singleton):
             honour: character's honour
         """
         try:
-            record = self.model(
-                character=char_id,
-                honour=honour
-            )
-            self.session.add(record)
-            self.session.flush()
-
-            self.honours[char_id] = {
-                "honour": honour,
-                "place": 0,
-                "ranking": 0
-            }
-            self.make_rankings()
+            stmt = insert(self.model).values(character=char_id, honour=honour)
+            await self.execute(stmt)
+
+            self.update_ranking(char_id, honour)
         except Exception as e:
             logger.log_err("Can not create character's honour: %s" % e)
 
@@ -188,18 +276,13 @@ class HonoursMapper(Singleton):
             honour: character's honour
         """
         stmt = update(self.model).where(getattr(self.model, "character") == char_id).values(honour=honour)
-        result = self.session.execute(stmt)
+        result = await self.execute(stmt)
         if result.rowcount > 0:
-            try:
-                self.honours[char_id]["honour"] = honour
-            except Exception as e:
-                logger.log_err("Can not set character's honour: %s" % e)
+            self.update_ranking(char_id, honour)
         else:
             # Add a new honour record.
             await self.create_honour(char_id, honour)
 
-        self.make_rankings()
-
     async def set_honours(self, new_honours):
         """
         Set a set of characters' honours.
@@ -207,36 +290,34 @@ class HonoursMapper(Singleton):
         Args:
             new_honours: (dict) {character's id: character's honour}
         """
-        for key in new_honours:
-            if key not in self.honours:
-                await self.create_honour(key, 0)
+        # Add new characters' records and update others in one transaction.
+        stmts = [
+            insert(self.model).values(character=key, honour=value)
+            if key not in self.honours else
+            update(self.model).where(getattr(self.model, "character") == key).values(honour=value)
+            for key, value in new_honours.items()
+        ]
+
+        try:
+            await self.execute_all(stmts)
+        except Exception as e:
+            logger.log_err("Can not set character's honours: %s" % e)
+            return
+
+        for key, value in new_honours.items():
+            self.update_ranking(key, value)
 
-        success = False
-        with self.session.begin():
-            for key, value in new_honours.items():
-                stmt = update(self.model).where(getattr(self.model, "character") == key).values(honour=value)
-                result = self.session.execute(stmt)
-            success = True
-        
-        if success:
-            for key, value in new_honours.items():
-                self.honours[key]["honour"] = value
-            self.make_rankings()
-        else:
-            logger.log_err("Can not set character's honours")
-            
     async def remove_character(self, char_db_id):
         """
         Remove a character's honour.
         """
         try:
             stmt = delete(self.model).where(getattr(self.model, "character") == char_db_id)
-            self.session.execute(stmt)
+            await self.execute(stmt)
 
-            if char_db_id in self.honours:
-                del self.honours[char_db_id]
-
-            self.make_rankings()
+            honour = self.honours.pop(char_db_id, None)
+            if honour is not None and honour >= 0:
+                self.rankings.discard(self.ranking_key(char_db_id, honour))
         except Exception as e:
             logger.log_err("Can not remove character's honour: %s" % e)
 
@@ -245,17 +326,5 @@ class HonoursMapper(Singleton):
         Get opponents whose ranking is in the given number.
         """
         character_id = character.id
-        if character_id in self.honours:
-            place = self.honours[character_id]["place"]
-            begin = place - number / 2
-            if begin < 0:
-                begin = 0
-            end = begin + number + 1
-            if end > len(self.rankings):
-                end = len(self.rankings)
-                begin = end - number - 1
-                if begin < 0:
-                    begin = 0
-            return [id for id in self.rankings[begin:end] if id != character_id]
-        else:
-            return [id for id in self.rankings[-number:]]
+        begin, end = self.get_nearest_range(character_id, number)
+        return [char_id for char_id in self.get_rankings(begin, end) if char_id != character_id]
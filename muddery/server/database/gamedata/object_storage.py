@@ -2,58 +2,22 @@
 Object's attributes cache.
 """
 
-import json
-import traceback
-from collections import OrderedDict
-from muddery.common.utils.exception import MudderyError, ERR
+from muddery.server.settings import SETTINGS
+from muddery.server.database.gamedata import value_codecs
 from muddery.server.database.storage.memory_kv_storage import MemoryKVStorage
 from muddery.server.database.gamedata.base_data import BaseData
 from muddery.common.utils.singleton import Singleton
+from muddery.server.utils.logger import logger
 
 
 def to_string(value):
     # pack a value to a string.
-    data_type = type(value)
-    if value is None:
-        # inner types
-        str_value = json.dumps((value, data_type.__name__))
-    elif data_type in {str, int, float, bool, bytes}:
-        # inner types
-        str_value = json.dumps((value, data_type.__name__))
-    elif hasattr(value, "__iter__"):
-        # iterable value
-        if data_type in {dict, OrderedDict}:
-            str_value = json.dumps((dict((to_string(key), to_string(obj)) for key, obj in value.items()), data_type.__name__))
-        else:
-            try:
-                str_value = json.dumps((tuple(to_string(obj) for obj in value), data_type.__name__))
-            except Exception as e:
-                raise MudderyError(ERR.server_error, "The object could not be stored.")
-    else:
-        raise MudderyError(ERR.server_error, "The object can not store %s of %s." % (value, type(value)))
-
-    return str_value
+    return value_codecs.encode(value)
 
 
 def from_string(str_value):
     # unpack a value from a string.
-    if str_value is None:
-        return None
-
-    try:
-        json_value, data_type = json.loads(str_value)
-        if data_type == "NoneType":
-            value = None
-        elif data_type in {"str", "int", "float", "bool", "bytes"}:
-            value = eval(data_type)(json_value)
-        elif data_type in {"dict", "OrderedDict"}:
-            value = eval(data_type)((from_string(key), from_string(item)) for key, item in json_value.items())
-        else:
-            value = eval(data_type)(from_string(item) for item in json_value)
-    except Exception as e:
-        raise MudderyError(ERR.server_error, "The object can not load %s." % str_value)
-
-    return value
+    return value_codecs.decode(str_value)
 
 
 class BaseObjectStorage(BaseData, Singleton):
@@ -83,12 +47,8 @@ class BaseObjectStorage(BaseData, Singleton):
             value_dict: (dict) a dict of key-values.
         """
         if value_dict:
-            try:
-                with self.storage.transaction():
-                    for key, value in value_dict.items():
-                        await self.storage.save(obj_id, key, to_string(value))
-            except Exception as e:
-                traceback.print_exc()
+            # Errors must reach the caller, buffered states keep failed keys to write them again.
+            await self.storage.save_many(obj_id, {key: to_string(value) for key, value in value_dict.items()})
 
     async def has(self, obj_id, key):
         """
@@ -115,13 +75,33 @@ class BaseObjectStorage(BaseData, Singleton):
         """
         try:
             value = await self.storage.load(obj_id, key)
-            return from_string(value)
         except KeyError as e:
             if len(default) > 0:
                 return default[0]
             else:
                 raise e
 
+        values = await self.decode_values(obj_id, {key: value})
+        return values[key]
+
+    async def load_keys(self, obj_id, keys, *default):
+        """
+        Get values of attributes.
+
+        Args:
+            obj_id: (number) object's id.
+            keys: (list) attributes' keys.
+            default: (any or none) default value of missing keys. If the default value is not set,
+                missing keys will not be in the result.
+        """
+        values = await self.storage.load_many(obj_id, keys)
+        values = await self.decode_values(obj_id, values)
+        if len(default) > 0:
+            for key in keys:
+                if key not in values:
+                    values[key] = default[0]
+        return values
+
     async def load_obj(self, obj_id):
         """
         Get values of an object.
@@ -130,7 +110,29 @@ class BaseObjectStorage(BaseData, Singleton):
             obj_id: (number) object's id.
         """
         values = await self.storage.load_category(obj_id, {})
-        return {key: from_string(value) for key, value in values.items()}
+        return await self.decode_values(obj_id, values)
+
+    async def decode_values(self, obj_id, str_values):
+        """
+        Unpack values. If GAMEDATA_VALUE_REWRITE_ON_READ is set, values packed by other codecs are packed
+        again with the current codec and saved.
+
+        Args:
+            obj_id: (number) object's id.
+            str_values: (dict) packed values.
+        """
+        values = {key: from_string(value) for key, value in str_values.items()}
+
+        if SETTINGS.GAMEDATA_VALUE_REWRITE_ON_READ:
+            stale = [key for key, value in str_values.items() if not value_codecs.is_current(value)]
+            if stale:
+                try:
+                    await self.storage.save_many(obj_id, {key: to_string(values[key]) for key in stale})
+                except Exception as e:
+                    # The values are still readable, convert them next time.
+                    logger.log_err("Can not convert values of %s: %s" % (obj_id, e))
+
+        return values
 
     async def delete(self, obj_id, key):
         """
@@ -142,6 +144,16 @@ class BaseObjectStorage(BaseData, Singleton):
         """
         await self.storage.delete(obj_id, key)
 
+    async def delete_keys(self, obj_id, keys):
+        """
+        delete attributes of an object.
+
+        Args:
+            obj_id: (number) object's id.
+            keys: (list) attributes' keys.
+        """
+        await self.storage.delete_many(obj_id, keys)
+
     async def remove_obj(self, obj_id):
         """
         Remove an object's all attributes.
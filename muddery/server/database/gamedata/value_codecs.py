@@ -0,0 +1,238 @@
+"""
+Codecs which pack objects' attribute values to strings.
+
+Values packed by codecs except the legacy JSON codec start with the codec's prefix, such as "mp1:", so values
+of different codecs and versions can be stored in the same table. Values without a prefix are in the legacy
+JSON format.
+"""
+
+import json
+import base64
+from collections import OrderedDict
+from muddery.common.utils.exception import MudderyError, ERR
+from muddery.server.settings import SETTINGS
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class BaseValueCodec(object):
+    """
+    The base class of value codecs.
+    """
+    # codec's name
+    name = None
+
+    # Values packed by this codec start with the prefix.
+    prefix = None
+
+    @classmethod
+    def available(cls) -> bool:
+        """
+        If the codec's dependencies are installed.
+        """
+        return True
+
+    def encode(self, value: any) -> str:
+        """
+        Pack a value to a string.
+        """
+        raise NotImplementedError
+
+    def decode(self, str_value: str) -> any:
+        """
+        Unpack a value from a string.
+        """
+        raise NotImplementedError
+
+
+class JSONValueCodec(BaseValueCodec):
+    """
+    The legacy codec. Each value is packed to a JSON (value, typename) list recursively.
+    """
+    name = "json"
+    prefix = ""
+
+    def encode(self, value: any) -> str:
+        data_type = type(value)
+        if value is None:
+            # inner types
+            str_value = json.dumps((value, data_type.__name__))
+        elif data_type in {str, int, float, bool, bytes}:
+            # inner types
+            str_value = json.dumps((value, data_type.__name__))
+        elif hasattr(value, "__iter__"):
+            # iterable value
+            if data_type in {dict, OrderedDict}:
+                str_value = json.dumps((dict((self.encode(key), self.encode(obj)) for key, obj in value.items()),
+                                        data_type.__name__))
+            else:
+                try:
+                    str_value = json.dumps((tuple(self.encode(obj) for obj in value), data_type.__name__))
+                except Exception as e:
+                    raise MudderyError(ERR.server_error, "The object could not be stored.")
+        else:
+            raise MudderyError(ERR.server_error, "The object can not store %s of %s." % (value, type(value)))
+
+        return str_value
+
+    def decode(self, str_value: str) -> any:
+        try:
+            json_value, data_type = json.loads(str_value)
+            if data_type == "NoneType":
+                value = None
+            elif data_type in {"str", "int", "float", "bool", "bytes"}:
+                value = eval(data_type)(json_value)
+            elif data_type in {"dict", "OrderedDict"}:
+                value = eval(data_type)((self.decode(key), self.decode(item)) for key, item in json_value.items())
+            else:
+                value = eval(data_type)(self.decode(item) for item in json_value)
+        except Exception as e:
+            raise MudderyError(ERR.server_error, "The object can not load %s." % str_value)
+
+        return value
+
+
+class MsgpackValueCodec(BaseValueCodec):
+    """
+    Pack values with msgpack and store them in base64. Tuples, sets and OrderedDicts are packed to
+    msgpack's ext types.
+    """
+    name = "msgpack"
+    prefix = "mp1:"
+
+    # ext type codes
+    EXT_TUPLE = 1
+    EXT_SET = 2
+    EXT_FROZENSET = 3
+    EXT_ORDERED_DICT = 4
+
+    @classmethod
+    def available(cls) -> bool:
+        return msgpack is not None
+
+    def pack(self, value: any) -> bytes:
+        # Check exact types, so tuples and OrderedDicts are not packed as lists and dicts.
+        return msgpack.packb(value, default=self.pack_ext, strict_types=True, use_bin_type=True)
+
+    def pack_ext(self, value: any):
+        data_type = type(value)
+        if data_type == tuple:
+            return msgpack.ExtType(self.EXT_TUPLE, self.pack(list(value)))
+        elif data_type == set:
+            return msgpack.ExtType(self.EXT_SET, self.pack(list(value)))
+        elif data_type == frozenset:
+            return msgpack.ExtType(self.EXT_FROZENSET, self.pack(list(value)))
+        elif data_type == OrderedDict:
+            return msgpack.ExtType(self.EXT_ORDERED_DICT, self.pack([[k, v] for k, v in value.items()]))
+        raise MudderyError(ERR.server_error, "The object can not store %s of %s." % (value, data_type))
+
+    def unpack(self, data: bytes) -> any:
+        return msgpack.unpackb(data, ext_hook=self.unpack_ext, strict_map_key=False, raw=False)
+
+    def unpack_ext(self, code: int, data: bytes) -> any:
+        items = self.unpack(data)
+        if code == self.EXT_TUPLE:
+            return tuple(items)
+        elif code == self.EXT_SET:
+            return set(items)
+        elif code == self.EXT_FROZENSET:
+            return frozenset(items)
+        elif code == self.EXT_ORDERED_DICT:
+            return OrderedDict(items)
+        return msgpack.ExtType(code, data)
+
+    def encode(self, value: any) -> str:
+        try:
+            data = self.pack(value)
+        except MudderyError:
+            raise
+        except Exception as e:
+            raise MudderyError(ERR.server_error, "The object can not store %s of %s." % (value, type(value)))
+
+        return self.prefix + base64.b64encode(data).decode("ascii")
+
+    def decode(self, str_value: str) -> any:
+        try:
+            return self.unpack(base64.b64decode(str_value[len(self.prefix):]))
+        except Exception as e:
+            raise MudderyError(ERR.server_error, "The object can not load %s." % str_value)
+
+
+# all codecs: {name: codec}
+CODECS = {}
+
+# current codec
+_current_codec = None
+
+
+def register_codec(codec: BaseValueCodec) -> None:
+    """
+    Add a codec, so values packed by it can be read.
+    """
+    CODECS[codec.name] = codec
+
+
+def set_codec(name: str) -> None:
+    """
+    Set the codec used to pack new values. Use the legacy JSON codec if the codec is not available.
+    """
+    global _current_codec
+    codec = CODECS[name]
+    _current_codec = codec if codec.available() else CODECS[JSONValueCodec.name]
+
+
+def get_codec() -> BaseValueCodec:
+    """
+    Get the codec used to pack new values.
+    """
+    if _current_codec is None:
+        set_codec(SETTINGS.GAMEDATA_VALUE_CODEC)
+    return _current_codec
+
+
+def find_codec(str_value: str) -> BaseValueCodec:
+    """
+    Find the codec of a packed value.
+    """
+    for codec in CODECS.values():
+        if codec.prefix and str_value.startswith(codec.prefix):
+            return codec
+    return CODECS[JSONValueCodec.name]
+
+
+def encode(value: any) -> str:
+    """
+    Pack a value to a string with the current codec.
+    """
+    return get_codec().encode(value)
+
+
+def decode(str_value: str) -> any:
+    """
+    Unpack a value packed by any codec.
+    """
+    if str_value is None:
+        return None
+
+    return find_codec(str_value).decode(str_value)
+
+
+def is_current(str_value: str) -> bool:
+    """
+    Check if a packed value is packed by the current codec.
+    """
+    if str_value is None:
+        return True
+
+    prefix = get_codec().prefix
+    if prefix:
+        return str_value.startswith(prefix)
+    else:
+        return find_codec(str_value).prefix == ""
+
+
+register_codec(JSONValueCodec())
+register_codec(MsgpackValueCodec())
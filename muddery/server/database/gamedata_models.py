@@ -145,6 +145,10 @@ class account_characters(BaseModel):
 
     __tablename__ = "account_characters"
 
+    __table_args__ = (
+        UniqueConstraint("account_id", "character_id"),
+    )
+
     # player's account id
     account_id = Column(Integer, index=True, nullable=False)
 
@@ -0,0 +1,159 @@
+"""
+Key value storage in relational database, runs database io with asyncio.
+"""
+
+from asyncio import Lock
+from contextvars import ContextVar
+from muddery.server.database.storage.table_kv_storage import TableKVStorage
+from muddery.common.utils.exception import MudderyError, ERR
+
+
+class TransactionScope(object):
+    """
+    A transaction shared by all asyncio storages in the same task, like the shared session of TableKVStorage.
+    """
+    def __init__(self, session):
+        self.session = session
+        self.depth = 0
+
+        # Tasks which copied the context may still see the transaction after it has been closed.
+        self.closed = False
+
+        # Tasks created in the transaction copy the context, so they share the same session.
+        # A session can not run statements concurrently.
+        self.lock = Lock()
+
+
+# The transaction of the current task.
+_current_transaction = ContextVar("current_transaction", default=None)
+
+
+def current_transaction() -> TransactionScope:
+    """
+    Get the transaction of the current task, or None if it is not in a transaction.
+    """
+    scope = _current_transaction.get()
+    if scope and scope.closed:
+        return None
+    return scope
+
+
+async def enter_transaction(session_maker) -> None:
+    """
+    Begin a transaction shared by all asyncio storages in the current task, or join the current one.
+    """
+    scope = current_transaction()
+    if not scope:
+        scope = TransactionScope(session_maker())
+        _current_transaction.set(scope)
+
+    # Nested transactions join the outer one.
+    scope.depth += 1
+
+
+async def exit_transaction(success: bool) -> None:
+    """
+    Leave the current transaction. The outermost one commits or rolls back the transaction.
+    """
+    scope = _current_transaction.get()
+    scope.depth -= 1
+    if scope.depth > 0:
+        return
+
+    _current_transaction.set(None)
+    scope.closed = True
+    try:
+        async with scope.lock:
+            if success:
+                await scope.session.commit()
+            else:
+                await scope.session.rollback()
+    finally:
+        await scope.session.close()
+
+
+class AsyncTableKVStorage(TableKVStorage):
+    """
+    The storage of object attributes. It works like TableKVStorage, but the session is an asyncio session maker,
+    each statement outside of transactions runs in its own session.
+    """
+    async_io = True
+
+    def __init__(self,
+                 session: any,
+                 model_path: str,
+                 model_name: str,
+                 category_field: str,
+                 key_field: str,
+                 default_value_field: str = None):
+        """
+        :param session: the asyncio session maker
+        :param model_name: table's model
+        :param category_field: category's field name in the table
+        :param key_field: key's field name in the table
+        :param default_value_field: default value's field name in the table.
+                If set the default value field, it can only store a simple value.
+                If the default value field is not set, value should be a dict.
+        """
+        super(AsyncTableKVStorage, self).__init__(session, model_path, model_name, category_field, key_field,
+                                                  default_value_field)
+
+    def get_dialect_name(self):
+        """
+        Get the database's dialect name.
+        """
+        return self.session.kw["bind"].dialect.name
+
+    async def execute(self, stmt, params=None):
+        """
+        Execute a statement.
+
+        Args:
+            stmt: the statement to execute.
+            params: (dict or list) statement's parameters, a list of parameters will use executemany.
+        """
+        scope = current_transaction()
+        if scope:
+            async with scope.lock:
+                return await scope.session.execute(stmt, params)
+
+        async with self.session() as session:
+            async with session.begin():
+                return await session.execute(stmt, params)
+
+    async def execute_all(self, stmts):
+        """
+        Execute a list of statements in one transaction.
+
+        Args:
+            stmts: (list) a list of (statement, parameters).
+        """
+        scope = current_transaction()
+        if scope:
+            async with scope.lock:
+                for stmt, params in stmts:
+                    await scope.session.execute(stmt, params)
+            return
+
+        async with self.session() as session:
+            async with session.begin():
+                for stmt, params in stmts:
+                    await session.execute(stmt, params)
+
+    def transaction_enter(self) -> None:
+        raise MudderyError(ERR.server_error, "Asyncio storages must use \"async with\" transactions.")
+
+    def transaction_success(self, exc_type, exc_value, trace) -> None:
+        raise MudderyError(ERR.server_error, "Asyncio storages must use \"async with\" transactions.")
+
+    def transaction_failed(self, exc_type, exc_value, trace) -> None:
+        raise MudderyError(ERR.server_error, "Asyncio storages must use \"async with\" transactions.")
+
+    async def async_transaction_enter(self) -> None:
+        await enter_transaction(self.session)
+
+    async def async_transaction_success(self, exc_type, exc_value, trace) -> None:
+        await exit_transaction(True)
+
+    async def async_transaction_failed(self, exc_type, exc_value, trace) -> None:
+        await exit_transaction(False)
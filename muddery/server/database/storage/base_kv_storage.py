@@ -3,6 +3,8 @@ The base class of key value storage.
 """
 
 from asyncio import Lock
+from types import MappingProxyType
+from typing import Mapping
 from muddery.server.database.storage.transaction import Transaction
 
 
@@ -10,6 +12,9 @@ class BaseKeyValueStorage(object):
     """
     The storage of key-values.
     """
+    # If the storage runs database io with asyncio. Asyncio storages need asyncio sessions.
+    async_io = False
+
     def __init__(self):
         self.lock = Lock()
 
@@ -61,6 +66,47 @@ class BaseKeyValueStorage(object):
         """
         pass
 
+    async def save_many(self, category: str, values: dict) -> None:
+        """
+        Set a category's attributes.
+
+        Args:
+            category: (string, int) the category of data.
+            values: (dict) attributes' keys and values.
+        """
+        for key, value in values.items():
+            await self.save(category, key, value)
+
+    async def load_many(self, category: str, keys: list, *default) -> dict:
+        """
+        Get values of a category's attributes.
+
+        Args:
+            category: (string, int) the category of data.
+            keys: (list) attributes' keys.
+            default: (any or none) default value of missing keys. If the default value is not set,
+                missing keys will not be in the result.
+        """
+        values = {}
+        for key in keys:
+            try:
+                values[key] = await self.load(category, key)
+            except KeyError:
+                if len(default) > 0:
+                    values[key] = default[0]
+        return values
+
+    async def delete_many(self, category: str, keys: list) -> None:
+        """
+        Delete a category's attributes.
+
+        Args:
+            category: (string, int) the category of data.
+            keys: (list) attributes' keys.
+        """
+        for key in keys:
+            await self.delete(category, key)
+
     async def set_all(self, all_data: dict) -> None:
         """
         Set all data to cache.
@@ -95,6 +141,22 @@ class BaseKeyValueStorage(object):
         """
         pass
 
+    async def load_category_view(self, category: str, *default) -> Mapping:
+        """
+        Get a read-only view of a category's data. Callers must not change the data.
+
+        Args:
+            category: (string) category's name.
+        """
+        data = await self.load_category(category, *default)
+        return MappingProxyType(data) if type(data) == dict else data
+
+    async def load_all_view(self) -> Mapping:
+        """
+        Get a read-only view of all data. Callers must not change the data.
+        """
+        return MappingProxyType(await self.load_all())
+
     async def delete(self, category: str, key: str) -> any:
         """
         delete an attribute of an object.
@@ -128,3 +190,12 @@ class BaseKeyValueStorage(object):
 
     def transaction_failed(self, exc_type, exc_value, trace) -> None:
         pass
+
+    async def async_transaction_enter(self) -> None:
+        self.transaction_enter()
+
+    async def async_transaction_success(self, exc_type, exc_value, trace) -> None:
+        self.transaction_success(exc_type, exc_value, trace)
+
+    async def async_transaction_failed(self, exc_type, exc_value, trace) -> None:
+        self.transaction_failed(exc_type, exc_value, trace)
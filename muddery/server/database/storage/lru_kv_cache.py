@@ -0,0 +1,362 @@
+"""
+Memory cache with a bounded size. Least recently used categories are evicted when the cache is full.
+"""
+
+import sys
+import weakref
+from collections import OrderedDict
+from muddery.server.database.storage.memory_kv_cache import MemoryKVCache
+
+
+def get_size(value: any) -> int:
+    """
+    Get the approximate memory size of a value in bytes.
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(get_size(k) + get_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set)):
+        size += sum(get_size(v) for v in value)
+    return size
+
+
+class LRUKVCache(MemoryKVCache):
+    """
+    A memory cache which evicts least recently used categories when it holds more than max_categories
+    categories or more than max_bytes bytes. A category is the smallest unit of eviction, usually it is
+    one character's data.
+
+    Categories of online characters, categories changed in the current transaction and categories
+    protected by eviction guards (such as categories have unsaved changes) are never evicted.
+    """
+    # all lru caches
+    instances = weakref.WeakSet()
+
+    # Categories can not be evicted from any cache, usually they are online characters' db ids.
+    pinned_categories = set()
+
+    def __init__(self, max_categories: int = 0, max_bytes: int = 0):
+        """
+        :param max_categories: max number of categories in the cache, 0 means no limit.
+        :param max_bytes: approximate max memory size of the cache, 0 means no limit.
+        """
+        super(LRUKVCache, self).__init__()
+
+        self.name = ""
+        self.max_categories = max_categories
+        self.max_bytes = max_bytes
+
+        # The order of categories is their usage order, the least recently used category is the first one.
+        self.storage = OrderedDict()
+
+        # {category: size}, only used when max_bytes is set.
+        self.sizes = {}
+        self.total_bytes = 0
+
+        # Functions check whether a category can not be evicted: func(category) -> bool
+        self.eviction_guards = []
+
+        # metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.instances.add(self)
+
+    @classmethod
+    def pin(cls, category: any) -> None:
+        """
+        Keep a category in all caches.
+        """
+        cls.pinned_categories.add(category)
+
+    @classmethod
+    def unpin(cls, category: any) -> None:
+        """
+        Allow a category to be evicted.
+        """
+        cls.pinned_categories.discard(category)
+
+    def add_eviction_guard(self, func) -> None:
+        """
+        Add a function which returns True if a category can not be evicted.
+        """
+        self.eviction_guards.append(func)
+
+    def touch(self, category: any) -> None:
+        """
+        Mark a category as recently used and count the cache hit. Misses are counted when categories are
+        loaded to the cache.
+        """
+        if category in self.storage:
+            self.storage.move_to_end(category)
+            self.hits += 1
+
+    def can_evict(self, category: any) -> bool:
+        if category in self.pinned_categories or category in self.dirty_categories:
+            return False
+
+        for guard in self.eviction_guards:
+            if guard(category):
+                return False
+
+        return True
+
+    def is_full(self) -> bool:
+        if self.max_categories and len(self.storage) > self.max_categories:
+            return True
+
+        if self.max_bytes and self.total_bytes > self.max_bytes:
+            return True
+
+        return False
+
+    def evict(self, keep: any = None) -> None:
+        """
+        Evict least recently used categories until the cache is not full.
+
+        Args:
+            keep: the category being used, it will not be evicted.
+        """
+        if not self.is_full():
+            return
+
+        for category in list(self.storage.keys()):
+            if category == keep or not self.can_evict(category):
+                continue
+
+            self.remove_category(category)
+            self.evictions += 1
+
+            if not self.is_full():
+                break
+
+    def remove_category(self, category: any) -> None:
+        """
+        Remove a category without recording it as dirty.
+        """
+        self.copy_on_write().pop(category, None)
+        self.shared_categories.discard(category)
+        self.unshare_values(category)
+        if self.max_bytes:
+            self.total_bytes -= self.sizes.pop(category, 0)
+
+    def entries_size(self, category: any, keys) -> int:
+        """
+        Get the size of some entries in a category.
+        """
+        data = self.storage.get(category)
+        if not data:
+            return 0
+        return sum(get_size(key) + get_size(data[key]) for key in keys if key in data)
+
+    def update_size(self, category: any, old_size: int, new_size: int) -> None:
+        self.sizes[category] = self.sizes.get(category, 0) + new_size - old_size
+        self.total_bytes += new_size - old_size
+
+    async def add(self, category, key, value=None):
+        """
+        Add a new attribute. If the key already exists, raise an exception.
+
+        Args:
+            category: (string) the category of data.
+            key: (string) the key.
+            value: (any) data.
+        """
+        self.touch(category)
+        await super(LRUKVCache, self).add(category, key, value)
+
+        if self.max_bytes:
+            self.update_size(category, 0, self.entries_size(category, [key]))
+        self.evict(category)
+
+    async def save(self, category, key, value=None):
+        """
+        Set a value to the default value field.
+
+        Args:
+            category: (string) the category of data.
+            key: (string) the key.
+            value: (any) data.
+        """
+        self.touch(category)
+        if self.max_bytes:
+            old_size = self.entries_size(category, [key])
+
+        await super(LRUKVCache, self).save(category, key, value)
+
+        if self.max_bytes:
+            self.update_size(category, old_size, self.entries_size(category, [key]))
+        self.evict(category)
+
+    async def save_many(self, category, values):
+        """
+        Set values of a category's keys.
+
+        Args:
+            category: (string) the category of data.
+            values: (dict) keys and values.
+        """
+        self.touch(category)
+        if self.max_bytes:
+            old_size = self.entries_size(category, values.keys())
+
+        await super(LRUKVCache, self).save_many(category, values)
+
+        if self.max_bytes:
+            self.update_size(category, old_size, self.entries_size(category, values.keys()))
+        self.evict(category)
+
+    async def has(self, category: str, key: str, check_category: bool = False) -> bool:
+        """
+        Check if the key exists.
+
+        Args:
+            category: (string) the category of data.
+            key: (string) attribute's key.
+            check_category: if check_category is True and does not has the category, it will raise a KeyError.
+        """
+        self.touch(category)
+        return await super(LRUKVCache, self).has(category, key, check_category)
+
+    async def load(self, category, key, *default, for_update=False):
+        """
+        Get the default field value of a key.
+
+        Args:
+            category: (string) the category of data.
+            key: (string) data's key.
+            default: (any or none) default value.
+        """
+        self.touch(category)
+        return await super(LRUKVCache, self).load(category, key, *default)
+
+    async def load_many(self, category, keys, *default):
+        """
+        Get values of a category's keys.
+
+        Args:
+            category: (string) the category of data.
+            keys: (list) data's keys.
+            default: (any or none) default value of missing keys.
+
+        Raises:
+            KeyError: If the category is not in the storage.
+        """
+        self.touch(category)
+        return await super(LRUKVCache, self).load_many(category, keys, *default)
+
+    async def load_category(self, category, *default):
+        """
+        Get all default field's values of a category.
+
+        Args:
+            category: (string) category's name.
+        """
+        self.touch(category)
+        return await super(LRUKVCache, self).load_category(category, *default)
+
+    async def delete(self, category, key):
+        """
+        delete a key.
+
+        Args:
+            category: (string) the category of data.
+            key: (string) attribute's key.
+        """
+        if self.max_bytes:
+            self.update_size(category, self.entries_size(category, [key]), 0)
+        await super(LRUKVCache, self).delete(category, key)
+
+    async def delete_many(self, category, keys):
+        """
+        delete keys of a category.
+
+        Args:
+            category: (string) the category of data.
+            keys: (list) attributes' keys.
+        """
+        if self.max_bytes:
+            self.update_size(category, self.entries_size(category, keys), 0)
+        await super(LRUKVCache, self).delete_many(category, keys)
+
+    async def set_all(self, all_data: dict) -> None:
+        """
+        Set all data.
+        """
+        await super(LRUKVCache, self).set_all(all_data)
+        self.storage = OrderedDict(self.storage)
+
+        self.sizes = {}
+        self.total_bytes = 0
+        if self.max_bytes:
+            for category in self.storage:
+                self.update_size(category, 0, get_size(self.storage[category]))
+        self.evict()
+
+    async def set_category(self, category: str, data: dict) -> None:
+        """
+        Set a category of data to cache.
+        """
+        self.misses += 1
+        if self.max_bytes:
+            self.total_bytes -= self.sizes.pop(category, 0)
+
+        await super(LRUKVCache, self).set_category(category, data)
+        self.storage.move_to_end(category)
+
+        if self.max_bytes:
+            self.update_size(category, 0, get_size(self.storage[category]))
+        self.evict(category)
+
+    async def delete_category(self, category):
+        """
+        Remove all values of a category.
+
+        Args:
+            category: (string) the category of data.
+        """
+        await super(LRUKVCache, self).delete_category(category)
+        if self.max_bytes:
+            self.total_bytes -= self.sizes.pop(category, 0)
+
+    def transaction_failed(self, exc_type, exc_value, trace) -> None:
+        # Remove dirty caches.
+        for category in self.dirty_categories:
+            self.remove_category(category)
+
+        self.dirty_categories = set()
+        self.in_transaction = False
+
+        # Categories could not be evicted in the transaction.
+        self.evict()
+
+    def transaction_success(self, exc_type, exc_value, trace) -> None:
+        super(LRUKVCache, self).transaction_success(exc_type, exc_value, trace)
+
+        # Categories could not be evicted in the transaction.
+        self.evict()
+
+    def metrics(self) -> dict:
+        """
+        Get the cache's metrics.
+        """
+        total = self.hits + self.misses
+        return {
+            "name": self.name,
+            "categories": len(self.storage),
+            "bytes": self.total_bytes,
+            "max_categories": self.max_categories,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0,
+            "evictions": self.evictions,
+        }
+
+    @classmethod
+    def all_metrics(cls) -> list:
+        """
+        Get all lru caches' metrics.
+        """
+        return [cache.metrics() for cache in cls.instances]
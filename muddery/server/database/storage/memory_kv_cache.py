@@ -45,6 +45,19 @@ class MemoryKVCache(MemoryKVStorage):
         if self.in_transaction:
             self.dirty_categories.add(category)
 
+    async def save_many(self, category, values):
+        """
+        Set values of a category's keys.
+
+        Args:
+            category: (string) the category of data.
+            values: (dict) keys and values.
+        """
+        await super(MemoryKVCache, self).save_many(category, values)
+
+        if self.in_transaction:
+            self.dirty_categories.add(category)
+
     async def delete(self, category, key):
         """
         delete a key.
@@ -58,6 +71,19 @@ class MemoryKVCache(MemoryKVStorage):
         if self.in_transaction:
             self.dirty_categories.add(category)
 
+    async def delete_many(self, category, keys):
+        """
+        delete keys of a category.
+
+        Args:
+            category: (string) the category of data.
+            keys: (list) attributes' keys.
+        """
+        await super(MemoryKVCache, self).delete_many(category, keys)
+
+        if self.in_transaction:
+            self.dirty_categories.add(category)
+
     async def set_all(self, all_data: dict) -> None:
         """
         Set all data.
@@ -98,8 +124,11 @@ class MemoryKVCache(MemoryKVStorage):
 
     def transaction_failed(self, exc_type, exc_value, trace) -> None:
         # Remove dirty caches.
+        storage = self.copy_on_write()
         for category in self.dirty_categories:
-            del self.storage[category]
+            storage.pop(category, None)
+            self.shared_categories.discard(category)
+            self.unshare_values(category)
 
         self.dirty_categories = set()
         self.in_transaction = False
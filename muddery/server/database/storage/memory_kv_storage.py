@@ -2,6 +2,7 @@
 Key value storage in relational database.
 """
 
+from types import MappingProxyType
 from muddery.server.database.storage.base_kv_storage import BaseKeyValueStorage
 from muddery.common.utils.exception import MudderyError, ERR
 
@@ -9,11 +10,86 @@ from muddery.common.utils.exception import MudderyError, ERR
 class MemoryKVStorage(BaseKeyValueStorage):
     """
     The storage of object attributes.
+
+    load_category_view and load_all_view return read-only views instead of copies. Dicts referenced by views,
+    including values' dicts, are copied before they are changed (copy on write), so a view is a snapshot of
+    the data.
     """
     def __init__(self):
         super(MemoryKVStorage, self).__init__()
         self.storage = {}
 
+        # categories whose dicts are referenced by views
+        self.shared_categories = set()
+
+        # Keys whose value dicts may be referenced by views after their categories have been copied:
+        # {category: {key}}
+        self.shared_values = {}
+
+        # if the whole storage dict is referenced by a view
+        self.all_shared = False
+
+    def copy_on_write(self, category: any = None) -> dict:
+        """
+        Copy dicts referenced by views before changing them.
+
+        Args:
+            category: (string) the category to change, only make the storage dict writable if it is None.
+
+        Return:
+            (dict): the category's writable dict, create it if it does not exist.
+        """
+        if self.all_shared:
+            self.storage = self.storage.copy()
+            self.all_shared = False
+
+        if category is None:
+            return self.storage
+
+        if category not in self.storage:
+            self.storage[category] = {}
+        elif category in self.shared_categories:
+            data = self.storage[category]
+            self.storage[category] = data.copy()
+            self.shared_categories.discard(category)
+
+            # The copy still references the same value dicts.
+            self.shared_values.setdefault(category, set()).update(
+                key for key, value in data.items() if type(value) == dict
+            )
+
+        return self.storage[category]
+
+    def set_value(self, category: any, data: dict, key: any, value: any) -> None:
+        """
+        Set a value in a writable category dict. Dict values are merged with old values, old values referenced
+        by views are not changed.
+        """
+        shared = self.shared_values.get(category)
+        if key in data and type(data[key]) == dict:
+            if shared and key in shared:
+                data[key] = {**data[key], **value}
+            else:
+                data[key].update(value)
+        else:
+            data[key] = value
+
+        if shared:
+            shared.discard(key)
+
+    def unshare_values(self, category: any, keys: list = None) -> None:
+        """
+        Stop tracking removed values.
+
+        Args:
+            category: (string) the category of data.
+            keys: (list) removed keys, remove all keys of the category if it is None.
+        """
+        if keys is None:
+            self.shared_values.pop(category, None)
+        elif category in self.shared_values:
+            self.shared_values[category].difference_update(keys)
+
     async def add(self, category, key, value=None):
         """
         Add a new attribute. If the key already exists, raise an exception.
@@ -23,13 +99,10 @@ class MemoryKVStorage(BaseKeyValueStorage):
             key: (string) the key.
             value: (any) data.
         """
-        if category not in self.storage:
-            self.storage[category] = {}
-
-        if key in self.storage[category]:
+        if category in self.storage and key in self.storage[category]:
             raise MudderyError(ERR.duplicate_key, "Duplicate key %s." % key)
 
-        self.storage[category][key] = value
+        self.copy_on_write(category)[key] = value
 
     async def save(self, category, key, value=None):
         """
@@ -40,13 +113,20 @@ class MemoryKVStorage(BaseKeyValueStorage):
             key: (string) the key.
             value: (any) data.
         """
-        if category not in self.storage:
-            self.storage[category] = {}
+        data = self.copy_on_write(category)
+        self.set_value(category, data, key, value)
 
-        if key in self.storage[category] and type(self.storage[category][key]) == dict:
-            self.storage[category][key].update(value)
-        else:
-            self.storage[category][key] = value
+    async def save_many(self, category, values):
+        """
+        Set values of a category's keys.
+
+        Args:
+            category: (string) the category of data.
+            values: (dict) keys and values.
+        """
+        data = self.copy_on_write(category)
+        for key, value in values.items():
+            self.set_value(category, data, key, value)
 
     async def has(self, category: str, key: str, check_category: bool = False) -> bool:
         """
@@ -83,6 +163,24 @@ class MemoryKVStorage(BaseKeyValueStorage):
             else:
                 raise e
 
+    async def load_many(self, category, keys, *default):
+        """
+        Get values of a category's keys.
+
+        Args:
+            category: (string) the category of data.
+            keys: (list) data's keys.
+            default: (any or none) default value of missing keys.
+
+        Raises:
+            KeyError: If the category is not in the storage.
+        """
+        data = self.storage[category]
+        if len(default) > 0:
+            return {key: data.get(key, default[0]) for key in keys}
+        else:
+            return {key: data[key] for key in keys if key in data}
+
     async def delete(self, category, key):
         """
         delete a key.
@@ -91,16 +189,34 @@ class MemoryKVStorage(BaseKeyValueStorage):
             category: (string) the category of data.
             key: (string) attribute's key.
         """
-        try:
-            del self.storage[category][key]
-        except KeyError:
-            pass
+        if category in self.storage and key in self.storage[category]:
+            del self.copy_on_write(category)[key]
+            self.unshare_values(category, [key])
+
+    async def delete_many(self, category, keys):
+        """
+        delete keys of a category.
+
+        Args:
+            category: (string) the category of data.
+            keys: (list) attributes' keys.
+        """
+        if category not in self.storage:
+            return
+
+        data = self.copy_on_write(category)
+        for key in keys:
+            data.pop(key, None)
+        self.unshare_values(category, keys)
 
     async def set_all(self, all_data: dict) -> None:
         """
         Set all data.
         """
         self.storage = all_data.copy()
+        self.shared_categories = set()
+        self.shared_values = {}
+        self.all_shared = False
 
     async def load_all(self) -> dict:
         """
@@ -109,11 +225,21 @@ class MemoryKVStorage(BaseKeyValueStorage):
         """
         return self.storage.copy()
 
+    async def load_all_view(self) -> MappingProxyType:
+        """
+        Get a read-only view of all data.
+        """
+        self.all_shared = True
+        self.shared_categories.update(self.storage.keys())
+        return MappingProxyType(self.storage)
+
     async def set_category(self, category: str, data: dict) -> None:
         """
         Set a category of data to cache.
         """
-        self.storage[category] = data.copy()
+        self.copy_on_write()[category] = data.copy()
+        self.shared_categories.discard(category)
+        self.unshare_values(category)
 
     async def load_category(self, category, *default):
         """
@@ -127,10 +253,27 @@ class MemoryKVStorage(BaseKeyValueStorage):
                 was found matching `category`.
         """
         if category not in self.storage:
+            if len(default) > 0:
+                return default[0]
             raise KeyError
 
         return self.storage[category].copy()
 
+    async def load_category_view(self, category, *default):
+        """
+        Get a read-only view of a category's values.
+
+        Args:
+            category: (string) category's name.
+        """
+        if category not in self.storage:
+            if len(default) > 0:
+                return default[0]
+            raise KeyError
+
+        self.shared_categories.add(category)
+        return MappingProxyType(self.storage[category])
+
     async def has_category(self, category: str) -> bool:
         """
         Check if the category is in cache.
@@ -144,7 +287,7 @@ class MemoryKVStorage(BaseKeyValueStorage):
         Args:
             category: (string) the category of data.
         """
-        try:
-            del self.storage[category]
-        except KeyError:
-            pass
+        if category in self.storage:
+            del self.copy_on_write()[category]
+            self.shared_categories.discard(category)
+            self.unshare_values(category)
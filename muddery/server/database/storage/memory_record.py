@@ -1,27 +1,69 @@
+"""
+Records of memory tables.
+
+Each column set has its own record class whose fields are slots, so reading a field is a plain slot read
+and a record does not keep a list of its data.
+"""
+
 
 class MemoryRecord(object):
     """
-    Record object. Use attributes to access record fields.
+    Base class of records. Use attributes to access record fields. Create record classes with record_class().
     """
-    def __init__(self, fields, data):
+    __slots__ = ()
+
+    # field names
+    _fields = ()
+
+    # setters of fields' slots
+    _setters = ()
+
+    def __init__(self, data):
         """
         Args:
-            fields: (dict) a dict of field names and data positions.
-            data: (list) a list of records. A record is a list too.
-                  Data's order in a record must be the same as the position of fields dict.
+            data: (list) fields' values. Data's order must be the same as the order of the class's fields.
         """
-        object.__setattr__(self, "_fields", fields)
-        object.__setattr__(self, "_records", data)
+        for setter, value in zip(self._setters, data):
+            setter(self, value)
 
-    def __getattribute__(self, attr_name):
-        try:
-            pos = object.__getattribute__(self, "_fields")[attr_name]
-        except KeyError:
-            raise AttributeError("Can not find field %s." % attr_name)
-        return object.__getattribute__(self, "_records")[pos]
+    def __getattr__(self, attr_name):
+        # Only called when the field can not be found.
+        raise AttributeError("Can not find field %s." % attr_name)
 
     def __setattr__(self, attr_name, value):
         raise Exception("Cannot assign directly to record attributes!")
 
     def __delattr__(self, attr_name):
         raise Exception("Cannot delete record attributes!")
+
+    def __repr__(self):
+        return "%s(%s)" % (type(self).__name__, ", ".join(
+            "%s=%r" % (field, getattr(self, field)) for field in self._fields
+        ))
+
+
+# {(class name, fields): record class}
+_record_classes = {}
+
+
+def record_class(fields, name="MemoryRecord"):
+    """
+    Get the record class of a column set.
+
+    Args:
+        fields: (list) field names.
+        name: (string) the class's name.
+    """
+    fields = tuple(fields)
+    try:
+        return _record_classes[(name, fields)]
+    except KeyError:
+        pass
+
+    cls = type(name, (MemoryRecord,), {
+        "__slots__": fields,
+        "_fields": fields,
+    })
+    cls._setters = tuple(cls.__dict__[field].__set__ for field in fields)
+    _record_classes[(name, fields)] = cls
+    return cls
@@ -5,24 +5,36 @@ Load and cache all worlddata.
 import importlib
 from sqlalchemy import UniqueConstraint, select
 from muddery.common.utils.exception import MudderyError
-from muddery.server.database.storage.memory_record import MemoryRecord
+from muddery.server.database.storage.memory_record import record_class
 
 
 class MemoryTable(object):
     """
     Load and cache a table's data.
     """
-    def __init__(self, session, model_path, model_name):
+    def __init__(self, session, model_path, model_name, data=None):
+        """
+        Args:
+            session: the world data's db session.
+            model_path: (string) the models' module.
+            model_name: (string) the table's model name.
+            data: (dict) data dumped by dump(). Load data from the database if it is None.
+        """
         self.model_name = model_name
         module = importlib.import_module(model_path)
         self.session = session
         self.model = getattr(module, model_name)
         self.columns = self.model.__table__.columns.keys()
+        self.record_class = record_class(self.columns, "%s_record" % model_name)
 
         self.records = []
         self.table_fields = {}
         self.index = {}     # index: {field's value: recode's index}
-        self.reload()
+
+        if data is None:
+            self.reload()
+        else:
+            self.restore(data)
 
     def clear(self):
         self.records = []
@@ -36,12 +48,11 @@ class MemoryTable(object):
             self.table_fields[field_name] = i
 
         # load records
-        stmt = select(self.model)
+        table_columns = self.model.__table__.columns
+        stmt = select(*[table_columns[field_name] for field_name in self.columns])
         result = self.session.execute(stmt)
-        records = result.scalars()
-        for r in records:
-            row_data = [getattr(r, field_name) for field_name in self.columns]
-            self.records.append(MemoryRecord(self.table_fields, row_data))
+        record_class = self.record_class
+        self.records = [record_class(row) for row in result]
 
         # set unique index
         for field_name in self.columns:
@@ -83,6 +94,30 @@ class MemoryTable(object):
             index_name = ".".join(index_fields)
             self.index[index_name] = all_values
 
+    def dump(self):
+        """
+        Get the table's records and indexes which can be pickled.
+        """
+        columns = self.columns
+        return {
+            "columns": list(columns),
+            "rows": [tuple(getattr(record, field_name) for field_name in columns) for record in self.records],
+            "index": self.index,
+        }
+
+    def restore(self, data):
+        """
+        Set the table's records and indexes from dumped data.
+        """
+        if data["columns"] != list(self.columns):
+            raise MudderyError("Columns of %s have changed." % self.model_name)
+
+        self.clear()
+        self.table_fields = {field_name: i for i, field_name in enumerate(self.columns)}
+        record_class = self.record_class
+        self.records = [record_class(row) for row in data["rows"]]
+        self.index = data["index"]
+
     def fields(self):
         """
         Get table fields.
@@ -2,21 +2,36 @@
 Key value storage in relational database with write back memory cache.
 """
 
+from asyncio import Lock
+from typing import Mapping
 from muddery.server.database.storage.base_kv_storage import BaseKeyValueStorage
 from muddery.server.database.storage.transaction import Transaction
+from muddery.server.database.storage.unit_of_work import record_cache_change
 
 
 class StorageWithCache(BaseKeyValueStorage):
     """
     The storage of object attributes.
+
+    Each category is guarded by one of lock_stripes locks, so operations of different categories do not wait
+    for each other. Reads of cached categories do not need locks, because memory caches do not suspend.
+    Whole table operations use self.lock.
     """
-    def __init__(self, storage: BaseKeyValueStorage, cache: BaseKeyValueStorage):
+    def __init__(self, storage: BaseKeyValueStorage, cache: BaseKeyValueStorage, lock_stripes: int = 64):
         super(StorageWithCache, self).__init__()
 
         self.storage = storage
         self.cache = cache
         self.all_cached = False
 
+        self.category_locks = [Lock() for i in range(lock_stripes)]
+
+    def get_lock(self, category: str) -> Lock:
+        """
+        Get the lock of a category.
+        """
+        return self.category_locks[hash(category) % len(self.category_locks)]
+
     async def add(self, category: str, key: str, value: any = None) -> None:
         """
         Add a new attribute. If the key already exists, raise an exception.
@@ -26,13 +41,13 @@ class StorageWithCache(BaseKeyValueStorage):
             key: (string) the key.
             value: (any) data.
         """
-        async with self.lock:
+        async with self.get_lock(category):
             await self.storage.add(category, key, value)
 
-            try:
+            # Uncached categories will be loaded from the storage when they are read.
+            if await self.cache.has_category(category):
                 await self.cache.add(category, key, value)
-            except KeyError:
-                await self.set_category_cache(category)
+                record_cache_change(self.cache, category)
 
     async def save(self, category: str, key: str, value: any = None) -> None:
         """
@@ -43,13 +58,29 @@ class StorageWithCache(BaseKeyValueStorage):
             key: (string) the key.
             value: (any) data.
         """
-        async with self.lock:
+        async with self.get_lock(category):
             await self.storage.save(category, key, value)
 
-            try:
+            # Uncached categories will be loaded from the storage when they are read.
+            if await self.cache.has_category(category):
                 await self.cache.save(category, key, value)
-            except KeyError:
-                await self.set_category_cache(category)
+                record_cache_change(self.cache, category)
+
+    async def save_many(self, category: str, values: dict) -> None:
+        """
+        Set values of a category's keys.
+
+        Args:
+            category: (string) the category of data.
+            values: (dict) keys and values.
+        """
+        async with self.get_lock(category):
+            await self.storage.save_many(category, values)
+
+            # Uncached categories will be loaded from the storage when they are read.
+            if await self.cache.has_category(category):
+                await self.cache.save_many(category, values)
+                record_cache_change(self.cache, category)
 
     async def has(self, category: str, key: str, check_category: bool = False) -> bool:
         """
@@ -60,12 +91,12 @@ class StorageWithCache(BaseKeyValueStorage):
             key: (string) attribute's key.
             check_category: if check_category is True and does not has the category, it will raise a KeyError.
         """
-        async with self.lock:
-            try:
-                return await self.cache.has(category, key, check_category=True)
-            except KeyError:
-                category_data = await self.set_category_cache(category)
-                return key in category_data
+        if await self.cache.has_category(category):
+            return await self.cache.has(category, key)
+
+        async with self.get_lock(category):
+            await self.ensure_category_cache(category)
+            return await self.cache.has(category, key)
 
     async def all(self) -> dict:
         """
@@ -91,18 +122,29 @@ class StorageWithCache(BaseKeyValueStorage):
             KeyError: If `raise_exception` is set and no matching Attribute
                 was found matching `key` and no default value set.
         """
-        async with self.lock:
-            try:
-                return await self.cache.load(category, key)
-            except KeyError:
-                category_data = await self.set_category_cache(category)
-                try:
-                    return category_data[key]
-                except KeyError as e:
-                    if len(default) > 0:
-                        return default[0]
-                    else:
-                        raise e
+        if await self.cache.has_category(category):
+            return await self.cache.load(category, key, *default)
+
+        async with self.get_lock(category):
+            await self.ensure_category_cache(category)
+            return await self.cache.load(category, key, *default)
+
+    async def load_many(self, category: str, keys: list, *default) -> dict:
+        """
+        Get values of a category's keys.
+
+        Args:
+            category: (string) the category of data.
+            keys: (list) data's keys.
+            default: (any or none) default value of missing keys. If the default value is not set,
+                missing keys will not be in the result.
+        """
+        if await self.cache.has_category(category):
+            return await self.cache.load_many(category, keys, *default)
+
+        async with self.get_lock(category):
+            await self.ensure_category_cache(category)
+            return await self.cache.load_many(category, keys, *default)
 
     async def load_category(self, category: str, *default) -> dict:
         """
@@ -110,23 +152,42 @@ class StorageWithCache(BaseKeyValueStorage):
 
         Args:
             category: (string) category's name.
+            default: (any or none) default value if the category does not exist.
 
         Raises:
             KeyError: If `raise_exception` is set and no matching Attribute
                 was found matching `category`.
         """
+        if await self.cache.has_category(category):
+            return await self.cache.load_category(category, *default)
+
+        async with self.get_lock(category):
+            await self.ensure_category_cache(category)
+            return await self.cache.load_category(category, *default)
+
+    async def load_category_view(self, category: str, *default) -> Mapping:
+        """
+        Get a read-only view of a category's data without copying it. Callers must not change the data.
+
+        Args:
+            category: (string) category's name.
+            default: (any or none) default value if the category does not exist.
+        """
+        if await self.cache.has_category(category):
+            return await self.cache.load_category_view(category, *default)
+
+        async with self.get_lock(category):
+            await self.ensure_category_cache(category)
+            return await self.cache.load_category_view(category, *default)
+
+    async def all_view(self) -> Mapping:
+        """
+        Get a read-only view of all data without copying it. Callers must not change the data.
+        """
         async with self.lock:
-            try:
-                return await self.cache.load_category(category)
-            except KeyError:
-                category_data = await self.set_category_cache(category)
-                if category_data is not None:
-                    return category_data
-                else:
-                    if len(default) > 0:
-                        return default[0]
-                    else:
-                        raise KeyError
+            if not self.all_cached:
+                await self.set_all_cache()
+            return await self.cache.load_all_view()
 
     async def delete(self, category: str, key: str) -> dict:
         """
@@ -139,10 +200,24 @@ class StorageWithCache(BaseKeyValueStorage):
         Return:
             (dict): deleted values
         """
-        async with self.lock:
+        async with self.get_lock(category):
             await self.storage.delete(category, key)
+            record_cache_change(self.cache, category)
             return await self.cache.delete(category, key)
 
+    async def delete_many(self, category: str, keys: list) -> None:
+        """
+        delete keys of a category.
+
+        Args:
+            category: (string) the category of data.
+            keys: (list) attributes' keys.
+        """
+        async with self.get_lock(category):
+            await self.storage.delete_many(category, keys)
+            record_cache_change(self.cache, category)
+            await self.cache.delete_many(category, keys)
+
     async def delete_category(self, category: str) -> dict:
         """
         Remove all values of a category.
@@ -153,8 +228,9 @@ class StorageWithCache(BaseKeyValueStorage):
         Return:
             (dict): deleted values
         """
-        async with self.lock:
+        async with self.get_lock(category):
             await self.storage.delete_category(category)
+            record_cache_change(self.cache, category)
             return await self.cache.delete_category(category)
 
     async def set_all_cache(self) -> dict:
@@ -167,6 +243,14 @@ class StorageWithCache(BaseKeyValueStorage):
         self.all_cached = True
         return all_data
 
+    async def ensure_category_cache(self, category: str) -> None:
+        """
+        Load the category to the cache if it is not in the cache. Must be called with the category's lock,
+        other tasks may have loaded the category while waiting for the lock.
+        """
+        if not await self.cache.has_category(category):
+            await self.set_category_cache(category)
+
     async def set_category_cache(self, category: str) -> dict:
         """
         Load a category's data from db if have not loaded this category.
@@ -193,3 +277,16 @@ class StorageWithCache(BaseKeyValueStorage):
         # Remove dirty caches.
         self.storage.transaction_failed(exc_type, exc_value, trace)
         self.cache.transaction_failed(exc_type, exc_value, trace)
+
+    async def async_transaction_enter(self):
+        await self.storage.async_transaction_enter()
+        await self.cache.async_transaction_enter()
+
+    async def async_transaction_success(self, exc_type, exc_value, trace) -> None:
+        await self.storage.async_transaction_success(exc_type, exc_value, trace)
+        await self.cache.async_transaction_success(exc_type, exc_value, trace)
+
+    async def async_transaction_failed(self, exc_type, exc_value, trace) -> None:
+        # Remove dirty caches.
+        await self.storage.async_transaction_failed(exc_type, exc_value, trace)
+        await self.cache.async_transaction_failed(exc_type, exc_value, trace)
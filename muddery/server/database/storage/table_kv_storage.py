@@ -4,8 +4,10 @@ Key value storage in relational database.
 
 import importlib
 from sqlalchemy.orm.exc import NoResultFound
-from sqlalchemy import select, update, delete
+from sqlalchemy import select, insert, update, delete, bindparam
 from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.dialects.mysql import insert as mysql_insert
 from muddery.server.database.storage.base_kv_storage import BaseKeyValueStorage
 
 
@@ -37,8 +39,6 @@ class TableKVStorage(BaseKeyValueStorage):
         self.model = getattr(module, model_name)
         self.columns = self.model.__table__.columns.keys()
 
-        self.trans = None
-
         exclude_fields = set()
         self.category_field = category_field
         if category_field:
@@ -52,6 +52,16 @@ class TableKVStorage(BaseKeyValueStorage):
         if default_value_field:
             exclude_fields.add(default_value_field)
 
+        # The unique constraint of records, used in upserts.
+        self.unique_fields = [field for field in (category_field, key_field) if field]
+
+        # Fields must be set when inserting records.
+        self.required_fields = set(
+            column.name for column in self.model.__table__.columns
+            if not column.nullable and not column.primary_key and column.default is None
+            and column.server_default is None and column.name not in self.unique_fields
+        )
+
     async def add(self, category, key, value=None):
         """
         Add a new attribute. If the key already exists, raise an exception.
@@ -74,13 +84,12 @@ class TableKVStorage(BaseKeyValueStorage):
         if self.key_field:
             data[self.key_field] = key
 
-        record = self.model(**data)
-        self.session.add(record)
-        self.session.flush()
+        stmt = insert(self.model).values(**data)
+        await self.execute(stmt)
 
     async def save(self, category, key, value=None):
         """
-        Set a value to the default value field.
+        Set a value to the default value field. Use the database's upsert statement if it is possible.
 
         Args:
             category: (string) the category of data.
@@ -90,10 +99,29 @@ class TableKVStorage(BaseKeyValueStorage):
         if value is None:
             data = {}
         elif self.default_value_field is None:
-            data = value
+            data = value.copy()
         else:
             data = {self.default_value_field: value}
 
+        stmt = self.get_upsert(data.keys())
+        if stmt is None:
+            await self.save_by_update(category, key, data)
+            return
+
+        if self.category_field:
+            data[self.category_field] = category
+        data[self.key_field] = key
+        await self.execute(stmt, data)
+
+    async def save_by_update(self, category, key, data):
+        """
+        Update the record, insert a new record if there is no matched records.
+
+        Args:
+            category: (string) the category of data.
+            key: (string) the key.
+            data: (dict) fields and values.
+        """
         stmt = update(self.model).values(**data)
 
         if self.category_field:
@@ -102,7 +130,7 @@ class TableKVStorage(BaseKeyValueStorage):
         if self.key_field:
             stmt = stmt.where(getattr(self.model, self.key_field) == key)
 
-        result = self.session.execute(stmt)
+        result = await self.execute(stmt)
         if result.rowcount == 0:
             # no matched rows
             if self.category_field:
@@ -111,9 +139,55 @@ class TableKVStorage(BaseKeyValueStorage):
             if self.key_field:
                 data[self.key_field] = key
 
-            record = self.model(**data)
-            self.session.add(record)
-            self.session.flush()
+            stmt = insert(self.model).values(**data)
+            await self.execute(stmt)
+
+    def get_upsert(self, fields):
+        """
+        Get an upsert statement which inserts a record or updates the record with the same category and key.
+        Only sqlite and mysql support upserts.
+
+        Args:
+            fields: (list) value fields to save.
+
+        Return:
+            The upsert statement. Returns None if can not use upserts, such as the dialect does not support upserts,
+            or some required fields are missing.
+        """
+        if not self.key_field:
+            return None
+
+        if not self.required_fields.issubset(fields):
+            # Inserts will fail without required fields.
+            return None
+
+        dialect = self.get_dialect_name()
+        table = self.model.__table__
+        update_fields = [field for field in fields if field not in self.unique_fields and field != "id"]
+
+        if dialect == "sqlite":
+            stmt = sqlite_insert(table)
+            if update_fields:
+                return stmt.on_conflict_do_update(
+                    index_elements=self.unique_fields,
+                    set_={field: stmt.excluded[field] for field in update_fields}
+                )
+            else:
+                return stmt.on_conflict_do_nothing(index_elements=self.unique_fields)
+        elif dialect == "mysql":
+            stmt = mysql_insert(table)
+            if update_fields:
+                return stmt.on_duplicate_key_update({field: stmt.inserted[field] for field in update_fields})
+            else:
+                return stmt.prefix_with("IGNORE")
+        else:
+            return None
+
+    def get_dialect_name(self):
+        """
+        Get the database's dialect name.
+        """
+        return self.session.get_bind().dialect.name
 
     async def has(self, category: str, key: str, check_category: bool = False) -> bool:
         """
@@ -132,7 +206,7 @@ class TableKVStorage(BaseKeyValueStorage):
         if self.key_field:
             stmt = stmt.where(getattr(self.model, self.key_field) == key)
 
-        result = self.session.execute(stmt)
+        result = await self.execute(stmt)
         count = result.scalars().one()
         if count > 0:
             return True
@@ -145,7 +219,7 @@ class TableKVStorage(BaseKeyValueStorage):
             return False
 
         stmt = select(func.count()).select_from(self.model).where(getattr(self.model, self.category_field) == category)
-        result = self.session.execute(stmt)
+        result = await self.execute(stmt)
         count = result.scalars().one()
         if count > 0:
             return False
@@ -176,7 +250,7 @@ class TableKVStorage(BaseKeyValueStorage):
         if self.key_field:
             stmt = stmt.where(getattr(self.model, self.key_field) == key)
 
-        result = self.session.execute(stmt)
+        result = await self.execute(stmt)
 
         try:
             record = result.scalars().one()
@@ -209,27 +283,190 @@ class TableKVStorage(BaseKeyValueStorage):
         if self.key_field:
             stmt = stmt.where(getattr(self.model, self.key_field) == key)
 
-        self.session.execute(stmt)
+        await self.execute(stmt)
 
-    async def set_all(self, all_data: dict) -> None:
+    async def save_many(self, category, values):
         """
-        Set all data to the storage.
+        Set values of a category's keys in one transaction. Values with the same fields are saved by one
+        executemany upsert. If can not use upserts, existing rows are updated by executemany and new rows
+        are inserted by executemany.
+
+        Args:
+            category: (string) the category of data.
+            values: (dict) keys and values.
+        """
+        if not self.key_field:
+            await super(TableKVStorage, self).save_many(category, values)
+            return
+
+        if not values:
+            return
+
+        # Group rows by their fields, rows in an executemany statement must have the same fields.
+        groups = {}
+        for key, value in values.items():
+            if value is None:
+                data = {}
+            elif self.default_value_field is None:
+                data = value.copy()
+            else:
+                data = {self.default_value_field: value}
+            groups.setdefault(tuple(sorted(data.keys())), {})[key] = data
+
+        stmts = []
+        to_update = {}
+        for fields, rows in groups.items():
+            stmt = self.get_upsert(fields)
+            if stmt is None:
+                to_update[fields] = rows
+                continue
+
+            params = []
+            for key, data in rows.items():
+                if self.category_field:
+                    data[self.category_field] = category
+                data[self.key_field] = key
+                params.append(data)
+            stmts.append((stmt, params))
+
+        if to_update:
+            stmts.extend(await self.get_update_many_statements(category, to_update))
+
+        if stmts:
+            await self.execute_all(stmts)
+
+    async def get_update_many_statements(self, category, groups):
+        """
+        Get executemany statements to update existing rows and insert new rows.
+
+        Args:
+            category: (string) the category of data.
+            groups: (dict) {fields: {key: data}}, rows grouped by their fields.
+
+        Return:
+            (list) a list of (statement, parameters).
         """
-        with self.session.begin():
-            # remove old data
-            stmt = delete(self.model)
-            self.session.execute(stmt)
+        table = self.model.__table__
+        key_column = table.columns[self.key_field]
 
-            for cate_name, cate_data in all_data.items():
-                for key_name, key_data in cate_data.items():
-                    data = key_data
+        # Get existing keys.
+        stmt = select(key_column).where(key_column.in_([key for rows in groups.values() for key in rows]))
+        if self.category_field:
+            stmt = stmt.where(table.columns[self.category_field] == category)
+        result = await self.execute(stmt)
+        existing_keys = set(result.scalars().all())
+
+        stmts = []
+        for fields, rows in groups.items():
+            updates = []
+            inserts = []
+            for key, data in rows.items():
+                if key in existing_keys:
+                    params = {"_" + field: field_value for field, field_value in data.items()}
+                    params["_category"] = category
+                    params["_key"] = key
+                    updates.append(params)
+                else:
                     if self.category_field:
-                        data[self.category_field] = cate_name
-                    if self.key_field:
-                        data[self.key_field] = key_name
+                        data[self.category_field] = category
+                    data[self.key_field] = key
+                    inserts.append(data)
+
+            if updates and fields:
+                stmt = update(table).values({field: bindparam("_" + field) for field in fields})
+                stmt = stmt.where(key_column == bindparam("_key"))
+                if self.category_field:
+                    stmt = stmt.where(table.columns[self.category_field] == bindparam("_category"))
+                stmts.append((stmt, updates))
+
+            if inserts:
+                stmts.append((insert(table), inserts))
+
+        return stmts
+
+    async def load_many(self, category, keys, *default):
+        """
+        Get values of a category's keys in one query.
 
-                    record = self.model(**data)
-                    self.session.add(record)
+        Args:
+            category: (string) the category of data.
+            keys: (list) data's keys.
+            default: (any or none) default value of missing keys. If the default value is not set,
+                missing keys will not be in the result.
+        """
+        if not self.key_field:
+            return await super(TableKVStorage, self).load_many(category, keys, *default)
+
+        if not keys:
+            return {}
+
+        stmt = select(self.model).where(getattr(self.model, self.key_field).in_(list(keys)))
+
+        if self.category_field:
+            stmt = stmt.where(getattr(self.model, self.category_field) == category)
+
+        result = await self.execute(stmt)
+        records = result.scalars().all()
+
+        if self.default_value_field is not None:
+            values = {
+                getattr(record, self.key_field): getattr(record, self.default_value_field) for record in records
+            }
+        else:
+            values = {
+                getattr(record, self.key_field): {
+                    k: getattr(record, k) for k in self.columns
+                } for record in records
+            }
+
+        if len(default) > 0:
+            for key in keys:
+                if key not in values:
+                    values[key] = default[0]
+
+        return values
+
+    async def delete_many(self, category, keys):
+        """
+        delete keys of a category in one statement.
+
+        Args:
+            category: (string) the category of data.
+            keys: (list) attributes' keys.
+        """
+        if not self.key_field:
+            await super(TableKVStorage, self).delete_many(category, keys)
+            return
+
+        if not keys:
+            return
+
+        stmt = delete(self.model).where(getattr(self.model, self.key_field).in_(list(keys)))
+
+        if self.category_field:
+            stmt = stmt.where(getattr(self.model, self.category_field) == category)
+
+        await self.execute(stmt)
+
+    async def set_all(self, all_data: dict) -> None:
+        """
+        Set all data to the storage.
+        """
+        records = []
+        for cate_name, cate_data in all_data.items():
+            for key_name, key_data in cate_data.items():
+                data = key_data
+                if self.category_field:
+                    data[self.category_field] = cate_name
+                if self.key_field:
+                    data[self.key_field] = key_name
+                records.append(data)
+
+        # remove old data and insert new data
+        stmts = [(delete(self.model), None)]
+        if records:
+            stmts.append((insert(self.model), records))
+        await self.execute_all(stmts)
 
     async def load_all(self) -> dict:
         """
@@ -237,7 +474,7 @@ class TableKVStorage(BaseKeyValueStorage):
         :return:
         """
         stmt = select(self.model)
-        result = self.session.execute(stmt)
+        result = await self.execute(stmt)
         records = result.scalars().all()
 
         all_data = {}
@@ -271,22 +508,24 @@ class TableKVStorage(BaseKeyValueStorage):
         """
         Set a category of data.
         """
-        with self.session.begin():
-            # remove old data
-            stmt = delete(self.model)
+        records = []
+        for key_name, key_data in data.items():
+            record = key_data
             if self.category_field:
-                stmt = stmt.where(getattr(self.model, self.category_field) == category)
-            self.session.execute(stmt)
+                record[self.category_field] = category
+            if self.key_field:
+                record[self.key_field] = key_name
+            records.append(record)
 
-            for key_name, key_data in data.items():
-                data = key_data
-                if self.category_field:
-                    data[self.category_field] = category
-                if self.key_field:
-                    data[self.key_field] = key_name
+        # remove old data and insert new data
+        stmt = delete(self.model)
+        if self.category_field:
+            stmt = stmt.where(getattr(self.model, self.category_field) == category)
 
-                record = self.model(**data)
-                self.session.add(record)
+        stmts = [(stmt, None)]
+        if records:
+            stmts.append((insert(self.model), records))
+        await self.execute_all(stmts)
 
     async def has_category(self, category: str) -> bool:
         """
@@ -297,7 +536,7 @@ class TableKVStorage(BaseKeyValueStorage):
         if self.category_field:
             stmt = stmt.where(getattr(self.model, self.category_field) == category)
 
-        result = self.session.execute(stmt)
+        result = await self.execute(stmt)
         record = result.scalars().one()
         return record > 0
 
@@ -313,7 +552,7 @@ class TableKVStorage(BaseKeyValueStorage):
         if self.category_field:
             stmt = stmt.where(getattr(self.model, self.category_field) == category)
 
-        result = self.session.execute(stmt)
+        result = await self.execute(stmt)
         records = result.scalars().all()
 
         if self.key_field:
@@ -354,16 +593,52 @@ class TableKVStorage(BaseKeyValueStorage):
         if self.category_field:
             stmt = stmt.where(getattr(self.model, self.category_field) == category)
 
-        self.session.execute(stmt)
+        await self.execute(stmt)
+
+    async def execute(self, stmt, params=None):
+        """
+        Execute a statement.
+
+        Args:
+            stmt: the statement to execute.
+            params: (dict or list) statement's parameters, a list of parameters will use executemany.
+        """
+        return self.session.execute(stmt, params)
+
+    async def execute_all(self, stmts):
+        """
+        Execute a list of statements in one transaction.
+
+        Args:
+            stmts: (list) a list of (statement, parameters).
+        """
+        # self.session is a scoped session, call it to get the current session.
+        if self.session().in_transaction():
+            for stmt, params in stmts:
+                self.session.execute(stmt, params)
+        else:
+            with self.session.begin():
+                for stmt, params in stmts:
+                    self.session.execute(stmt, params)
 
     def transaction_enter(self) -> None:
-        self.trans = self.session.begin()
-        self.trans.__enter__()
+        # Transactions are kept in the session, because sessions may be different in each unit of work.
+        # self.session is a scoped session, call it to get the current session.
+        if self.session().in_transaction():
+            # Join the current transaction.
+            trans = None
+        else:
+            trans = self.session.begin()
+            trans.__enter__()
+        self.session.info.setdefault("transactions", []).append(trans)
 
     def transaction_success(self, exc_type, exc_value, trace) -> None:
-        self.trans.__exit__(exc_type, exc_value, trace)
-        self.trans = None
+        trans = self.session.info["transactions"].pop()
+        if trans:
+            trans.__exit__(exc_type, exc_value, trace)
 
     def transaction_failed(self, exc_type, exc_value, trace) -> None:
-        self.trans.__exit__(exc_type, exc_value, trace)
-        self.trans = None
+        # A joined transaction is rolled back by its owner when the exception reaches it.
+        trans = self.session.info["transactions"].pop()
+        if trans:
+            trans.__exit__(exc_type, exc_value, trace)
@@ -5,6 +5,8 @@ import weakref
 class Transaction(object):
     """
     Guarantee the transaction execution of a given block.
+
+    Use "async with" if the storage runs database io with asyncio.
     """
     def __init__(self, storage):
         self.storage = weakref.proxy(storage)
@@ -17,3 +19,12 @@ class Transaction(object):
             self.storage.transaction_success(exc_type, exc_value, traceback)
         else:
             self.storage.transaction_failed(exc_type, exc_value, traceback)
+
+    async def __aenter__(self):
+        await self.storage.async_transaction_enter()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            await self.storage.async_transaction_success(exc_type, exc_value, traceback)
+        else:
+            await self.storage.async_transaction_failed(exc_type, exc_value, traceback)
@@ -0,0 +1,176 @@
+"""
+Group all database writes of a block, such as a player's command, into one transaction.
+"""
+
+import asyncio
+import contextvars
+from muddery.server.database.storage.async_table_kv_storage import enter_transaction, exit_transaction
+
+
+# The unit of work of the current task.
+_current_unit = contextvars.ContextVar("current_unit", default=None)
+
+# Units of work on a shared session must run one by one, or they would write into each other's transaction.
+# It is held for a whole unit of work, so on sqlite3 commands with units of work do not run concurrently.
+_shared_session_lock = asyncio.Lock()
+
+# Creates units of work for background jobs, returns None if background jobs do not use units of work.
+_background_unit_factory = None
+
+
+def current_unit():
+    """
+    Get the unit of work of the current task. Tasks which copied the context may still see finished units.
+    """
+    unit = _current_unit.get()
+    if unit and unit.finished:
+        return None
+    return unit
+
+
+def record_cache_change(cache, category) -> None:
+    """
+    Record a category changed in a cache by the current unit of work. It will be removed from the cache if
+    the unit of work fails.
+    """
+    unit = current_unit()
+    if unit:
+        unit.changed_caches.add((cache, category))
+
+
+def call_on_rollback(callback) -> None:
+    """
+    Call the callback if the current unit of work is rolled back. Does nothing out of units of work.
+    """
+    unit = current_unit()
+    if unit:
+        unit.rollback_callbacks.append(callback)
+
+
+def detached_context() -> contextvars.Context:
+    """
+    A context without the current unit of work and transactions. Use it to schedule background jobs.
+    """
+    return contextvars.Context()
+
+
+def set_background_unit_factory(factory) -> None:
+    """
+    Set the function which creates units of work for background jobs.
+    """
+    global _background_unit_factory
+    _background_unit_factory = factory
+
+
+async def run_in_background_unit(coroutine_func, *args) -> any:
+    """
+    Run a background job in its own unit of work, so its writes are not committed or rolled back with
+    other units' writes. On a shared session, it waits until the running unit of work finishes.
+    """
+    unit = _background_unit_factory() if _background_unit_factory else None
+    if unit is None:
+        return await coroutine_func(*args)
+
+    async with unit:
+        return await coroutine_func(*args)
+
+
+def spawn_background(coroutine_func, *args) -> asyncio.Task:
+    """
+    Run a background job in a new task. The task does not belong to the current unit of work or transactions,
+    it runs in its own unit of work.
+    """
+    return detached_context().run(asyncio.create_task, run_in_background_unit(coroutine_func, *args))
+
+
+class UnitOfWork(object):
+    """
+    Commit all database writes in the block in one transaction. If the block raises an exception, the
+    transaction is rolled back, and categories changed in memory caches are removed from caches, so they
+    will be loaded from the database again. Nested units of work join the outer one.
+
+    Usage:
+        async with UnitOfWork(GameDataDB.inst(), async_io):
+            ...
+    """
+    def __init__(self, db_manager, async_io: bool = False):
+        """
+        Args:
+            db_manager: the database's manager.
+            async_io: if storages run database io with asyncio.
+        """
+        self.db_manager = db_manager
+        self.async_io = async_io
+
+        self.joined = False
+        self.token = None
+        self.session_scope = None
+        self.transaction = None
+        self.locked = False
+        self.finished = False
+
+        # {(cache, category)}
+        self.changed_caches = set()
+
+        # functions to call after a rollback
+        self.rollback_callbacks = []
+
+    async def __aenter__(self):
+        if current_unit():
+            self.joined = True
+            return self
+
+        if self.async_io:
+            await enter_transaction(self.db_manager.get_async_session_maker())
+        else:
+            if self.db_manager.shares_session():
+                await _shared_session_lock.acquire()
+                self.locked = True
+
+            try:
+                self.session_scope = self.db_manager.unit_of_work()
+                # The scoped session returns the current session when it is called.
+                session = self.session_scope.__enter__()()
+                if not session.in_transaction():
+                    self.transaction = session.begin()
+            except Exception:
+                self.release()
+                raise
+
+        self.token = _current_unit.set(self)
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        if self.joined:
+            return
+
+        _current_unit.reset(self.token)
+        self.finished = True
+
+        try:
+            if self.async_io:
+                await exit_transaction(exc_type is None)
+            elif self.transaction:
+                if exc_type is None:
+                    self.transaction.commit()
+                else:
+                    self.transaction.rollback()
+        finally:
+            self.release()
+
+            if exc_type is not None:
+                # Changed data may be different from the database.
+                for cache, category in self.changed_caches:
+                    await cache.delete_category(category)
+
+                for callback in self.rollback_callbacks:
+                    callback()
+
+    def release(self):
+        if self.session_scope:
+            self.session_scope.__exit__(None, None, None)
+            self.session_scope = None
+
+        if self.locked:
+            _shared_session_lock.release()
+            self.locked = False
@@ -0,0 +1,295 @@
+"""
+Key value storage in relational database with write behind memory cache.
+
+All changes are written to the cache first and dirty keys are written to the database in batches later.
+"""
+
+import time
+import asyncio
+import weakref
+from muddery.server.database.storage.base_kv_storage import BaseKeyValueStorage
+from muddery.server.database.storage.storage_with_cache import StorageWithCache
+from muddery.server.database.storage.unit_of_work import detached_context, run_in_background_unit, call_on_rollback
+from muddery.server.database.storage.unit_of_work import record_cache_change
+from muddery.server.utils.logger import logger
+
+
+class WriteBehindStorageWithCache(StorageWithCache):
+    """
+    The storage of object attributes. Changed keys are flushed to the database in one transaction every
+    flush_interval seconds, so the data lost on a crash is bounded by the flush interval.
+    """
+    # all write behind storages
+    instances = weakref.WeakSet()
+
+    def __init__(self, storage: BaseKeyValueStorage, cache: BaseKeyValueStorage, flush_interval: float = 1.0):
+        super(WriteBehindStorageWithCache, self).__init__(storage, cache)
+
+        self.flush_interval = flush_interval
+        self.flush_handle = None
+        self.flush_lock = asyncio.Lock()
+
+        # dirty keys: {(category, key)}
+        self.dirty = set()
+
+        # metrics
+        self.flush_count = 0
+        self.flush_errors = 0
+        self.flushed_keys = 0
+        self.last_flush_time = 0
+        self.max_flush_time = 0
+        self.total_flush_time = 0
+
+        self.instances.add(self)
+
+        # Caches with eviction must keep categories which have unsaved changes.
+        if hasattr(cache, "add_eviction_guard"):
+            cache.add_eviction_guard(self.is_dirty_category)
+
+    async def add(self, category: str, key: str, value: any = None) -> None:
+        """
+        Add a new attribute. If the key already exists, raise an exception.
+
+        Args:
+            category: (string) the category of data.
+            key: (string) the key.
+            value: (any) data.
+        """
+        async with self.get_lock(category):
+            await self.ensure_category_cache(category)
+            await self.cache.add(category, key, value)
+            record_cache_change(self.cache, category)
+            self.mark_dirty(category, key)
+
+    async def save(self, category: str, key: str, value: any = None) -> None:
+        """
+        Set a value to the default value field.
+
+        Args:
+            category: (string) the category of data.
+            key: (string) the key.
+            value: (any) data.
+        """
+        async with self.get_lock(category):
+            # Values may be merged with old values, so the category must be in the cache.
+            await self.ensure_category_cache(category)
+            await self.cache.save(category, key, value)
+            record_cache_change(self.cache, category)
+            self.mark_dirty(category, key)
+
+    async def save_many(self, category: str, values: dict) -> None:
+        """
+        Set values of a category's keys.
+
+        Args:
+            category: (string) the category of data.
+            values: (dict) keys and values.
+        """
+        async with self.get_lock(category):
+            await self.ensure_category_cache(category)
+            await self.cache.save_many(category, values)
+            record_cache_change(self.cache, category)
+            for key in values:
+                self.mark_dirty(category, key)
+
+    async def delete(self, category: str, key: str) -> None:
+        """
+        delete a key.
+
+        Args:
+            category: (string) the category of data.
+            key: (string) attribute's key.
+        """
+        async with self.get_lock(category):
+            await self.ensure_category_cache(category)
+            await self.cache.delete(category, key)
+            record_cache_change(self.cache, category)
+            self.mark_dirty(category, key)
+
+    async def delete_many(self, category: str, keys: list) -> None:
+        """
+        delete keys of a category.
+
+        Args:
+            category: (string) the category of data.
+            keys: (list) attributes' keys.
+        """
+        async with self.get_lock(category):
+            await self.ensure_category_cache(category)
+            await self.cache.delete_many(category, keys)
+            record_cache_change(self.cache, category)
+            for key in keys:
+                self.mark_dirty(category, key)
+
+    async def delete_category(self, category: str) -> None:
+        """
+        Remove all values of a category. It writes to the database directly.
+
+        Args:
+            category: (string) the category of data.
+        """
+        async with self.get_lock(category):
+            # Wait for the flush in progress, or it may write deleted values again.
+            async with self.flush_lock:
+                self.dirty = set(item for item in self.dirty if item[0] != category)
+                await self.storage.delete_category(category)
+            record_cache_change(self.cache, category)
+            await self.cache.delete_category(category)
+
+    def is_dirty_category(self, category: str) -> bool:
+        """
+        Check if a category has unsaved changes.
+        """
+        return any(item[0] == category for item in self.dirty)
+
+    def mark_dirty(self, category: str, key: str) -> None:
+        """
+        Mark a key as changed and schedule a flush.
+        """
+        self.dirty.add((category, key))
+
+        if self.flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self.flush_handle = loop.call_later(self.flush_interval, self.start_flush, context=detached_context())
+
+    def start_flush(self) -> None:
+        """
+        Called by the flush timer.
+        """
+        self.flush_handle = None
+        asyncio.create_task(self.flush_in_background())
+
+    async def flush_in_background(self) -> None:
+        try:
+            await run_in_background_unit(self.flush)
+        except Exception as e:
+            logger.log_err("Can not flush %s: %s" % (getattr(self.storage, "model_name", ""), e))
+
+        if self.dirty and self.flush_handle is None:
+            # Try again later.
+            loop = asyncio.get_running_loop()
+            self.flush_handle = loop.call_later(self.flush_interval, self.start_flush, context=detached_context())
+
+    async def flush(self, category: str = None) -> None:
+        """
+        Write dirty keys to the database in one transaction.
+
+        Args:
+            category: (string) only flush this category's keys, flush all keys if it is None.
+        """
+        async with self.flush_lock:
+            # {category: {key: value}}
+            to_save = {}
+            # {category: [key]}
+            to_delete = {}
+
+            # Memory caches do not suspend, so the snapshot of dirty values is consistent without locks.
+            if category is None:
+                keys = self.dirty
+                self.dirty = set()
+            else:
+                keys = set(item for item in self.dirty if item[0] == category)
+                self.dirty -= keys
+
+            for item in keys:
+                cate, key = item
+                if not await self.cache.has_category(cate):
+                    # The category has been removed from the cache by a failed transaction.
+                    continue
+
+                try:
+                    value = await self.cache.load(cate, key)
+                except KeyError:
+                    to_delete.setdefault(cate, []).append(key)
+                    continue
+
+                if type(value) == dict:
+                    value = value.copy()
+                to_save.setdefault(cate, {})[key] = value
+
+            if not to_save and not to_delete:
+                return
+
+            begin = time.time()
+            try:
+                async with self.storage.transaction():
+                    for cate, values in to_save.items():
+                        await self.storage.save_many(cate, values)
+                    for cate, keys in to_delete.items():
+                        await self.storage.delete_many(cate, keys)
+            except Exception:
+                # Keep them dirty, unless they have been removed from the cache.
+                self.flush_errors += 1
+                self.dirty.update((cate, key) for cate, values in to_save.items() for key in values)
+                self.dirty.update((cate, key) for cate, keys in to_delete.items() for key in keys)
+                raise
+
+            # Writes join the current unit of work. If it is rolled back, write these keys again later.
+            written = [(cate, key) for cate, values in to_save.items() for key in values] + \
+                [(cate, key) for cate, keys in to_delete.items() for key in keys]
+            call_on_rollback(lambda: self.restore_dirty(written))
+
+            flush_time = time.time() - begin
+            self.flush_count += 1
+            self.flushed_keys += sum(len(values) for values in to_save.values()) + \
+                sum(len(keys) for keys in to_delete.values())
+            self.last_flush_time = flush_time
+            self.total_flush_time += flush_time
+            if flush_time > self.max_flush_time:
+                self.max_flush_time = flush_time
+
+    def restore_dirty(self, keys: list) -> None:
+        """
+        Mark flushed keys as changed again after their writes have been rolled back.
+        """
+        for category, key in keys:
+            self.mark_dirty(category, key)
+
+    def metrics(self) -> dict:
+        """
+        Get the write queue's metrics. Times are in seconds.
+        """
+        return {
+            "table": getattr(self.storage, "model_name", ""),
+            "queue_depth": len(self.dirty),
+            "flush_count": self.flush_count,
+            "flush_errors": self.flush_errors,
+            "flushed_keys": self.flushed_keys,
+            "last_flush_time": self.last_flush_time,
+            "max_flush_time": self.max_flush_time,
+            "avg_flush_time": self.total_flush_time / self.flush_count if self.flush_count else 0,
+        }
+
+    @classmethod
+    async def flush_all(cls, category: str = None) -> None:
+        """
+        Flush all write behind storages.
+
+        Args:
+            category: (string) only flush this category's keys, flush all keys if it is None.
+        """
+        for storage in list(cls.instances):
+            try:
+                await storage.flush(category)
+            except Exception as e:
+                logger.log_err("Can not flush %s: %s" % (getattr(storage.storage, "model_name", ""), e))
+
+    @classmethod
+    def all_metrics(cls) -> list:
+        """
+        Get all write behind storages' metrics.
+        """
+        return [storage.metrics() for storage in cls.instances]
+
+    async def async_transaction_enter(self):
+        # Make the database consistent with the cache, then failed transactions can reload data from the database.
+        # If the flush joins an outer unit of work which is rolled back, flushed keys are marked dirty again.
+        await self.flush()
+        await self.cache.async_transaction_enter()
+
+    async def async_transaction_success(self, exc_type, exc_value, trace) -> None:
+        await self.cache.async_transaction_success(exc_type, exc_value, trace)
+
+    async def async_transaction_failed(self, exc_type, exc_value, trace) -> None:
+        # Remove dirty caches, their dirty keys will be dropped in the next flush.
+        await self.cache.async_transaction_failed(exc_type, exc_value, trace)
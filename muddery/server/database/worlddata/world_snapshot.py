@@ -0,0 +1,132 @@
+"""
+Binary snapshots of world data.
+
+A snapshot keeps all world data tables' records and indexes in a pickle file, so the game server can load
+them without querying the database and building indexes. The snapshot stores the world data's checksum,
+if the world data has changed, the snapshot is stale and tables are loaded from the database.
+"""
+
+import os
+import time
+import pickle
+import hashlib
+import inspect
+import importlib
+from sqlalchemy import select
+from muddery.server.settings import SETTINGS
+from muddery.server.utils.logger import logger
+from muddery.server.database.worlddata_db import WorldDataDB
+from muddery.server.database.storage.memory_table import MemoryTable
+
+
+SNAPSHOT_FORMAT = "muddery-worlddata"
+
+# Increase it when the snapshot's structure changes.
+SNAPSHOT_VERSION = 1
+
+
+def get_table_names():
+    """
+    Get all world data tables' names.
+    """
+    module = importlib.import_module(SETTINGS.WORLDDATA_DB["MODELS"])
+    return [cls.__name__ for cls in vars(module).values() if inspect.isclass(cls) and hasattr(cls, "__table__")]
+
+
+def worlddata_checksum():
+    """
+    Get the checksum of the world data. Use the file's digest of sqlite3 databases, other databases' digests
+    are calculated from all records.
+    """
+    digest = hashlib.sha1()
+    config = SETTINGS.WORLDDATA_DB
+
+    if config["ENGINE"] == "sqlite3":
+        # Changes may not be written back from the write-ahead log yet.
+        for filename in (config["NAME"], config["NAME"] + "-wal"):
+            if not os.path.exists(filename):
+                continue
+            with open(filename, "rb") as fp:
+                for chunk in iter(lambda: fp.read(1024 * 1024), b""):
+                    digest.update(chunk)
+    else:
+        session = WorldDataDB.inst().get_session()
+        for table_name in sorted(get_table_names()):
+            model = WorldDataDB.inst().get_model(table_name)
+            columns = model.__table__.columns
+            digest.update(table_name.encode("utf-8"))
+            for row in session.execute(select(*columns).order_by(*model.__table__.primary_key.columns)):
+                digest.update(repr(tuple(row)).encode("utf-8"))
+
+    return digest.hexdigest()
+
+
+def save_snapshot(filename):
+    """
+    Write all world data tables to a snapshot file.
+
+    Args:
+        filename: (string) the snapshot's file name.
+
+    Returns:
+        (int) the number of tables.
+    """
+    session = WorldDataDB.inst().get_session()
+    models = SETTINGS.WORLDDATA_DB["MODELS"]
+    tables = {
+        table_name: MemoryTable(session, models, table_name).dump() for table_name in get_table_names()
+    }
+
+    header = {
+        "format": SNAPSHOT_FORMAT,
+        "version": SNAPSHOT_VERSION,
+        "models": models,
+        "checksum": worlddata_checksum(),
+        "created": time.time(),
+    }
+
+    temp_name = filename + ".tmp"
+    with open(temp_name, "wb") as fp:
+        pickle.dump(header, fp, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(tables, fp, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_name, filename)
+
+    return len(tables)
+
+
+def load_snapshot(filename):
+    """
+    Load world data tables from a snapshot file.
+
+    Args:
+        filename: (string) the snapshot's file name.
+
+    Returns:
+        (dict) {table's name: MemoryTable}, or None if the snapshot can not be used.
+    """
+    if not os.path.exists(filename):
+        return None
+
+    models = SETTINGS.WORLDDATA_DB["MODELS"]
+    try:
+        with open(filename, "rb") as fp:
+            header = pickle.load(fp)
+            if (header.get("format") != SNAPSHOT_FORMAT or header.get("version") != SNAPSHOT_VERSION or
+                    header.get("models") != models):
+                logger.log_info("World data snapshot %s is not compatible." % filename)
+                return None
+
+            if header.get("checksum") != worlddata_checksum():
+                logger.log_info("World data snapshot %s is stale." % filename)
+                return None
+
+            data = pickle.load(fp)
+
+        session = WorldDataDB.inst().get_session()
+        return {
+            table_name: MemoryTable(session, models, table_name, table_data)
+            for table_name, table_data in data.items()
+        }
+    except Exception as e:
+        logger.log_err("Can not load world data snapshot %s: %s" % (filename, e))
+        return None
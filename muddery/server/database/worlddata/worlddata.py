@@ -6,7 +6,7 @@ import inspect
 import traceback
 from muddery.common.utils.exception import MudderyError
 from muddery.server.settings import SETTINGS
-from muddery.server.database.storage.memory_record import MemoryRecord
+from muddery.server.database.storage.memory_record import record_class
 from muddery.server.database.storage.memory_table import MemoryTable
 from muddery.server.database.worlddata_db import WorldDataDB
 
@@ -17,12 +17,47 @@ class WorldData(object):
     """
     tables = {}
 
+    # Joined records of tables: {(tables, key): record}
+    views = {}
+
+    # Elements' const data loaded from world data, shared by elements of the same key and level:
+    # {(element type, element key, level): {field: value}}
+    prototypes = {}
+
+    # Functions to call when tables are reloaded, they receive the table's name, or None for all tables.
+    refresh_listeners = []
+
+    @classmethod
+    def add_refresh_listener(cls, callback):
+        """
+        Call the callback when tables are reloaded, so data built from them can be cleared.
+        """
+        cls.refresh_listeners.append(callback)
+
     @classmethod
     def clear_all(cls):
         """
         Clear data.
         """
         cls.tables = {}
+        cls.views = {}
+        cls.prototypes = {}
+
+        for callback in cls.refresh_listeners:
+            callback(None)
+
+    @classmethod
+    def clear_views(cls, table_name):
+        """
+        Remove joined records which contain the table's data.
+        """
+        cls.views = {view_key: record for view_key, record in cls.views.items() if table_name not in view_key[0]}
+
+        # Prototypes' data comes from many tables.
+        cls.prototypes = {}
+
+        for callback in cls.refresh_listeners:
+            callback(table_name)
 
     @classmethod
     def reload_all(cls):
@@ -40,6 +75,24 @@ class WorldData(object):
                 config["MODELS"],
                 model.__name__)
 
+    @classmethod
+    def load_snapshot(cls, filename):
+        """
+        Load all tables from a world data snapshot.
+
+        Returns:
+            (boolean) tables are loaded. If the snapshot is missing or stale, tables will be loaded from the
+                database.
+        """
+        from muddery.server.database.worlddata.world_snapshot import load_snapshot
+        tables = load_snapshot(filename)
+        if tables is None:
+            return False
+
+        cls.clear_all()
+        cls.tables = tables
+        return True
+
     @classmethod
     def refresh(cls, table_name):
         """
@@ -47,12 +100,15 @@ class WorldData(object):
         """
         if table_name in cls.tables:
             del cls.tables[table_name]
+        cls.clear_views(table_name)
 
     @classmethod
     def load_table(cls, table_name):
         """
         Load a table to the local storage.
         """
+        loaded = table_name in cls.tables
+
         try:
             config = SETTINGS.WORLDDATA_DB
             cls.tables[table_name] = MemoryTable(
@@ -62,6 +118,10 @@ class WorldData(object):
         except Exception as e:
             raise MudderyError("Can not load table %s: %s" % (table_name, e))
 
+        # Only data built from the old table is stale, the first load does not change anything.
+        if loaded:
+            cls.clear_views(table_name)
+
     @classmethod
     def get_fields(cls, table_name):
         if table_name not in cls.tables:
@@ -101,7 +161,7 @@ class WorldData(object):
     def get_tables_data(cls, tables, key):
         """
         Get a record from tables whose key field is the value.
-        Only can get one record.
+        Only can get one record. Joined records are cached until their tables are reloaded.
 
         Args:
             tables: (list) tables' name
@@ -110,6 +170,56 @@ class WorldData(object):
         Return:
             (list) records
         """
+        view_key = (tuple(tables), key)
+        try:
+            return [cls.views[view_key]]
+        except KeyError:
+            pass
+
+        record = cls.join_tables_data(tables, key)
+        cls.views[view_key] = record
+        return [record]
+
+    @classmethod
+    def get_prototype(cls, element_type, element_key, level):
+        """
+        Get an element's shared const data.
+
+        Args:
+            element_type: (string) element's type.
+            element_key: (string) element's key.
+            level: (number) element's level.
+
+        Returns:
+            (dict) the const data, or None if it has not been loaded.
+        """
+        return cls.prototypes.get((element_type, element_key, level))
+
+    @classmethod
+    def add_prototype(cls, element_type, element_key, level, data):
+        """
+        Add an element's const data to share it. Elements must not change it.
+
+        Args:
+            element_type: (string) element's type.
+            element_key: (string) element's key.
+            level: (number) element's level.
+            data: (dict) the const data.
+
+        Returns:
+            (dict) the shared const data. It is the existing one if other elements have added it.
+        """
+        return cls.prototypes.setdefault((element_type, element_key, level), data)
+
+    @classmethod
+    def join_tables_data(cls, tables, key):
+        """
+        Join records of tables whose key field is the value.
+
+        Args:
+            tables: (list) tables' name
+            key: (string) object's key
+        """
         all_fields = {}
         row_data = []
         for table_name in tables:
@@ -130,4 +240,25 @@ class WorldData(object):
                 all_fields.update(field_pos)
                 row_data.extend([getattr(record, field_name) for field_name in fields])
 
-        return [MemoryRecord(all_fields, row_data)]
+        return record_class(all_fields.keys())([row_data[pos] for pos in all_fields.values()])
+
+    @classmethod
+    def build_views(cls, tables):
+        """
+        Build joined records of all elements in the last table.
+
+        Args:
+            tables: (list) tables' name
+        """
+        if not tables:
+            return
+
+        table_name = tables[-1]
+        if table_name not in cls.tables:
+            cls.load_table(table_name)
+
+        if "key" not in cls.tables[table_name].fields():
+            return
+
+        for record in cls.tables[table_name].all():
+            cls.get_tables_data(tables, record.key)
@@ -5,6 +5,9 @@ Areas are compose the whole map. Rooms are belongs to areas.
 
 """
 
+import time
+import asyncio
+from muddery.server.settings import SETTINGS
 from muddery.common.utils.utils import async_wait
 from muddery.server.utils.logger import logger
 from muddery.server.mappings.element_set import ELEMENT
@@ -31,6 +34,13 @@ class MudderyArea(ELEMENT("MATTER")):
         self.all_rooms = {}
         self.map_data = {}
 
+        # In the lazy mode, NPCs are loaded when the area is activated.
+        self.active = not SETTINGS.LAZY_AREAS
+        self.activate_lock = None
+
+        # The last time that players were in the area.
+        self.last_player_time = 0
+
     async def at_element_setup(self, first_time):
         """
         Init the character.
@@ -115,6 +125,58 @@ class MudderyArea(ELEMENT("MATTER")):
         if self.all_rooms:
             await async_wait([obj.setup_element(key) for key, obj in self.all_rooms.items()])
 
+    async def activate(self):
+        """
+        Load NPCs and start timers of all rooms in the lazy mode.
+        """
+        if self.active:
+            return
+
+        async with self.get_activate_lock():
+            if self.active:
+                return
+
+            if self.all_rooms:
+                await async_wait([room.activate() for room in self.all_rooms.values()])
+            self.active = True
+            self.last_player_time = time.time()
+
+    async def deactivate(self):
+        """
+        Remove NPCs and stop timers of all rooms in the lazy mode.
+        """
+        if not self.active:
+            return
+
+        # Players arriving during the unloading wait for it, then load NPCs again.
+        async with self.get_activate_lock():
+            if not self.active or self.has_players() or self.in_combat():
+                return
+
+            self.active = False
+            if self.all_rooms:
+                await async_wait([room.deactivate() for room in self.all_rooms.values()])
+
+    def get_activate_lock(self):
+        """
+        The lock of loading and unloading NPCs.
+        """
+        if not self.activate_lock:
+            self.activate_lock = asyncio.Lock()
+        return self.activate_lock
+
+    def has_players(self):
+        """
+        If there are players in the area.
+        """
+        return any(room.has_players() for room in self.all_rooms.values())
+
+    def in_combat(self):
+        """
+        If any NPC in the area is in a combat.
+        """
+        return any(room.in_combat() for room in self.all_rooms.values())
+
     def get_rooms_key(self):
         """
         Get keys of all rooms in this area.
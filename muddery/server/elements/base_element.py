@@ -3,12 +3,14 @@ MudderyObject is an object which can load it's data automatically.
 """
 
 import ast
+from muddery.server.settings import SETTINGS
 from muddery.server.utils.logger import logger
 from muddery.server.utils.data_field_handler import DataFieldHandler, ConstDataHolder
 from muddery.server.database.worlddata.properties_dict import PropertiesDict
 from muddery.server.mappings.element_set import ELEMENT
 from muddery.server.database.worlddata.worlddata import WorldData
 from muddery.server.database.worlddata.element_properties import ElementProperties
+from muddery.server.statements.statement_memo import invalidate_statement_memo
 
 
 class BaseElement(object):
@@ -21,6 +23,10 @@ class BaseElement(object):
     # object's data model
     model_name = ""
 
+    # Share const data with other elements of the same key and level. Set it to False if the element's data
+    # does not only come from the world data.
+    share_const_data = True
+
     def __init__(self, *agrs, **wargs):
         super(BaseElement, self).__init__(*agrs, **wargs)
 
@@ -175,6 +181,16 @@ class BaseElement(object):
 
         :return:
         """
+        share_data = self.share_const_data and SETTINGS.SHARE_ELEMENT_DATA
+        if share_data:
+            prototype = WorldData.get_prototype(self.element_type, element_key, level)
+            if prototype is not None:
+                self.const_data_handler.set_base(prototype)
+                return
+
+            # The shared data should only contain the world data.
+            self.const_data_handler.clear()
+
         # Load data.
         try:
             # Load db data.
@@ -192,6 +208,10 @@ class BaseElement(object):
 
         await self.load_custom_level_data(self.element_type, element_key, level)
 
+        if share_data:
+            prototype = WorldData.add_prototype(self.element_type, element_key, level, self.const_data_handler.all())
+            self.const_data_handler.set_base(prototype)
+
     def load_base_data(self, model, key):
         """
         Get object's data from database.
@@ -294,7 +314,8 @@ class BaseElement(object):
                     value = serializable_value
             values[key] = value
 
-        # Set values.
+        # Set values. Conditions may have read the old values.
+        invalidate_statement_memo()
         for key, info in self.get_properties_info().items():
             if key in values:
                 # direct value
@@ -9,12 +9,10 @@ creation commands.
 """
 
 import time, traceback, ast
-from datetime import datetime
-import pytz
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from muddery.common.utils.exception import MudderyError, ERR
 from muddery.server.settings import SETTINGS
 from muddery.server.utils.logger import logger
+from muddery.server.statements.statement_memo import invalidate_statement_memo
 from muddery.server.combat.combat_handler import COMBAT_HANDLER
 from muddery.server.mappings.element_set import ELEMENT
 from muddery.server.database.worlddata.loot_list import CharacterLootList
@@ -45,9 +43,6 @@ class MudderyCharacter(ELEMENT("MATTER")):
 
     last_id = 0
 
-    skill_scheduler_id = "skill"
-    reborn_scheduler_id = "reborn"
-
     @staticmethod
     def generate_id():
         """
@@ -69,7 +64,10 @@ class MudderyCharacter(ELEMENT("MATTER")):
 
         self.loot_handler = None
         self.location = None
-        self.scheduler = None
+
+        # timers of the server's timer wheel
+        self.skill_timer = None
+        self.reborn_timer = None
 
         self.is_alive = True
         self.default_relationship = 0
@@ -111,13 +109,6 @@ class MudderyCharacter(ELEMENT("MATTER")):
         """
         return self.id
 
-    def get_scheduler(self):
-        # get the apscheduler
-        if not self.scheduler:
-            self.scheduler = AsyncIOScheduler(timezone=pytz.utc)
-            self.scheduler.start()
-        return self.scheduler
-
     async def at_element_setup(self, first_time):
         """
         Called when the object is loaded and initialized.
@@ -453,8 +444,7 @@ class MudderyCharacter(ELEMENT("MATTER")):
         """
         If the character is casting skills automatically.
         """
-        scheduler = self.get_scheduler()
-        return scheduler.get_job(self.skill_scheduler_id) is not None
+        return self.skill_timer is not None and self.skill_timer.active()
                 
     def start_auto_combat_skill(self):
         """
@@ -464,23 +454,23 @@ class MudderyCharacter(ELEMENT("MATTER")):
         # self.auto_cast_skill()
 
         # Set timer of auto cast.
-        scheduler = self.get_scheduler()
-        if scheduler.get_job(self.skill_scheduler_id):
+        if self.is_auto_cast_skill():
             # auto cast job already exists
             return
 
-        scheduler.add_job(self.auto_cast_skill, "interval", seconds=self.auto_cast_skill_cd, id=self.skill_scheduler_id)
+        self.skill_timer = Server.timers.schedule(self.auto_cast_skill_cd, self.auto_cast_skill,
+                                                  interval=self.auto_cast_skill_cd)
 
     def stop_auto_combat_skill(self):
         """
         Stop auto cast skill.
         """
-        scheduler = self.get_scheduler()
-        if not scheduler.get_job(self.skill_scheduler_id):
+        if not self.skill_timer:
             # auto cast job already removed
             return
 
-        scheduler.remove_job(self.skill_scheduler_id)
+        self.skill_timer.cancel()
+        self.skill_timer = None
 
 
     ########################################
@@ -658,9 +648,9 @@ class MudderyCharacter(ELEMENT("MATTER")):
 
         if not self.is_temp and self.reborn_time > 0:
             # Set reborn timer.
-            reborn_time = datetime.utcfromtimestamp(time.time() + self.reborn_time)
-            scheduler = self.get_scheduler()
-            scheduler.add_job(self.reborn, "date", run_date=reborn_time, id=self.reborn_scheduler_id)
+            if self.reborn_timer:
+                self.reborn_timer.cancel()
+            self.reborn_timer = Server.timers.schedule(self.reborn_time, self.reborn)
 
     async def reborn(self):
         """
@@ -820,6 +810,7 @@ class MudderyCharacter(ELEMENT("MATTER")):
             current_value = self.const_data_handler.get(key)
             new_value = await self.validate_property(key, current_value + increment)
             change = new_value - current_value
+            invalidate_statement_memo()
             self.const_data_handler.add(key, new_value)
 
         return change
@@ -844,6 +835,7 @@ class MudderyCharacter(ELEMENT("MATTER")):
         # Get validated values
         if new_values:
             validated_values = await async_gather([self.validate_property(key, value) for key, value in new_values.items()])
+            invalidate_statement_memo()
             for index, key in enumerate(new_values):
                 new_value = validated_values[index]
                 changes[key] = new_value
@@ -10,6 +10,8 @@ creation commands.
 
 import weakref
 from muddery.server.utils.logger import logger
+from muddery.server.statements.statement_memo import invalidate_statement_memo
+from muddery.server.settings import SETTINGS
 from muddery.server.server import Server
 from muddery.server.utils.quest_handler import QuestHandler
 from muddery.server.utils.statement_attribute_handler import StatementAttributeHandler
@@ -33,6 +35,8 @@ from muddery.common.utils import defines
 from muddery.server.utils.data_field_handler import DataFieldHandler, ConstDataHolder
 from muddery.server.combat.combat_handler import COMBAT_HANDLER
 from muddery.server.database.gamedata.honours_mapper import HonoursMapper
+from muddery.server.database.storage.write_behind_storage import WriteBehindStorageWithCache
+from muddery.server.database.storage.lru_kv_cache import LRUKVCache
 from muddery.server.database.gamedata.character_inventory import CharacterInventory
 from muddery.server.database.gamedata.character_equipments import CharacterEquipments
 from muddery.server.database.gamedata.character_info import CharacterInfo
@@ -41,7 +45,7 @@ from muddery.server.database.gamedata.character_combat import CharacterCombat
 from muddery.server.database.gamedata.character_location import CharacterLocation
 from muddery.server.database.gamedata.character_revealed_map import CharacterRevealedMap
 from muddery.server.combat.match_pvp import MatchPVPHandler
-from muddery.server.utils.object_states_handler import ObjectStatesHandler
+from muddery.server.utils.object_states_handler import ObjectStatesHandler, BufferedObjectStatesHandler
 from muddery.server.database.gamedata.object_storage import CharacterObjectStorage
 from muddery.server.events.event_trigger import EventTrigger
 from muddery.common.utils.utils import async_wait, async_gather
@@ -66,6 +70,9 @@ class MudderyPlayerCharacter(ELEMENT("CHARACTER")):
     element_name = "Player Character"
     model_name = "player_characters"
 
+    # Player characters' level data depends on their levels in the database and fills their body data.
+    share_const_data = False
+
     def __init__(self):
         """
         Initial the object.
@@ -157,7 +164,11 @@ class MudderyPlayerCharacter(ELEMENT("CHARACTER")):
         Characters use memory to store state by default.
         :return:
         """
-        return ObjectStatesHandler(self.get_db_id(), CharacterObjectStorage)
+        if SETTINGS.CHARACTER_STATES_BUFFER:
+            return BufferedObjectStatesHandler(self.get_db_id(), CharacterObjectStorage,
+                                               SETTINGS.CHARACTER_STATES_FLUSH_INTERVAL)
+        else:
+            return ObjectStatesHandler(self.get_db_id(), CharacterObjectStorage)
 
     def set_db_id(self, db_id):
         """
@@ -202,7 +213,7 @@ class MudderyPlayerCharacter(ELEMENT("CHARACTER")):
         Returns:
             None
         """
-        with CharacterInfo.inst().transaction():
+        async with CharacterInfo.inst().transaction():
             new_level = await self.get_level() + 1
             await self.set_level(new_level)
 
@@ -295,6 +306,9 @@ class MudderyPlayerCharacter(ELEMENT("CHARACTER")):
         self.account = weakref.proxy(account)
         self.account_id = account.get_id()
 
+        # Keep the online character's data in caches.
+        LRUKVCache.pin(self.get_db_id())
+
     def get_account_id(self):
         """
         Get the player's account id.
@@ -356,6 +370,12 @@ class MudderyPlayerCharacter(ELEMENT("CHARACTER")):
 
         MatchPVPHandler.inst().remove(self)
 
+        # Write the character's changed data to the database.
+        if self.states:
+            await self.states.flush()
+        await WriteBehindStorageWithCache.flush_all(self.get_db_id())
+        LRUKVCache.unpin(self.get_db_id())
+
         self.account = None
         self.account_id = None
 
@@ -367,6 +387,7 @@ class MudderyPlayerCharacter(ELEMENT("CHARACTER")):
             keep_states (boolean): states values keep last values.
         """
          # Load body properties.
+        invalidate_statement_memo()
         for key, value in self.body_data_handler.all().items():
             self.const_data_handler.add(key, value)
 
@@ -922,14 +943,21 @@ class MudderyPlayerCharacter(ELEMENT("CHARACTER")):
             if item["object_key"] == obj_key:
                 to_remove.append(position)
 
+        to_delete = []
+        to_save = {}
         for position in to_remove:
             if self.inventory[position]["can_remove"]:
-                await CharacterInventory.inst().remove_object(self.get_db_id(), position)
+                to_delete.append(position)
                 del self.inventory[position]
             else:
-                await CharacterInventory.inst().set_dict(self.get_db_id(), position, {"number": 0})
+                to_save[position] = {"number": 0}
                 self.inventory[position]["number"] = 0
 
+        if to_delete:
+            await CharacterInventory.inst().remove_objects(self.get_db_id(), to_delete)
+        if to_save:
+            await CharacterInventory.inst().set_many(self.get_db_id(), to_save)
+
         return
 
     async def remove_objects_by_key(self, obj_key, number):
@@ -949,25 +977,32 @@ class MudderyPlayerCharacter(ELEMENT("CHARACTER")):
             if item["object_key"] == obj_key:
                 to_remove.append(position)
 
+        to_delete = []
+        to_save = {}
         for position in to_remove:
             item = self.inventory[position]
             obj_num = item["number"]
             if obj_num > number:
-                await CharacterInventory.inst().set_dict(self.get_db_id(), position, {"number": obj_num - number})
+                to_save[position] = {"number": obj_num - number}
                 item["number"] = obj_num - number
                 number = 0
             else:
                 number -= obj_num
                 if item["can_remove"]:
-                    await CharacterInventory.inst().remove_object(self.get_db_id(), position)
+                    to_delete.append(position)
                     del self.inventory[position]
                 else:
-                    await CharacterInventory.inst().set_dict(self.get_db_id(), position, {"number": 0})
+                    to_save[position] = {"number": 0}
                     item["number"] = 0
 
             if number == 0:
                 break
 
+        if to_delete:
+            await CharacterInventory.inst().remove_objects(self.get_db_id(), to_delete)
+        if to_save:
+            await CharacterInventory.inst().set_many(self.get_db_id(), to_save)
+
         return
 
     async def remove_objects_by_list(self, obj_list):
@@ -995,7 +1030,7 @@ class MudderyPlayerCharacter(ELEMENT("CHARACTER")):
         :param receive_list:
         :return:
         """
-        with self.states.transaction():
+        async with self.states.transaction():
             remove = await self.remove_objects_by_list(remove_list)
             receive = await self.receive_objects(receive_list)
 
@@ -1190,7 +1225,7 @@ class MudderyPlayerCharacter(ELEMENT("CHARACTER")):
             item["obj"] = new_obj
 
         obj_num = item["number"]
-        with self.states.transaction():
+        async with self.states.transaction():
             # add to body
             await CharacterEquipments.inst().add(self.get_db_id(), body_position, item["object_key"], item["level"])
 
@@ -1237,7 +1272,7 @@ class MudderyPlayerCharacter(ELEMENT("CHARACTER")):
             new_position = 1
 
         # save to db first
-        with self.states.transaction():
+        async with self.states.transaction():
             await CharacterInventory.inst().add(self.get_db_id(), new_position, item["object_key"], 1, item["level"])
             await CharacterEquipments.inst().remove_equipment(self.get_db_id(), body_position)
 
@@ -1320,6 +1355,7 @@ class MudderyPlayerCharacter(ELEMENT("CHARACTER")):
             }
 
         # add new default skills
+        new_skills = {}
         for item in default_skills:
             key = item.skill
             if key not in self.skills:
@@ -1329,15 +1365,18 @@ class MudderyPlayerCharacter(ELEMENT("CHARACTER")):
                     "cd_finish": 0,
                 }
 
-                # save skill
-                await CharacterSkills.inst().save(self.get_db_id(), key, {
+                new_skills[key] = {
                     "level": item.level,
                     "is_default": True,
                     "cd_finish": 0,
-                })
+                }
+
+        # save skills
+        if new_skills:
+            await CharacterSkills.inst().save_many(self.get_db_id(), new_skills)
 
         if to_delete:
-            await async_wait([CharacterSkills.inst().delete(self.get_db_id(), key) for key in to_delete])
+            await CharacterSkills.inst().delete_many(self.get_db_id(), to_delete)
 
         if to_save:
             await async_wait([CharacterSkills.inst().save(self.get_db_id(), key, self.skills["level"], True, 0) for key in to_save])
@@ -1532,6 +1571,9 @@ class MudderyPlayerCharacter(ELEMENT("CHARACTER")):
 
         self.msg({"combat_finish": combat_result})
 
+        # Write states changed in the combat.
+        await self.states.flush()
+
     async def leave_combat(self):
         """
         Leave the current combat.
@@ -6,14 +6,14 @@ Rooms are simple containers that has no location of their own.
 """
 
 import time
-import pytz
 import asyncio
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from muddery.server.settings import SETTINGS
 from muddery.server.utils.loot_handler import LootHandler
 from muddery.server.database.worlddata.loot_list import RoomProfitList
 from muddery.server.statements.statement_handler import STATEMENT_HANDLER
 from muddery.server.mappings.element_set import ELEMENT
 from muddery.server.utils.localized_strings_handler import _
+from muddery.server.server import Server
 
 
 class MudderyProfitRoom(ELEMENT("ROOM")):
@@ -30,7 +30,7 @@ class MudderyProfitRoom(ELEMENT("ROOM")):
         """
         super(MudderyProfitRoom, self).__init__()
 
-        self.scheduler = AsyncIOScheduler(timezone=pytz.utc)
+        self.profit_timer = None
         self.last_trigger_time = {}
         self.loot_handler = None
 
@@ -43,10 +43,28 @@ class MudderyProfitRoom(ELEMENT("ROOM")):
         # initialize loot handler
         self.loot_handler = LootHandler(RoomProfitList.get(self.get_element_key()))
 
-        # add the auto profit job
-        if self.scheduler.get_job(self.get_element_key()) is None:
-            self.scheduler.add_job(self.put_profits, "interval", seconds=1, id=self.get_element_key())
-            self.scheduler.start()
+        # add the auto profit job, it is added when the area is activated in the lazy mode.
+        if self.profit_timer is None and not SETTINGS.LAZY_AREAS:
+            self.profit_timer = Server.timers.schedule(1, self.put_profits, interval=1)
+
+    async def activate(self):
+        """
+        Called when the room's area is activated in the lazy mode.
+        """
+        await super(MudderyProfitRoom, self).activate()
+
+        if self.profit_timer is None:
+            self.profit_timer = Server.timers.schedule(1, self.put_profits, interval=1)
+
+    async def deactivate(self):
+        """
+        Called when the room's area is unloaded in the lazy mode.
+        """
+        await super(MudderyProfitRoom, self).deactivate()
+
+        if self.profit_timer:
+            self.profit_timer.cancel()
+            self.profit_timer = None
 
     async def at_character_arrive(self, character):
         """
@@ -6,6 +6,8 @@ Rooms are simple containers that has no location of their own.
 """
 
 import ast
+from muddery.server.settings import SETTINGS
+from muddery.server.server import Server
 from muddery.server.utils.logger import logger
 from muddery.server.utils.game_settings import GameSettings
 from muddery.server.database.worlddata.image_resource import ImageResource
@@ -91,12 +93,52 @@ class MudderyRoom(ELEMENT("MATTER")):
             except Exception as e:
                 logger.log_trace("Load background %s error: %s" % (resource, e))
 
-        # Load exits, objects and NPCs.
-        await async_wait([
-            self.load_exits(),
-            self.load_objects(),
-            self.load_npcs(),
-        ])
+        # Load exits, objects and NPCs. In the lazy mode, NPCs are loaded when the area is activated.
+        if SETTINGS.LAZY_AREAS:
+            await async_wait([
+                self.load_exits(),
+                self.load_objects(),
+            ])
+        else:
+            await async_wait([
+                self.load_exits(),
+                self.load_objects(),
+                self.load_npcs(),
+            ])
+
+    async def activate(self):
+        """
+        Called when the room's area is activated in the lazy mode. Load NPCs.
+        """
+        await self.load_npcs()
+
+    async def deactivate(self):
+        """
+        Called when the room's area is unloaded in the lazy mode. Remove NPCs.
+        """
+        npcs = [char for char in self.all_characters.values() if not char.is_player()]
+        for npc in npcs:
+            npc.stop_auto_combat_skill()
+            if npc.reborn_timer:
+                npc.reborn_timer.cancel()
+                npc.reborn_timer = None
+            npc.set_location(None)
+            del self.all_characters[npc.get_id()]
+
+        if npcs:
+            await async_wait([npc.states.clear() for npc in npcs])
+
+    def has_players(self):
+        """
+        If there are players in the room.
+        """
+        return any(char.is_player() for char in self.all_characters.values())
+
+    def in_combat(self):
+        """
+        If any NPC in the room is in a combat.
+        """
+        return any(char.is_in_combat() for char in self.all_characters.values() if not char.is_player())
 
     def load_map(self):
         """
@@ -125,7 +167,7 @@ class MudderyRoom(ELEMENT("MATTER")):
         records = WorldNPCs.get_location(self.get_element_key())
         models = ELEMENT("WORLD_NPC").get_models()
 
-        self.all_characters = {}
+        npcs = {}
         awaits = []
         for record in records:
             try:
@@ -133,7 +175,7 @@ class MudderyRoom(ELEMENT("MATTER")):
                 tables_data = tables_data[0]
 
                 new_obj = ELEMENT(tables_data.element_type)()
-                self.all_characters[new_obj.get_id()] = new_obj
+                npcs[new_obj.get_id()] = new_obj
                 awaits.append(new_obj.setup_element(tables_data.key, level=tables_data.level, first_time=True))
             except Exception as e:
                 logger.log_trace("Load NPC %s error: %s" % (record.key, e))
@@ -142,8 +184,9 @@ class MudderyRoom(ELEMENT("MATTER")):
             await async_wait(awaits)
 
         # Set the character's location.
-        for obj in self.all_characters.values():
+        for obj in npcs.values():
             obj.set_location(self)
+        self.all_characters.update(npcs)
 
     async def load_exits(self):
         """
@@ -265,6 +308,10 @@ class MudderyRoom(ELEMENT("MATTER")):
         character (Object): The character moved into this one
 
         """
+        if SETTINGS.LAZY_AREAS and character.is_player():
+            # Activate the area when a player enters it.
+            await Server.world.activate_room(self.get_element_key())
+
         self.all_characters[character.get_id()] = character
 
         # send surrounding changes to player
@@ -2,7 +2,10 @@
 The World is the base controller of a server. It managers all areas, maps and characters on this server.
 """
 
+import time
 from muddery.server.settings import SETTINGS
+from muddery.server.server import Server
+from muddery.server.utils.logger import logger
 from muddery.server.elements.base_element import BaseElement
 from muddery.server.mappings.element_set import ELEMENT
 from muddery.server.database.gamedata.honours_mapper import HonoursMapper
@@ -43,6 +46,9 @@ class MudderyWorld(BaseElement):
         # the map of whole world
         self.map_data = {}
 
+        # the timer to unload idle areas in the lazy mode
+        self.unload_timer = None
+
     async def load_data(self, key, level=None):
         """
         Load the object's data.
@@ -104,6 +110,45 @@ class MudderyWorld(BaseElement):
             room_key: area_key for area_key, area in self.all_areas.items() for room_key in area.get_rooms_key()
         }
 
+        if SETTINGS.LAZY_AREAS and SETTINGS.AREA_IDLE_UNLOAD_TIME > 0 and self.unload_timer is None:
+            interval = min(SETTINGS.AREA_IDLE_UNLOAD_TIME, 60)
+            self.unload_timer = Server.timers.schedule(interval, self.unload_idle_areas, interval=interval)
+
+    async def activate_area(self, area_key):
+        """
+        Load an area's NPCs and timers in the lazy mode. Call it before using NPCs of an area without players.
+        """
+        await self.all_areas[area_key].activate()
+
+    async def activate_room(self, room_key):
+        """
+        Activate the room's area in the lazy mode.
+        """
+        await self.get_area_by_room(room_key).activate()
+
+    async def unload_idle_areas(self):
+        """
+        Unload NPCs and timers of areas which have no players for AREA_IDLE_UNLOAD_TIME seconds.
+        """
+        now = time.time()
+        for area_key, area in self.all_areas.items():
+            if not area.active:
+                continue
+
+            if area.has_players():
+                area.last_player_time = now
+            elif now - area.last_player_time >= SETTINGS.AREA_IDLE_UNLOAD_TIME and not area.in_combat():
+                try:
+                    await area.deactivate()
+                except Exception as e:
+                    logger.log_trace("Unload area %s error: %s" % (area_key, e))
+
+    def get_active_areas(self):
+        """
+        Get keys of areas whose NPCs are loaded.
+        """
+        return [area_key for area_key, area in self.all_areas.items() if area.active]
+
     def load_map(self):
         """
         Load the world's map data.
@@ -40,3 +40,11 @@ class SanicGameServer(SanicServer):
 
         from muddery.server.server import Server
         await Server.inst().init()
+
+    @classmethod
+    async def _run_after_server_stop(cls, app, loop):
+        # Write all changed data to the database.
+        from muddery.server.server import Server
+        await Server.inst().flush_db()
+
+        await super(SanicGameServer, cls)._run_after_server_stop(app, loop)
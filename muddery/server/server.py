@@ -1,11 +1,13 @@
 
 import traceback
 from muddery.server.settings import SETTINGS
+from muddery.server.utils.logger import logger
 from muddery.common.utils.singleton import Singleton
 from muddery.server.database.gamedata_db import GameDataDB
 from muddery.server.database.worlddata_db import WorldDataDB
-from muddery.common.utils.utils import classes_in_path
+from muddery.common.utils.utils import classes_in_path, class_from_path
 from muddery.server.database.gamedata.base_data import BaseData
+from muddery.server.utils.timer_wheel import TimerWheel
 
 
 class Server(Singleton):
@@ -24,6 +26,9 @@ class Server(Singleton):
         self._world = None
         self.db_connected = False
 
+        # All timers of the game.
+        self._timers = TimerWheel(SETTINGS.TIMER_WHEEL_TICK)
+
     async def init(self):
         await self.connect_db()
         await self.create_the_world()
@@ -39,18 +44,42 @@ class Server(Singleton):
             return
 
         try:
-            WorldDataDB.inst().connect()
+            # The game server does not change world data.
+            WorldDataDB.inst().connect(read_only=SETTINGS.WORLDDATA_DB.get("SERVER_READ_ONLY", False))
             GameDataDB.inst().connect()
+
+            # Asyncio storages need asyncio connections.
+            if class_from_path(SETTINGS.DATABASE_STORAGE_OBJECT).async_io:
+                await GameDataDB.inst().connect_async()
         except Exception as e:
             traceback.print_exc()
             raise
 
+        if SETTINGS.WORLDDATA_SNAPSHOT_FILE:
+            from muddery.server.database.worlddata.worlddata import WorldData
+            if WorldData.load_snapshot(SETTINGS.WORLDDATA_SNAPSHOT_FILE):
+                logger.log_info("World data is loaded from %s." % SETTINGS.WORLDDATA_SNAPSHOT_FILE)
+
         # load classes
         for cls in classes_in_path(SETTINGS.PATH_GAMEDATA_DAO, BaseData):
             await cls.inst().init()
 
         self.db_connected = True
 
+    async def flush_db(self):
+        """
+        Write all cached changes to the database.
+        """
+        if not self.db_connected:
+            return
+
+        # Buffered states may be written to write behind storages, flush them first.
+        from muddery.server.utils.object_states_handler import BufferedObjectStatesHandler
+        await BufferedObjectStatesHandler.flush_all()
+
+        from muddery.server.database.storage.write_behind_storage import WriteBehindStorageWithCache
+        await WriteBehindStorageWithCache.flush_all()
+
     async def create_the_world(self):
         """
         Create the whole game world.
@@ -61,6 +90,9 @@ class Server(Singleton):
 
         try:
             from muddery.server.mappings.element_set import ELEMENT
+            if SETTINGS.WORLDDATA_EAGER_VIEWS:
+                self.build_element_views()
+
             self._world = ELEMENT("WORLD")()
             await self._world.setup_element("")
             self._world.load_map()
@@ -68,6 +100,18 @@ class Server(Singleton):
             traceback.print_exc()
             raise
 
+    def build_element_views(self):
+        """
+        Join world data records of all elements.
+        """
+        from muddery.server.mappings.element_set import ELEMENT_SET
+        from muddery.server.database.worlddata.worlddata import WorldData
+
+        ELEMENT_SET.load_classes()
+        all_models = set(tuple(cls.get_models()) for cls in ELEMENT_SET.class_dict.values())
+        for models in all_models:
+            WorldData.build_views(models)
+
     @ClassProperty
     def world(cls):
         """
@@ -77,3 +121,10 @@ class Server(Singleton):
         property, e.g. obj.system.attr = value etc.
         """
         return cls.inst()._world
+
+    @ClassProperty
+    def timers(cls):
+        """
+        The timer wheel which runs all timers of the game, such as characters' auto cast skills and reborns.
+        """
+        return cls.inst()._timers
@@ -46,6 +46,9 @@ class Settings(object):
     # The maximum number of characters allowed by the default.
     MAX_PLAYER_CHARACTERS = 5
 
+    # Seconds of a tick of the server's timer wheel. Timers fire at the next tick after their time.
+    TIMER_WHEEL_TICK = 0.1
+
     # Language code for this installation. All choices can be found here:
     # http://www.w3.org/TR/REC-html40/struct/dirlang.html#langcodes
     LANGUAGE_CODE = "en-US"
@@ -101,6 +104,26 @@ class Settings(object):
     # PASSWORD - db admin password (unused in sqlite3)
     # HOST - empty string is localhost (unused in sqlite3)
     # PORT - empty string defaults to localhost (unused in sqlite3)
+    # ASYNC_DRIVER - mysql's asyncio driver, "aiomysql" or "asyncmy". Only used
+    #                by asyncio storages.
+    # SQLITE_PROFILE - sqlite3's pragmas profile, "default", "performance" or "read_mostly".
+    #                  The performance profile uses WAL, synchronous=NORMAL and larger caches,
+    #                  the read_mostly profile only uses larger caches. (only used in sqlite3)
+    # SQLITE_PRAGMAS - a dict of sqlite3's pragmas which overrides the profile's pragmas,
+    #                  such as {"cache_size": -16384}. (only used in sqlite3)
+    # SERVER_READ_ONLY - the game server opens the database read-only. (only used in sqlite3)
+    # POOL_SIZE - number of connections kept in the connection pool, 0 to use the driver's default pool.
+    # MAX_OVERFLOW - number of connections can be opened beyond POOL_SIZE.
+    # POOL_PRE_PING - test connections before using them, useful if the database closes idle connections.
+    # POOL_RECYCLE - seconds to replace a connection with a new one, -1 means never.
+    # IMMUTABLE - read-only connections assume the db file is not changed by other processes,
+    #             restart the game server after changing world data. (only used in sqlite3)
+    #
+    # Faster options are off by default, turn them on if they fit your game:
+    #   GAMEDATA_DB: 'SQLITE_PROFILE': 'performance' uses WAL, a crash may lose the last
+    #                transactions; 'POOL_SIZE': 5 keeps connections open, mostly useful with mysql.
+    #   WORLDDATA_DB: 'SQLITE_PROFILE': 'read_mostly', 'SERVER_READ_ONLY': True and 'IMMUTABLE': True,
+    #                 when world data is only changed while the game server is stopped.
     ######################################################################
     GAMEDATA_DB = {
         'MODELS': 'gamedata.models',
@@ -110,6 +133,12 @@ class Settings(object):
         'PASSWORD': '',
         'HOST': '',
         'PORT': '',
+        'ASYNC_DRIVER': 'aiomysql',
+        'SQLITE_PROFILE': 'default',
+        'POOL_SIZE': 0,
+        'MAX_OVERFLOW': 10,
+        'POOL_PRE_PING': False,
+        'POOL_RECYCLE': 3600,
         'DEBUG': False,
     }
 
@@ -121,15 +150,65 @@ class Settings(object):
         'PASSWORD': '',
         'HOST': '',
         'PORT': '',
+        'SQLITE_PROFILE': 'default',
+        'SERVER_READ_ONLY': False,
+        'IMMUTABLE': False,
         'DEBUG': False,
     }
 
     # Database Access Object
+    # Use 'muddery.server.database.storage.async_table_kv_storage.AsyncTableKVStorage'
+    # to run game data's database io with asyncio, it needs aiosqlite or mysql's asyncio driver.
     DATABASE_STORAGE_OBJECT = 'muddery.server.database.storage.table_kv_storage.TableKVStorage'
 
     # Database Access Object without cache
+    # Use 'muddery.server.database.storage.lru_kv_cache.LRUKVCache' to limit the cache's size,
+    # least recently used categories (usually characters' data) will be evicted.
     DATABASE_CACHE_OBJECT = 'muddery.server.database.storage.memory_kv_storage.MemoryKVStorage'
 
+    # Options of each table's cache object, tables not in the dict use the "default" options.
+    # LRUKVCache's options:
+    #   max_categories: max number of categories in the cache, 0 means no limit.
+    #   max_bytes: approximate max memory size of the cache in bytes, 0 means no limit.
+    # For example: {"default": {"max_categories": 5000}, "object_states": {"max_bytes": 64 * 1024 * 1024}}
+    DATABASE_CACHE_OPTIONS = {
+        "default": {},
+    }
+
+    # Write game data to the cache first, then write changed data to the database in batches.
+    # Changes in the last DATABASE_FLUSH_INTERVAL seconds may be lost if the server crashes.
+    DATABASE_WRITE_BEHIND = False
+
+    # Seconds between two writes of the write behind cache.
+    DATABASE_FLUSH_INTERVAL = 1.0
+
+    # The codec to pack objects' runtime attributes, such as characters' states.
+    # "msgpack" needs the msgpack package, "json" is the legacy format.
+    # Values in other formats can still be read, but they are only converted by "muddery migratevalues".
+    # After changing the codec, run it to convert all values, older releases can only read "json" values.
+    GAMEDATA_VALUE_CODEC = "json"
+
+    # Convert values in other formats to GAMEDATA_VALUE_CODEC when they are loaded, instead of running
+    # "muddery migratevalues". Converted values can not be read by older releases if the codec is not "json".
+    GAMEDATA_VALUE_REWRITE_ON_READ = False
+
+    # Keep online player characters' states in memory. Changed states are written to the database
+    # when a combat finishes, the character logs out, or every CHARACTER_STATES_FLUSH_INTERVAL seconds,
+    # so states changed after the last write are lost on a crash.
+    CHARACTER_STATES_BUFFER = False
+
+    # Seconds between two writes of buffered character states, 0 means only write at combat end and logout.
+    CHARACTER_STATES_FLUSH_INTERVAL = 30
+
+    # Commit all game data written by a command in one transaction. If the command fails, its writes are
+    # rolled back and changed categories are reloaded from the database. Background jobs, such as timers
+    # and flushes, run in their own units of work. None enables it unless the database is sqlite3.
+    #
+    # Warning: on sqlite3 all units of work share one connection. Every command holds one process-wide lock
+    # from its start to its commit, including the time it waits for other io, so all players' commands and
+    # background jobs run one at a time on the whole server. Only set it to True on sqlite3 for small games.
+    COMMAND_UNIT_OF_WORK = None
+
 
     ######################################################################
     # Web features
@@ -221,6 +300,21 @@ class Settings(object):
     # Skill functions set
     SKILL_FUNC_SET = "muddery.server.statements.default_statement_func_set.SkillFuncSet"
 
+    # Evaluate conditions' functions from left to right and skip functions which can not change the
+    # result. Set it to False to evaluate all functions of a condition concurrently.
+    STATEMENT_LAZY_CONDITIONS = True
+
+    # Reuse results of const statement functions with the same args, caller and obj during a command.
+    # Results are dropped when characters' inventories, quests or states change.
+    STATEMENT_MEMO = True
+
+    # Record call counts, latencies and errors of statement functions and statements. It can also be
+    # switched on and off by staffs with the statement_profile request.
+    STATEMENT_PROFILING = False
+
+    # The file to dump statements' profiles.
+    STATEMENT_PROFILE_FILE = os.path.join(GAME_DIR, "logs", "statement_profile.json")
+
 
     ######################################################################
     # Command settings
@@ -255,6 +349,26 @@ class Settings(object):
     # Localized string model's name
     LOCALIZED_STRINGS_MODEL = "localized_strings"
 
+    # Join world data records of all elements when the server starts. Otherwise elements' records are
+    # joined when they are used the first time.
+    WORLDDATA_EAGER_VIEWS = False
+
+    # Elements of the same key and level share their const data loaded from the world data. Changed values
+    # are kept in each element.
+    SHARE_ELEMENT_DATA = True
+
+    # The world data snapshot created by "muddery snapshot". The game server loads world data from it if it
+    # matches the world data's checksum. Set it to None to always load world data from the database.
+    WORLDDATA_SNAPSHOT_FILE = os.path.join(GAME_DIR, "server", "worlddata.snapshot")
+
+    # Load areas' NPCs and start their rooms' timers when players enter them. Rooms, exits and objects are
+    # always loaded.
+    LAZY_AREAS = False
+
+    # In the lazy mode, unload NPCs and timers of areas which have no players for this number of seconds.
+    # NPCs' states are reset when they are loaded again. 0 means never unload.
+    AREA_IDLE_UNLOAD_TIME = 600
+
 
     ###################################
     # combat settings
@@ -268,6 +382,22 @@ class Settings(object):
 
     AUTO_COMBAT_TIMEOUT = 60
 
+    # Choose and cast all NPCs' skills of a combat together on one timer, and send their results in one
+    # message. Set it to False to give each NPC its own auto cast timer.
+    COMBAT_AI_TICK = True
+
+    # The strategy to pair characters waiting for honour combats.
+    # "muddery.server.combat.matchmaking.NeighbourPairingStrategy" pairs neighbours in honour order,
+    # "muddery.server.combat.matchmaking.LongestWaitPairingStrategy" lets characters who have waited longer
+    # choose their nearest opponents first.
+    HONOUR_MATCH_STRATEGY = "muddery.server.combat.matchmaking.LongestWaitPairingStrategy"
+
+    # The allowed honour difference of a waiting character grows by this value every second.
+    HONOUR_MATCH_TOLERANCE_GROWTH = 5
+
+    # The maximum allowed honour difference, 0 means no limits.
+    HONOUR_MATCH_MAX_TOLERANCE = 0
+
 
     ###################################
     # AI modules
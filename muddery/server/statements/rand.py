@@ -19,6 +19,7 @@ class FuncOdd(StatementFunction):
 
     key = "odd"
     const = True
+    deterministic = False
 
     async def func(self):
         """
@@ -47,6 +48,7 @@ class FuncRand(StatementFunction):
 
     key = "rand"
     const = True
+    deterministic = False
 
     async def func(self):
         """
@@ -79,6 +81,7 @@ class FuncRandInt(StatementFunction):
 
     key = "randint"
     const = True
+    deterministic = False
 
     async def func(self):
         """
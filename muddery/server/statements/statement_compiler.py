@@ -0,0 +1,377 @@
+"""
+Compile statement strings into callable trees.
+
+Statements come from world data and do not change at runtime, so each statement is parsed only once:
+function classes are found and arguments are evaluated to literals when the statement is compiled.
+Conditions are compiled to trees of and/or/not nodes which evaluate with short-circuit in the lazy mode,
+or evaluate all functions concurrently before the expression in the eager mode.
+"""
+
+import re
+import ast
+import time
+from muddery.server.utils.logger import logger
+from muddery.common.utils.utils import async_gather, async_wait
+from muddery.server.statements.statement_memo import run_memoized
+from muddery.server.statements.statement_profiler import STATEMENT_PROFILER
+
+
+re_function = re.compile(r'[a-zA-Z_][a-zA-Z0-9_\.]*\(.*?\)')
+
+
+class FunctionStats(object):
+    """
+    Count how many times each condition function is evaluated, and how many evaluations are skipped by
+    short-circuit. Only counts while the statement profiler is enabled.
+    """
+    def __init__(self):
+        # {function's key: count}
+        self.calls = {}
+        self.skipped = {}
+
+    def add_call(self, key):
+        self.calls[key] = self.calls.get(key, 0) + 1
+
+    def add_skipped(self, keys):
+        for key in keys:
+            self.skipped[key] = self.skipped.get(key, 0) + 1
+
+    def get(self):
+        """
+        Get counts of all functions.
+
+        Returns:
+            {function's key: {"calls": evaluated times, "skipped": skipped times}}
+        """
+        return {
+            key: {"calls": self.calls.get(key, 0), "skipped": self.skipped.get(key, 0)}
+            for key in set(self.calls) | set(self.skipped)
+        }
+
+    def reset(self):
+        self.calls.clear()
+        self.skipped.clear()
+
+
+CONDITION_FUNCTION_STATS = FunctionStats()
+
+
+class FunctionCall(object):
+    """
+    A statement function call, such as: func("value")
+    """
+    __slots__ = ("func_word", "func_class", "args", "key")
+
+    def __init__(self, func_word, func_class, args):
+        self.func_word = func_word
+        self.func_class = func_class
+        self.args = args
+        self.key = func_class.key if func_class else func_word
+
+    async def run(self, caller, obj, **kwargs):
+        """
+        Do the function.
+
+        Args:
+            caller: (object) statement's caller
+            obj: (object) caller's target
+
+        Returns:
+            function result
+        """
+        if not self.func_class:
+            if STATEMENT_PROFILER.enabled:
+                STATEMENT_PROFILER.record_function(self.key, 0, True)
+            return
+
+        func_obj = self.func_class()
+        func_obj.set(caller, obj, self.args, **kwargs)
+        if not STATEMENT_PROFILER.enabled:
+            try:
+                return await func_obj.func()
+            except Exception as e:
+                logger.log_err("Exec function error: %s %s" % (self.func_word, repr(e)))
+                return
+
+        error = False
+        begin = time.perf_counter()
+        try:
+            return await func_obj.func()
+        except Exception as e:
+            error = True
+            logger.log_err("Exec function error: %s %s" % (self.func_word, repr(e)))
+            return
+        finally:
+            STATEMENT_PROFILER.record_function(self.key, time.perf_counter() - begin, error)
+
+
+def compile_function(func_set, func_word):
+    """
+    Compile a function string.
+
+    Args:
+        func_set: (object) function set
+        func_word: (string) function string, such as: func("value")
+
+    Returns:
+        (FunctionCall) the function call
+    """
+    # separate function's key and args
+    try:
+        pos = func_word.index("(")
+        func_key = func_word[:pos]
+        func_args = ast.literal_eval(func_word[pos:])
+        if type(func_args) != tuple:
+            func_args = (func_args,)
+    except ValueError:
+        func_key = func_word
+        func_args = ()
+    except SyntaxError:
+        logger.log_err("Statement error: Can not parse function's args: %s." % func_word)
+        return FunctionCall(func_word, None, ())
+
+    func_class = func_set.get_func_class(func_key)
+    if not func_class:
+        logger.log_err("Statement error: Can not find function: %s of %s." % (func_key, func_word))
+
+    return FunctionCall(func_word, func_class, func_args)
+
+
+class FunctionList(object):
+    """
+    Functions separated by ";", used by actions and skills.
+    """
+    def __init__(self, calls):
+        self.calls = calls
+
+    async def run_all(self, caller, obj, **kwargs):
+        """
+        Do all functions without results.
+        """
+        if len(self.calls) == 1:
+            # Do not create tasks for a single function.
+            await run_memoized(self.calls[0], caller, obj, **kwargs)
+        elif self.calls:
+            await async_wait([run_memoized(call, caller, obj, **kwargs) for call in self.calls])
+
+    async def gather(self, caller, obj, **kwargs):
+        """
+        Do all functions and get their results.
+        """
+        if len(self.calls) == 1:
+            return [await run_memoized(self.calls[0], caller, obj, **kwargs)]
+        elif self.calls:
+            return await async_gather([run_memoized(call, caller, obj, **kwargs) for call in self.calls])
+        else:
+            return []
+
+
+def compile_function_list(func_set, statement):
+    """
+    Compile functions separated by ";".
+    """
+    words = [word.strip() for word in statement.split(";")]
+    return FunctionList([compile_function(func_set, word) for word in words if word])
+
+
+class ConditionNode(object):
+    """
+    A node of a condition tree.
+    """
+    # keys of functions in this node
+    keys = ()
+
+    async def evaluate(self, caller, obj, kwargs):
+        raise NotImplementedError
+
+
+class ConstantNode(ConditionNode):
+    def __init__(self, value):
+        self.value = value
+
+    async def evaluate(self, caller, obj, kwargs):
+        return self.value
+
+
+class CallNode(ConditionNode):
+    """
+    A function in the condition. Its result is converted to True, False or None.
+    """
+    def __init__(self, call):
+        self.call = call
+        self.keys = (call.key,)
+
+    async def evaluate(self, caller, obj, kwargs):
+        if STATEMENT_PROFILER.enabled:
+            CONDITION_FUNCTION_STATS.add_call(self.call.key)
+        result = await run_memoized(self.call, caller, obj, **kwargs)
+        return None if result is None else bool(result)
+
+
+class NotNode(ConditionNode):
+    def __init__(self, operand):
+        self.operand = operand
+        self.keys = operand.keys
+
+    async def evaluate(self, caller, obj, kwargs):
+        return not await self.operand.evaluate(caller, obj, kwargs)
+
+
+class BoolOpNode(ConditionNode):
+    def __init__(self, operands):
+        self.operands = operands
+        self.keys = tuple(key for operand in operands for key in operand.keys)
+
+    def skip(self, index):
+        """
+        Count functions in operands after the index as skipped.
+        """
+        if not STATEMENT_PROFILER.enabled:
+            return
+
+        for operand in self.operands[index + 1:]:
+            CONDITION_FUNCTION_STATS.add_skipped(operand.keys)
+
+
+class AndNode(BoolOpNode):
+    async def evaluate(self, caller, obj, kwargs):
+        value = True
+        for index, operand in enumerate(self.operands):
+            value = await operand.evaluate(caller, obj, kwargs)
+            if not value:
+                self.skip(index)
+                return value
+        return value
+
+
+class OrNode(BoolOpNode):
+    async def evaluate(self, caller, obj, kwargs):
+        value = False
+        for index, operand in enumerate(self.operands):
+            value = await operand.evaluate(caller, obj, kwargs)
+            if value:
+                self.skip(index)
+                return value
+        return value
+
+
+class ExpressionNode(ConditionNode):
+    """
+    Other python expressions, such as comparisons. Functions in the expression are done first, then the
+    expression is evaluated with their results.
+    """
+    def __init__(self, condition, code, calls):
+        """
+        Args:
+            condition: (string) the source condition.
+            code: compiled expression.
+            calls: (dict) {placeholder's name: CallNode}
+        """
+        self.condition = condition
+        self.code = code
+        self.calls = calls
+        self.keys = tuple(call.call.key for call in calls.values())
+
+    async def evaluate(self, caller, obj, kwargs):
+        names = list(self.calls.keys())
+        if names:
+            results = await async_gather([self.calls[name].evaluate(caller, obj, kwargs) for name in names])
+            values = dict(zip(names, results))
+        else:
+            values = {}
+
+        try:
+            return eval(self.code, {}, values)
+        except Exception as e:
+            logger.log_err("Exec condition error: %s %s" % (self.condition, repr(e)))
+            STATEMENT_PROFILER.mark_error()
+            return False
+
+
+class ErrorNode(ConditionNode):
+    """
+    A condition which can not be compiled.
+    """
+    async def evaluate(self, caller, obj, kwargs):
+        STATEMENT_PROFILER.mark_error()
+        return False
+
+
+class CompiledCondition(object):
+    """
+    A compiled condition.
+    """
+    def __init__(self, condition, root):
+        self.condition = condition
+        self.root = root
+
+    async def match(self, caller, obj, **kwargs):
+        return await self.root.evaluate(caller, obj, kwargs)
+
+
+PLACEHOLDER_PREFIX = "__func_"
+
+
+def compile_condition(func_set, condition, lazy=True):
+    """
+    Compile a condition expression.
+
+    Args:
+        func_set: (object) condition function set
+        condition: (string) condition statement
+        lazy: (boolean) evaluate operands from left to right and skip operands which can not change the
+            result. Otherwise evaluate all functions concurrently first.
+
+    Returns:
+        (CompiledCondition) the compiled condition
+    """
+    calls = {}
+
+    def replace(match):
+        name = "%s%d" % (PLACEHOLDER_PREFIX, len(calls))
+        calls[name] = CallNode(compile_function(func_set, match.group()))
+        return name
+
+    expression = re_function.sub(replace, condition).strip()
+
+    try:
+        tree = ast.parse(expression, mode="eval")
+        if lazy:
+            root = build_node(condition, tree.body, calls)
+        else:
+            root = build_expression_node(condition, tree.body, calls)
+    except Exception as e:
+        logger.log_err("Exec condition error: %s %s" % (condition, repr(e)))
+        root = ErrorNode()
+
+    return CompiledCondition(condition, root)
+
+
+def build_node(condition, node, calls):
+    """
+    Build a condition node from a python ast node.
+    """
+    if isinstance(node, ast.BoolOp):
+        operands = [build_node(condition, value, calls) for value in node.values]
+        if isinstance(node.op, ast.And):
+            return AndNode(operands)
+        else:
+            return OrNode(operands)
+    elif isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        return NotNode(build_node(condition, node.operand, calls))
+    elif isinstance(node, ast.Name) and node.id in calls:
+        return calls[node.id]
+    elif isinstance(node, ast.Constant):
+        return ConstantNode(node.value)
+    else:
+        return build_expression_node(condition, node, calls)
+
+
+def build_expression_node(condition, node, calls):
+    """
+    Build a node which evaluates the python ast node with eval().
+    """
+    expression = ast.fix_missing_locations(ast.Expression(body=node))
+    code = compile(expression, "<condition>", "eval")
+    names = sorted(sub_node.id for sub_node in ast.walk(node) if isinstance(sub_node, ast.Name))
+    return ExpressionNode(condition, code, {name: calls[name] for name in names if name in calls})
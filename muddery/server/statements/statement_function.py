@@ -21,6 +21,10 @@ class StatementFunction(object):
     # only const functions can be used in conditions.
     const = False
 
+    # If this function always returns the same result when data does not change. Results of const and
+    # deterministic functions can be reused during a command.
+    deterministic = True
+
     def __init__(self):
         """
         Init default attributes.
@@ -2,125 +2,97 @@
 This model handle statements.
 """
 
-import re, ast, traceback
 from muddery.server.settings import SETTINGS
-from muddery.server.utils.logger import logger
 from muddery.common.utils.utils import class_from_path
-from muddery.common.utils.utils import async_gather, async_wait
+from muddery.server.statements.statement_compiler import compile_condition, compile_function_list
+from muddery.server.statements.statement_compiler import CONDITION_FUNCTION_STATS
+from muddery.server.statements.statement_memo import STATEMENT_MEMO_COUNTERS
+from muddery.server.statements.statement_profiler import STATEMENT_PROFILER
+from muddery.server.database.worlddata.worlddata import WorldData
 
 
-re_function = re.compile(r'[a-zA-Z_][a-zA-Z0-9_\.]*\(.*?\)')
-
-
-async def exec_function(func_set, func_word, caller, obj, **kwargs):
-    """
-    Do function.
-
-    Args:
-        func_set: (object) function set
-        func_word: (string) function string, such as: func("value")
-        caller: (object) statement's caller
-        obj: (object) caller's target
-
-    Returns:
-        function result
+class StatementHandler(object):
     """
-
-    # separate function's key and args
-    try:
-        pos = func_word.index("(")
-        func_key = func_word[:pos]
-        func_args = ast.literal_eval(func_word[pos:])
-        if type(func_args) != tuple:
-            func_args = (func_args,)
-    except ValueError:
-        func_key = func_word
-        func_args = ()
-
-    func_class = func_set.get_func_class(func_key)
-    if not func_class:
-        logger.log_err("Statement error: Can not find function: %s of %s." % (func_key, func_word))
-        return
-
-    func_obj = func_class()
-    func_obj.set(caller, obj, func_args, **kwargs)
-    try:
-        return await func_obj.func()
-    except Exception as e:
-        logger.log_err("Exec function error: %s %s" % (func_word, repr(e)))
-        return
-
-
-async def exec_condition(func_set, condition, caller, obj, **kwargs):
+    Loads and handles condition statements and action statements.
     """
-    Execute the statements.
+    def __init__(self):
+        """
+        Creates a statement handler instance. Loads statements.
+        """
+        # load function sets
+        action_func_set_class = class_from_path(SETTINGS.ACTION_FUNC_SET)
+        self.action_func_set = action_func_set_class()
 
-    Args:
-        func_set: (object) condition function set
-        condition: (string) condition statement
-        caller: (object) statement's caller
-        obj: (object) caller's target
+        condition_func_set_class = class_from_path(SETTINGS.CONDITION_FUNC_SET)
+        self.condition_func_set = condition_func_set_class()
 
-    Returns:
-        result
-    """
-    matches = re_function.findall(condition)
-    if matches:
-        results = await async_gather([exec_function(func_set, match, caller, obj, **kwargs) for match in matches])
-        values = {
-            match: "None" if results[i] is None else "True" if results[i] else "False" for i, match in enumerate(matches)
-        }
-    else:
-        values = {}
+        skill_func_set_class = class_from_path(SETTINGS.SKILL_FUNC_SET)
+        self.skill_func_set = skill_func_set_class()
 
-    func = get_condition_func(values)
-    return re_function.sub(func, condition)
+        # compiled statements: {statement: compiled statement}
+        self.action_cache = {}
+        self.condition_cache = {}
+        self.skill_cache = {}
 
+        if SETTINGS.STATEMENT_PROFILING:
+            STATEMENT_PROFILER.enable()
 
-def get_condition_func(values):
-    """
-    Get a function used in re's sub.
+        # Statements edited in the world editor must be compiled again.
+        WorldData.add_refresh_listener(self.clear_cache)
 
-    Returns:
-        function
-    """
-    def function(word):
+    def clear_cache(self, table_name=None):
         """
-        Do function.
+        Remove all compiled statements.
 
         Args:
-            word: (string) condition function
-
-        Returns:
-            (string) "True" or "False"
+            table_name: (string) the reloaded world data table, statements may be in any table.
         """
-        func_word = word.group()
+        self.action_cache.clear()
+        self.condition_cache.clear()
+        self.skill_cache.clear()
 
-        if func_word in values:
-            return values[func_word]
-        else:
-            return "None"
+    def get_condition_stats(self):
+        """
+        Get how many times each condition function is evaluated and skipped while the statement profiler
+        is enabled.
 
-    return function
+        Returns:
+            {function's key: {"calls": evaluated times, "skipped": skipped times}}
+        """
+        return CONDITION_FUNCTION_STATS.get()
 
+    def reset_condition_stats(self):
+        CONDITION_FUNCTION_STATS.reset()
 
-class StatementHandler(object):
-    """
-    Loads and handles condition statements and action statements.
-    """
-    def __init__(self):
+    def get_memo_metrics(self):
         """
-        Creates a statement handler instance. Loads statements.
+        Get hits and misses of const functions' results memoized in commands.
         """
-        # load function sets
-        action_func_set_class = class_from_path(SETTINGS.ACTION_FUNC_SET)
-        self.action_func_set = action_func_set_class()
+        return STATEMENT_MEMO_COUNTERS.metrics()
 
-        condition_func_set_class = class_from_path(SETTINGS.CONDITION_FUNC_SET)
-        self.condition_func_set = condition_func_set_class()
+    def compile_action(self, action):
+        try:
+            return self.action_cache[action]
+        except KeyError:
+            compiled = compile_function_list(self.action_func_set, action)
+            self.action_cache[action] = compiled
+            return compiled
 
-        skill_func_set_class = class_from_path(SETTINGS.SKILL_FUNC_SET)
-        self.skill_func_set = skill_func_set_class()
+    def compile_skill(self, skill):
+        try:
+            return self.skill_cache[skill]
+        except KeyError:
+            compiled = compile_function_list(self.skill_func_set, skill)
+            self.skill_cache[skill] = compiled
+            return compiled
+
+    def compile_condition(self, condition):
+        try:
+            return self.condition_cache[condition]
+        except KeyError:
+            compiled = compile_condition(self.condition_func_set, condition, SETTINGS.STATEMENT_LAZY_CONDITIONS)
+            self.condition_cache[condition] = compiled
+            return compiled
 
     async def do_action(self, action, caller, obj, **kwargs):
         """
@@ -138,11 +110,11 @@ class StatementHandler(object):
             return
 
         # execute the statement
-        functions = action.split(";")
-        if functions:
-            await async_wait([exec_function(self.action_func_set, f, caller, obj, **kwargs) for f in functions])
-
-        return
+        coroutine = self.compile_action(action).run_all(caller, obj, **kwargs)
+        if STATEMENT_PROFILER.enabled:
+            await STATEMENT_PROFILER.profile_statement("action", action, coroutine)
+        else:
+            await coroutine
 
     async def do_skill(self, action, caller, obj, **kwargs):
         """
@@ -160,12 +132,11 @@ class StatementHandler(object):
             return
 
         # execute the statement
-        functions = action.split(";")
-        if functions:
-            results = await async_gather([exec_function(self.skill_func_set, f, caller, obj, **kwargs) for f in functions])
+        coroutine = self.compile_skill(action).gather(caller, obj, **kwargs)
+        if STATEMENT_PROFILER.enabled:
+            results = await STATEMENT_PROFILER.profile_statement("skill", action, coroutine)
         else:
-            results = []
-
+            results = await coroutine
         return [r for r in results if r]
 
     async def match_condition(self, condition, caller, obj, **kwargs):
@@ -183,17 +154,11 @@ class StatementHandler(object):
         if not condition:
             return True
 
-        # calculate functions first
-        exec_string = await exec_condition(self.condition_func_set, condition, caller, obj, **kwargs)
-
-        try:
-            # do condition
-            result = eval(exec_string)
-        except Exception as e:
-            logger.log_err("Exec condition error: %s %s" % (condition, repr(e)))
-            return False
-
-        return result
+        coroutine = self.compile_condition(condition).match(caller, obj, **kwargs)
+        if STATEMENT_PROFILER.enabled:
+            return await STATEMENT_PROFILER.profile_statement("condition", condition, coroutine)
+        else:
+            return await coroutine
 
 
 STATEMENT_HANDLER = StatementHandler()
@@ -0,0 +1,126 @@
+"""
+Memoize results of const statement functions during a command.
+
+A command may check the same conditions many times, such as goods in a shop, loot items and dialogues. In a
+memo scope, results of const functions are kept by (function's key, args, caller, obj) and reused. Changes of
+characters' inventories, quests and states drop all results of the current scope, because conditions may
+read data of both the caller and the obj.
+"""
+
+import contextvars
+
+
+# The memo of the current task.
+_current_memo = contextvars.ContextVar("current_statement_memo", default=None)
+
+
+class MemoCounters(object):
+    """
+    Counters of all memo scopes.
+    """
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def metrics(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / total if total else 0,
+        }
+
+    def reset(self):
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+
+STATEMENT_MEMO_COUNTERS = MemoCounters()
+
+
+class StatementMemo(object):
+    """
+    Memoize const functions' results in the block. Nested scopes join the outer one.
+
+    Usage:
+        async with StatementMemo():
+            ...
+    """
+    def __init__(self):
+        self.token = None
+
+        # {(function's key, args, caller, obj): result}
+        self.results = {}
+
+        # increases when results are dropped
+        self.generation = 0
+
+    async def __aenter__(self):
+        if _current_memo.get() is None:
+            self.token = _current_memo.set(self)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self.token:
+            _current_memo.reset(self.token)
+            self.token = None
+            self.results.clear()
+
+
+async def run_memoized(call, caller, obj, **kwargs):
+    """
+    Run a function call, reuse its result if it is const and has run in the current memo scope. Functions
+which are not const may change data, so results are dropped after they run.
+
+    Args:
+        call: (FunctionCall) the function call.
+        caller: (object) statement's caller
+        obj: (object) caller's target
+    """
+    memo = _current_memo.get()
+    func_class = call.func_class
+    if memo is None or not func_class:
+        return await call.run(caller, obj, **kwargs)
+
+    if not func_class.const:
+        try:
+            return await call.run(caller, obj, **kwargs)
+        finally:
+            invalidate_statement_memo()
+
+    if kwargs or not func_class.deterministic:
+        return await call.run(caller, obj, **kwargs)
+
+    key = (call.key, call.args, caller, obj)
+    try:
+        result = memo.results[key]
+        STATEMENT_MEMO_COUNTERS.hits += 1
+        return result
+    except KeyError:
+        pass
+    except TypeError:
+        # args can not be hashed
+        return await call.run(caller, obj, **kwargs)
+
+    STATEMENT_MEMO_COUNTERS.misses += 1
+    generation = memo.generation
+    result = await call.run(caller, obj, **kwargs)
+    if memo.generation == generation:
+        # Data may be changed while the function is running.
+        memo.results[key] = result
+    return result
+
+
+def invalidate_statement_memo() -> None:
+    """
+    Drop all results of the current memo scope. Call it when characters' data that conditions read are changed.
+    """
+    memo = _current_memo.get()
+    if memo is not None:
+        memo.generation += 1
+        if memo.results:
+            memo.results.clear()
+            STATEMENT_MEMO_COUNTERS.invalidations += 1
@@ -0,0 +1,180 @@
+"""
+Profile statements.
+
+When the profiler is enabled, call counts, cumulative and max latencies and error counts are recorded for
+each statement function's key and each source statement string, so expensive statements in world data can be
+found. Times are in seconds.
+"""
+
+import json
+import time
+import contextvars
+
+
+# Errors of the statement which is running in the current task.
+_current_statement = contextvars.ContextVar("current_statement_profile", default=None)
+
+
+class ProfileRecord(object):
+    """
+    Counters of a function or a statement.
+    """
+    __slots__ = ("calls", "total_time", "max_time", "errors")
+
+    def __init__(self):
+        self.calls = 0
+        self.total_time = 0
+        self.max_time = 0
+        self.errors = 0
+
+    def add(self, elapsed, error):
+        self.calls += 1
+        self.total_time += elapsed
+        if elapsed > self.max_time:
+            self.max_time = elapsed
+        if error:
+            self.errors += 1
+
+    def to_dict(self):
+        return {
+            "calls": self.calls,
+            "total_time": self.total_time,
+            "avg_time": self.total_time / self.calls if self.calls else 0,
+            "max_time": self.max_time,
+            "errors": self.errors,
+        }
+
+
+class StatementErrors(object):
+    """
+    Errors happened while a statement is running.
+    """
+    __slots__ = ("count",)
+
+    def __init__(self):
+        self.count = 0
+
+
+class StatementProfiler(object):
+    """
+    Record statements' costs.
+    """
+    # fields can be used to sort reports
+    SORT_FIELDS = ("calls", "total_time", "avg_time", "max_time", "errors")
+
+    def __init__(self):
+        self.enabled = False
+
+        # {function's key: ProfileRecord}
+        self.functions = {}
+
+        # {(statement's type, statement): ProfileRecord}
+        self.statements = {}
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        self.functions = {}
+        self.statements = {}
+
+    def record_function(self, key, elapsed, error):
+        """
+        Record a statement function's call.
+
+        Args:
+            key: (string) function's key
+            elapsed: (float) running time
+            error: (boolean) the function raised an error
+        """
+        try:
+            record = self.functions[key]
+        except KeyError:
+            record = self.functions[key] = ProfileRecord()
+        record.add(elapsed, error)
+
+        if error:
+            self.mark_error()
+
+    def mark_error(self):
+        """
+        Count an error of the running statement.
+        """
+        errors = _current_statement.get()
+        if errors is not None:
+            errors.count += 1
+
+    async def profile_statement(self, statement_type, statement, coroutine):
+        """
+        Run a statement and record its cost.
+
+        Args:
+            statement_type: (string) "action", "skill" or "condition"
+            statement: (string) the source statement
+            coroutine: the statement's running coroutine
+
+        Returns:
+            the statement's result
+        """
+        errors = StatementErrors()
+        token = _current_statement.set(errors)
+        begin = time.perf_counter()
+        try:
+            return await coroutine
+        except Exception:
+            errors.count += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - begin
+            _current_statement.reset(token)
+
+            key = (statement_type, statement)
+            try:
+                record = self.statements[key]
+            except KeyError:
+                record = self.statements[key] = ProfileRecord()
+            record.add(elapsed, errors.count > 0)
+
+    def report(self, sort_by="total_time", limit=None):
+        """
+        Get records sorted by a field, the largest first.
+
+        Args:
+            sort_by: (string) one of SORT_FIELDS
+            limit: (int) the max number of records of each part
+
+        Returns:
+            {"functions": [record], "statements": [record]}
+        """
+        if sort_by not in self.SORT_FIELDS:
+            raise ValueError("Can not sort by %s." % sort_by)
+
+        functions = [dict(key=key, **record.to_dict()) for key, record in self.functions.items()]
+        statements = [
+            dict(type=statement_type, statement=statement, **record.to_dict())
+            for (statement_type, statement), record in self.statements.items()
+        ]
+
+        functions.sort(key=lambda item: item[sort_by], reverse=True)
+        statements.sort(key=lambda item: item[sort_by], reverse=True)
+        if limit:
+            functions = functions[:limit]
+            statements = statements[:limit]
+
+        return {
+            "functions": functions,
+            "statements": statements,
+        }
+
+    def dump(self, filename, sort_by="total_time"):
+        """
+        Write the report to a json file.
+        """
+        with open(filename, "w", encoding="utf-8") as fp:
+            json.dump(self.report(sort_by), fp, ensure_ascii=False, indent=2)
+
+
+STATEMENT_PROFILER = StatementProfiler()
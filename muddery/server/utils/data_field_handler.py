@@ -1,6 +1,9 @@
 """
 Data are arbitrary data stored in worlddata tables. They are read only.
 
+Objects of the same element can share their base data. Changed values are kept in the object's own store,
+the shared base data is never changed.
+
 """
 
 from builtins import object
@@ -17,6 +20,10 @@ class DataFieldHandler(object):
         """
         Initialized on the object
         """
+        # shared data, read only
+        self._base = {}
+
+        # the object's own data, it overrides the base data
         self._store = {}
         self.obj = weakref.proxy(obj)
 
@@ -31,7 +38,7 @@ class DataFieldHandler(object):
             has_data (bool): If Data is set or not.
 
         """
-        return key in self._store
+        return key in self._store or key in self._base
 
     def get(self, key):
         """
@@ -43,9 +50,11 @@ class DataFieldHandler(object):
         Returns:
             the value of the Data.
         """
-        if key not in self._store:
+        if key in self._store:
+            return self._store[key]
+        if key not in self._base:
             raise AttributeError
-        return self._store.get(key)
+        return self._base[key]
 
     def add(self, key, value):
         """
@@ -63,6 +72,19 @@ class DataFieldHandler(object):
         Remove all NAttributes from handler.
 
         """
+        self._base = {}
+        self._store = {}
+
+    def set_base(self, data):
+        """
+        Use shared data and remove the object's own data. The shared data will not be changed, new values are
+        added to the object's own data.
+
+        Args:
+            data (dict): the shared data.
+
+        """
+        self._base = data
         self._store = {}
 
     def all(self):
@@ -79,7 +101,9 @@ class DataFieldHandler(object):
                 setting of `return_tuples`.
 
         """
-        return self._store
+        if not self._base:
+            return self._store
+        return dict(self._base, **self._store)
 
 
 class DataHolder(object):
@@ -8,6 +8,14 @@ which is a non-db version of Attributes.
 
 """
 
+import copy
+import weakref
+import asyncio
+from muddery.server.utils.logger import logger
+from muddery.server.database.storage.unit_of_work import detached_context, run_in_background_unit, call_on_rollback
+from muddery.server.statements.statement_memo import invalidate_statement_memo
+
+
 # -------------------------------------------------------------
 #
 #   Attributes
@@ -66,12 +74,14 @@ class ObjectStatesHandler(object):
             value (any or str): The value of the Attribute. If
                 `strattr` keyword is set, this *must* be a string.
         """
+        invalidate_statement_memo()
         await self.storage.save(self.obj_id, key, value)
 
     async def saves(self, value_dict):
         """
         Set attributes.
         """
+        invalidate_statement_memo()
         await self.storage.save_keys(self.obj_id, value_dict)
 
     async def delete(self, key):
@@ -89,12 +99,14 @@ class ObjectStatesHandler(object):
             If neither key nor category is given, this acts as clear().
 
         """
+        invalidate_statement_memo()
         await self.storage.delete(self.obj_id, key)
 
     async def clear(self):
         """
         Remove all Attributes on this object.
         """
+        invalidate_statement_memo()
         await self.storage.remove_obj(self.obj_id)
 
     async def all(self):
@@ -103,8 +115,228 @@ class ObjectStatesHandler(object):
         """
         return await self.storage.load_obj(self.obj_id)
 
+    async def flush(self):
+        """
+        Write buffered changes to the storage.
+        """
+        pass
+
     def transaction(self):
         """
         Begin a transaction.
         """
         return self.storage.transaction()
+
+
+class BufferedObjectStatesHandler(ObjectStatesHandler):
+    """
+    Keep all attributes of an object in memory. Reads and validations do not touch the storage, changed
+    attributes are written to the storage by flush() or a timer.
+
+    Attributes changed in the buffer are not in the storage's transactions.
+    """
+    # Values of these types are immutable, they do not need to be copied.
+    IMMUTABLE_TYPES = {type(None), bool, int, float, str, bytes, tuple, frozenset}
+
+    # all live handlers
+    instances = weakref.WeakSet()
+
+    def __init__(self, obj_id, storage_class, flush_interval=0):
+        """
+        Args:
+            obj_id: the object's id.
+            storage_class: the storage's class.
+            flush_interval: (number) seconds to flush changes automatically, 0 means do not flush automatically.
+        """
+        super(BufferedObjectStatesHandler, self).__init__(obj_id, storage_class)
+
+        self.flush_interval = flush_interval
+        self.flush_handle = None
+
+        # all attributes: {key: value}, load them at the first time.
+        self.buffer = None
+
+        # changed keys
+        self.dirty = set()
+
+        # deleted keys
+        self.deleted = set()
+
+        # metrics
+        self.buffered_writes = 0
+        self.flushed_writes = 0
+
+        self.instances.add(self)
+
+    async def load_buffer(self):
+        """
+        Load all attributes to the buffer.
+        """
+        if self.buffer is None:
+            self.buffer = await self.storage.load_obj(self.obj_id)
+        return self.buffer
+
+    def copy_value(self, value):
+        if type(value) in self.IMMUTABLE_TYPES:
+            return value
+        return copy.deepcopy(value)
+
+    async def has(self, key):
+        """
+        Checks if the given Attribute exists on the object.
+
+        Args:
+            key (str): The Attribute key to check for.
+        """
+        buffer = await self.load_buffer()
+        return key in buffer
+
+    async def load(self, key, default=None):
+        """
+        Get the Attribute.
+
+        Args:
+            key (str): the attribute identifier.
+            default (any or none): default value.
+        """
+        buffer = await self.load_buffer()
+        if key in buffer:
+            return self.copy_value(buffer[key])
+        return default
+
+    async def save(self, key, value):
+        """
+        Add attribute to object.
+
+        Args:
+            key (str): An Attribute name to add.
+            value (any): The value of the Attribute.
+        """
+        buffer = await self.load_buffer()
+        invalidate_statement_memo()
+        buffer[key] = self.copy_value(value)
+        self.mark_dirty(key)
+
+    async def saves(self, value_dict):
+        """
+        Set attributes.
+        """
+        buffer = await self.load_buffer()
+        invalidate_statement_memo()
+        for key, value in value_dict.items():
+            buffer[key] = self.copy_value(value)
+            self.mark_dirty(key)
+
+    async def delete(self, key):
+        """
+        Remove an attribute from object.
+
+        Args:
+            key (str ): An Attribute key to remove keys.
+        """
+        buffer = await self.load_buffer()
+        if key in buffer:
+            invalidate_statement_memo()
+            del buffer[key]
+            self.dirty.discard(key)
+            self.deleted.add(key)
+            self.schedule_flush()
+
+    async def clear(self):
+        """
+        Remove all Attributes on this object.
+        """
+        self.buffer = {}
+        self.dirty = set()
+        self.deleted = set()
+        invalidate_statement_memo()
+        await self.storage.remove_obj(self.obj_id)
+
+    async def all(self):
+        """
+        Get all attributes from an object.
+        """
+        buffer = await self.load_buffer()
+        return {key: self.copy_value(value) for key, value in buffer.items()}
+
+    def mark_dirty(self, key):
+        self.dirty.add(key)
+        self.deleted.discard(key)
+        self.buffered_writes += 1
+        self.schedule_flush()
+
+    def schedule_flush(self):
+        if self.flush_interval and self.flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self.flush_handle = loop.call_later(self.flush_interval, self.start_flush, context=detached_context())
+
+    def start_flush(self):
+        """
+        Called by the flush timer.
+        """
+        self.flush_handle = None
+        asyncio.create_task(self.flush_in_background())
+
+    async def flush_in_background(self):
+        try:
+            await run_in_background_unit(self.flush)
+        except Exception as e:
+            logger.log_err("Can not flush states of %s: %s" % (self.obj_id, e))
+            self.schedule_flush()
+
+    async def flush(self):
+        """
+        Write buffered changes to the storage.
+        """
+        if self.flush_handle:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+
+        if not self.dirty and not self.deleted:
+            return
+
+        dirty = self.dirty
+        deleted = self.deleted
+        self.dirty = set()
+        self.deleted = set()
+
+        try:
+            if dirty:
+                await self.storage.save_keys(self.obj_id, {key: self.buffer[key] for key in dirty})
+            if deleted:
+                await self.storage.delete_keys(self.obj_id, list(deleted))
+        except Exception:
+            self.restore_dirty(dirty, deleted)
+            raise
+
+        # Writes join the current unit of work. If it is rolled back, write these keys again later.
+        call_on_rollback(lambda: self.restore_dirty(dirty, deleted))
+
+        self.flushed_writes += len(dirty) + len(deleted)
+
+    def restore_dirty(self, dirty, deleted):
+        """
+        Mark keys as changed again after their writes have failed or been rolled back.
+
+        Args:
+            dirty: (set) keys have been saved.
+            deleted: (set) keys have been deleted.
+        """
+        # Keep them dirty if they have not been changed again.
+        buffer = self.buffer or {}
+        self.dirty.update(key for key in dirty - self.deleted if key in buffer)
+        self.deleted.update(key for key in deleted - self.dirty if key not in buffer)
+        if self.dirty or self.deleted:
+            self.schedule_flush()
+
+    @classmethod
+    async def flush_all(cls):
+        """
+        Flush all buffered handlers.
+        """
+        for handler in list(cls.instances):
+            try:
+                await handler.flush()
+            except Exception as e:
+                logger.log_err("Can not flush states of %s: %s" % (handler.obj_id, e))
+
@@ -0,0 +1,300 @@
+"""
+A hierarchical timing wheel which runs all timers of the game server.
+
+Timers are put into slots of the wheels by their deadlines. Level 0 has one slot per tick, each slot of
+a higher level covers a whole rotation of the level below it. When a lower level finishes a rotation,
+timers in the next slot of the higher level are moved down. Scheduling and canceling a timer take O(1),
+and timers in the same tick are fired by one wakeup of the event loop.
+"""
+
+import math
+import asyncio
+import inspect
+from muddery.server.utils.logger import logger
+from muddery.server.database.storage.unit_of_work import detached_context, run_in_background_unit
+
+
+class TimerHandle(object):
+    """
+    A scheduled timer.
+    """
+    __slots__ = ("wheel", "deadline", "interval", "callback", "args", "slot", "cancelled", "running")
+
+    def __init__(self, wheel, deadline, interval, callback, args):
+        self.wheel = wheel
+        self.deadline = deadline
+        self.interval = interval
+        self.callback = callback
+        self.args = args
+        self.slot = None
+        self.cancelled = False
+
+        # If the coroutine callback is running.
+        self.running = False
+
+    def cancel(self):
+        """
+        Cancel the timer.
+        """
+        self.wheel.cancel(self)
+
+    def reschedule(self, delay):
+        """
+        Fire the timer after delay seconds from now.
+        """
+        self.wheel.reschedule(self, delay)
+
+    def active(self):
+        """
+        If the timer is waiting to fire.
+        """
+        return self.slot is not None
+
+
+class TimerWheel(object):
+    """
+    The timing wheel.
+
+    Usage:
+        handle = wheel.schedule(5, character.reborn)
+        handle = wheel.schedule(2, character.auto_cast_skill, interval=2)
+        handle.cancel()
+    """
+    def __init__(self, tick=0.1, slot_bits=6, levels=4):
+        """
+        Args:
+            tick: (float) seconds of a tick, timers' precision.
+            slot_bits: (int) each wheel has 2 ** slot_bits slots.
+            levels: (int) the number of wheels. Timers later than tick * 2 ** (slot_bits * levels) seconds
+                are put into the last slot and moved again when the slot is reached.
+        """
+        self.tick = tick
+        self.slot_bits = slot_bits
+        self.slot_mask = (1 << slot_bits) - 1
+        self.levels = levels
+        self.wheels = [[{} for i in range(1 << slot_bits)] for level in range(levels)]
+
+        self.start_time = None
+        self.current_tick = 0
+        self.wakeup_handle = None
+        self.wakeup_tick = None
+
+        # metrics
+        self.count = 0
+        self.fired = 0
+        self.wakeups = 0
+        self.total_lag = 0
+        self.max_lag = 0
+
+    def time(self):
+        return asyncio.get_running_loop().time()
+
+    def schedule(self, delay, callback, *args, interval=None):
+        """
+        Call the callback after delay seconds. Coroutine functions run in new tasks.
+
+        Args:
+            delay: (float) seconds to wait.
+            callback: (callable) the function to call.
+            args: the callback's args.
+            interval: (float) call the callback every interval seconds after the first call.
+
+        Returns:
+            (TimerHandle) the timer's handle.
+        """
+        handle = TimerHandle(self, self.time() + delay, interval, callback, args)
+        self.add(handle)
+        return handle
+
+    def cancel(self, handle):
+        """
+        Cancel a timer.
+        """
+        handle.cancelled = True
+        self.remove(handle)
+
+    def reschedule(self, handle, delay):
+        """
+        Fire a timer after delay seconds from now.
+        """
+        self.remove(handle)
+        handle.cancelled = False
+        handle.deadline = self.time() + delay
+        self.add(handle)
+
+    def add(self, handle):
+        if self.start_time is None or self.count == 0:
+            # Restart an idle wheel from now.
+            if self.start_time is None:
+                self.start_time = self.time()
+            self.current_tick = max(self.current_tick, self.time_to_tick(self.time()))
+
+        self.put(handle)
+        self.count += 1
+        self.schedule_wakeup()
+
+    def remove(self, handle):
+        if handle.slot is not None:
+            del handle.slot[handle]
+            handle.slot = None
+            self.count -= 1
+
+    def time_to_tick(self, timestamp):
+        return int((timestamp - self.start_time) / self.tick)
+
+    def put(self, handle, earliest_tick=None):
+        """
+        Put a timer into the slot of its deadline.
+
+        Args:
+            handle: (TimerHandle) the timer.
+            earliest_tick: (int) overdue timers fire at this tick, the next tick by default.
+        """
+        if earliest_tick is None:
+            earliest_tick = self.current_tick + 1
+
+        expire_tick = max(math.ceil((handle.deadline - self.start_time) / self.tick), earliest_tick)
+        delta = expire_tick - self.current_tick
+
+        for level in range(self.levels):
+            if delta < 1 << (self.slot_bits * (level + 1)) or level == self.levels - 1:
+                if level == self.levels - 1:
+                    # Put too late timers into the farthest slot.
+                    expire_tick = min(expire_tick, self.current_tick + (1 << (self.slot_bits * self.levels)) - 1)
+                slot = self.wheels[level][(expire_tick >> (self.slot_bits * level)) & self.slot_mask]
+                slot[handle] = None
+                handle.slot = slot
+                return
+
+    def next_wakeup_tick(self):
+        """
+        The next tick which has timers to fire or to move down.
+        """
+        wheel = self.wheels[0]
+        rotation_end = ((self.current_tick >> self.slot_bits) + 1) << self.slot_bits
+        for tick in range(self.current_tick + 1, rotation_end):
+            if wheel[tick & self.slot_mask]:
+                return tick
+        return rotation_end
+
+    def schedule_wakeup(self):
+        """
+        Wake up at the next tick having timers. Timers do not belong to the caller's context.
+        """
+        if self.count == 0:
+            return
+
+        tick = self.next_wakeup_tick()
+        if self.wakeup_handle:
+            if self.wakeup_tick <= tick:
+                return
+            self.wakeup_handle.cancel()
+
+        loop = asyncio.get_running_loop()
+        self.wakeup_tick = tick
+        self.wakeup_handle = loop.call_at(self.start_time + tick * self.tick, self.wakeup,
+                                          context=detached_context())
+
+    def wakeup(self):
+        self.wakeup_handle = None
+        self.wakeups += 1
+
+        now = self.time()
+        # The event loop may wake up a little early.
+        target_tick = self.time_to_tick(now + self.tick * 0.001)
+        while self.current_tick < target_tick:
+            self.current_tick += 1
+            self.cascade()
+
+            slot = self.wheels[0][self.current_tick & self.slot_mask]
+            if slot:
+                handles = list(slot)
+                slot.clear()
+                self.count -= len(handles)
+
+                # Callbacks may cancel or reschedule other timers of the batch.
+                for handle in handles:
+                    handle.slot = None
+                for handle in handles:
+                    if handle.cancelled or handle.slot is not None:
+                        continue
+                    self.fire(handle, now)
+
+        self.schedule_wakeup()
+
+    def cascade(self):
+        """
+        Move timers of higher levels down when lower levels finish rotations.
+        """
+        for level in range(1, self.levels):
+            if self.current_tick & ((1 << (self.slot_bits * level)) - 1):
+                break
+
+            slot = self.wheels[level][(self.current_tick >> (self.slot_bits * level)) & self.slot_mask]
+            if slot:
+                handles = list(slot)
+                slot.clear()
+                for handle in handles:
+                    # Level 0's current slot has not fired yet.
+                    self.put(handle, self.current_tick)
+
+    def fire(self, handle, now):
+        if handle.cancelled:
+            return
+
+        lag = now - handle.deadline
+        self.fired += 1
+        self.total_lag += lag
+        if lag > self.max_lag:
+            self.max_lag = lag
+
+        if handle.interval:
+            handle.deadline += handle.interval
+            if handle.deadline < now:
+                # Skip missed runs.
+                handle.deadline = now + handle.interval
+            self.put(handle)
+            self.count += 1
+
+        if inspect.iscoroutinefunction(handle.callback):
+            if handle.running:
+                # Skip this run, the last run has not finished.
+                return
+
+            # Coroutine timers run in their own units of work.
+            handle.running = True
+            asyncio.ensure_future(self.run_coroutine(handle))
+            return
+
+        try:
+            result = handle.callback(*handle.args)
+            if inspect.isawaitable(result):
+                asyncio.ensure_future(self.wait_result(handle, result))
+        except Exception as e:
+            logger.log_trace("Timer %s error: %s" % (handle.callback, e))
+
+    async def run_coroutine(self, handle):
+        try:
+            await run_in_background_unit(handle.callback, *handle.args)
+        except Exception as e:
+            logger.log_trace("Timer %s error: %s" % (handle.callback, e))
+        finally:
+            handle.running = False
+
+    async def wait_result(self, handle, result):
+        try:
+            await result
+        except Exception as e:
+            logger.log_trace("Timer %s error: %s" % (handle.callback, e))
+
+    def metrics(self):
+        """
+        Get the wheel's metrics. Times are in seconds.
+        """
+        return {
+            "timers": self.count,
+            "fired": self.fired,
+            "wakeups": self.wakeups,
+            "max_lag": self.max_lag,
+            "avg_lag": self.total_lag / self.fired if self.fired else 0,
+        }